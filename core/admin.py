@@ -1,8 +1,12 @@
 from django.contrib import admin
+from django.core.exceptions import PermissionDenied
+from django.http import Http404
+from django.shortcuts import render
 from .models import (
     Grower, Farm, Region, PlantType, PlantPart, Pest, Disease, 
-    SeasonalStage, SurveySession, Observation, SurveillanceCalculation
+    SeasonalStage, SurveySession, SessionParticipant, Observation, SurveillanceCalculation, SessionArchive
 )
+from .profiling import can_use_profiles, list_profiles, load_profile, profiling_enabled
 
 @admin.register(Grower)
 class GrowerAdmin(admin.ModelAdmin):
@@ -13,15 +17,21 @@ class GrowerAdmin(admin.ModelAdmin):
 
 @admin.register(Farm)
 class FarmAdmin(admin.ModelAdmin):
-    list_display = ['name', 'owner', 'region', 'size_hectares', 'stocking_rate', 'total_plants']
+    list_display = ['name', 'owner', 'region', 'size_hectares', 'boundary_area_hectares', 'area_mismatch', 'stocking_rate', 'total_plants']
     search_fields = ['name', 'owner__user__username', 'formatted_address']
     list_filter = ['region', 'plant_type']
-    readonly_fields = ['total_plants']
+    list_select_related = ['owner__user', 'region']
+    readonly_fields = ['total_plants', 'boundary_area_hectares', 'centroid_lat', 'centroid_lng']
     
     def total_plants(self, obj):
         return obj.total_plants()
     total_plants.short_description = 'Total Plants'
 
+    def area_mismatch(self, obj):
+        return obj.has_area_mismatch()
+    area_mismatch.boolean = True
+    area_mismatch.short_description = 'Size Mismatch'
+
 @admin.register(Region)
 class RegionAdmin(admin.ModelAdmin):
     list_display = ['name', 'climate_zone', 'state_abbreviation']
@@ -55,22 +65,44 @@ class SeasonalStageAdmin(admin.ModelAdmin):
     search_fields = ['name']
     filter_horizontal = ['active_pests', 'active_diseases']
 
+class SessionParticipantInline(admin.TabularInline):
+    model = SessionParticipant
+    extra = 0
+    can_delete = False
+    fields = ['user', 'joined_at', 'target_share', 'sequence_start', 'sequence_end',
+              'last_sequence_number', 'observations_recorded']
+    readonly_fields = fields
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
 @admin.register(SurveySession)
 class SurveySessionAdmin(admin.ModelAdmin):
     list_display = ['farm', 'surveyor', 'start_time', 'end_time', 'status', 'observation_count']
     search_fields = ['farm__name', 'surveyor__username']
     list_filter = ['status', 'start_time']
+    list_select_related = ['farm', 'surveyor']
     readonly_fields = ['session_id', 'observation_count']
+    inlines = [SessionParticipantInline]
+    actions = ['recount_progress']
     
     def observation_count(self, obj):
         return obj.observation_count()
     observation_count.short_description = 'Observations'
 
+    # The running progress counters only see observations added through the app
+    @admin.action(description='Recount progress from observations')
+    def recount_progress(self, request, queryset):
+        for session in queryset:
+            session.recount_progress()
+        self.message_user(request, f"Recounted progress for {queryset.count()} sessions.")
+
 @admin.register(Observation)
 class ObservationAdmin(admin.ModelAdmin):
     list_display = ['session', 'plant_sequence_number', 'observation_time', 'status', 'has_pests', 'has_diseases']
     search_fields = ['session__farm__name', 'notes']
     list_filter = ['status', 'observation_time']
+    list_select_related = ['session__farm']
     filter_horizontal = ['pests_observed', 'diseases_observed']
     
     def has_pests(self, obj):
@@ -88,4 +120,45 @@ class SurveillanceCalculationAdmin(admin.ModelAdmin):
     list_display = ['farm', 'created_by', 'date_created', 'season', 'confidence_level', 'required_plants', 'is_current']
     search_fields = ['farm__name', 'created_by__username']
     list_filter = ['season', 'confidence_level', 'is_current', 'date_created']
-    readonly_fields = ['date_created']
\ No newline at end of file
+    list_select_related = ['farm', 'created_by']
+    readonly_fields = ['date_created']
+
+@admin.register(SessionArchive)
+class SessionArchiveAdmin(admin.ModelAdmin):
+    list_display = ['farm', 'surveyor', 'start_time', 'end_time', 'status', 'observation_count', 'archived_at']
+    search_fields = ['farm__name', 'surveyor__username', 'session_id']
+    list_filter = ['status', 'archived_at']
+    list_select_related = ['farm', 'surveyor']
+
+    # Archived sessions are written only by the archiver
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+# Request profiles (see core.profiling). Wrapped with admin.site.admin_view in finalproject/urls.py,
+# which admits any staff user; the profiles themselves are for superusers only.
+def profile_list_view(request):
+    if not can_use_profiles(request.user):
+        raise PermissionDenied
+    context = {
+        **admin.site.each_context(request),
+        'title': 'Request profiles',
+        'profiles': list_profiles(),
+        'profiling_enabled': profiling_enabled(),
+    }
+    return render(request, 'admin/core/profile_list.html', context)
+
+def profile_detail_view(request, profile_id):
+    if not can_use_profiles(request.user):
+        raise PermissionDenied
+    profile, error = load_profile(profile_id)
+    if error:
+        raise Http404(error)
+    context = {
+        **admin.site.each_context(request),
+        'title': f"Profile {profile_id}",
+        'profile': profile,
+    }
+    return render(request, 'admin/core/profile_detail.html', context)
@@ -4,3 +4,21 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from django.db.models.signals import post_save, post_delete, m2m_changed
+        from .db_tuning import configure_sqlite_connection
+        from .models import PlantType, PlantPart, Pest, Disease, SeasonalStage
+        from .taxonomy import invalidate_taxonomy
+
+        connection_created.connect(configure_sqlite_connection, dispatch_uid='core_sqlite_pragmas')
+
+        # Any change to the taxonomy tables refreshes the in-memory snapshot
+        for model in (PlantType, PlantPart, Pest, Disease, SeasonalStage):
+            post_save.connect(invalidate_taxonomy, sender=model, dispatch_uid=f'taxonomy_save_{model.__name__}')
+            post_delete.connect(invalidate_taxonomy, sender=model, dispatch_uid=f'taxonomy_delete_{model.__name__}')
+        for field in (Pest.affects_plant_types, Pest.affects_plant_parts, Disease.affects_plant_types,
+                      Disease.affects_plant_parts, SeasonalStage.active_pests, SeasonalStage.active_diseases):
+            m2m_changed.connect(invalidate_taxonomy, sender=field.through,
+                                dispatch_uid=f'taxonomy_m2m_{field.through.__name__}')
@@ -0,0 +1,111 @@
+import logging
+from datetime import timedelta
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import metrics
+from .models import SurveySession, SessionParticipant, Observation, SessionArchive
+
+logger = logging.getLogger(__name__)
+
+
+def archivable_sessions(abandoned_days: Optional[int] = None):
+    """
+    Sessions old enough to archive: abandoned ones that started more than
+    abandoned_days ago. Completed sessions are never archived; the record list,
+    the farm pages and the session detail page all read them from the hot tables.
+    """
+    if abandoned_days is None:
+        abandoned_days = settings.SESSION_ARCHIVE_ABANDONED_DAYS
+    # Served by the (status, start_time) index
+    return SurveySession.objects.filter(
+        status='abandoned', start_time__lt=timezone.now() - timedelta(days=abandoned_days)
+    ).order_by('id')
+
+
+def _build_archives(session_ids: List[int]) -> List[SessionArchive]:
+    """Reads the sessions, participants, observations and observation M2M rows with flat queries."""
+    pests: Dict[int, List[int]] = {}
+    for observation_id, pest_id in Observation.pests_observed.through.objects.filter(
+        observation__session_id__in=session_ids
+    ).values_list('observation_id', 'pest_id'):
+        pests.setdefault(observation_id, []).append(pest_id)
+    diseases: Dict[int, List[int]] = {}
+    for observation_id, disease_id in Observation.diseases_observed.through.objects.filter(
+        observation__session_id__in=session_ids
+    ).values_list('observation_id', 'disease_id'):
+        diseases.setdefault(observation_id, []).append(disease_id)
+
+    participants: Dict[int, list] = {}
+    for session_id, user_id, joined_at, share, first, last, recorded in SessionParticipant.objects.filter(
+        session_id__in=session_ids
+    ).order_by('session_id', 'joined_at', 'id').values_list(
+        'session_id', 'user_id', 'joined_at', 'target_share', 'sequence_start', 'sequence_end', 'observations_recorded'
+    ):
+        participants.setdefault(session_id, []).append([user_id, joined_at.isoformat(), share, first, last, recorded])
+
+    rows: Dict[int, list] = {}
+    observations = Observation.objects.filter(session_id__in=session_ids).order_by(
+        'session_id', 'observation_time', 'id'
+    ).values_list('id', 'session_id', 'plant_sequence_number', 'observation_time', 'status', 'notes', 'participant__user_id')
+    for observation_id, session_id, sequence, observed_at, status, notes, recorded_by in observations:
+        rows.setdefault(session_id, []).append([
+            sequence, observed_at.isoformat(), status, notes,
+            sorted(pests.get(observation_id, [])), sorted(diseases.get(observation_id, [])), recorded_by,
+        ])
+
+    archives = []
+    for session in SurveySession.objects.filter(id__in=session_ids).values(
+        'id', 'session_id', 'farm_id', 'surveyor_id', 'status', 'start_time', 'end_time', 'target_plants_surveyed'
+    ):
+        session_rows = rows.get(session['id'], [])
+        archives.append(SessionArchive(
+            session_id=session['session_id'],
+            farm_id=session['farm_id'],
+            surveyor_id=session['surveyor_id'],
+            status=session['status'],
+            start_time=session['start_time'],
+            end_time=session['end_time'],
+            target_plants_surveyed=session['target_plants_surveyed'],
+            observation_count=sum(1 for row in session_rows if row[2] == 'completed'),
+            observations=session_rows,
+            participants=participants.get(session['id'], []),
+        ))
+    return archives
+
+
+def archive_sessions(abandoned_days: Optional[int] = None, batch_size: Optional[int] = None,
+                     max_batches: Optional[int] = None) -> Dict[str, int]:
+    """
+    Moves archivable sessions (see archivable_sessions) with their observations
+    into SessionArchive, batch_size sessions per transaction: the archive rows
+    are inserted and the originals removed with raw deletes
+    (SurveySession.objects.delete_sessions). Returns counts by session status.
+    """
+    batch_size = batch_size or settings.SESSION_ARCHIVE_BATCH_SIZE
+    candidates = archivable_sessions(abandoned_days)
+    counts = {'abandoned': 0}
+    batches = 0
+    last_id = 0
+    while max_batches is None or batches < max_batches:
+        ids = list(candidates.filter(id__gt=last_id).values_list('id', flat=True)[:batch_size])
+        if not ids:
+            break
+        with transaction.atomic():
+            archives = _build_archives(ids)
+            SessionArchive.objects.bulk_create(archives)
+            SurveySession.objects.delete_sessions(ids)
+        for archive in archives:
+            counts[archive.status] = counts.get(archive.status, 0) + 1
+        last_id = ids[-1]
+        batches += 1
+
+    for status, count in counts.items():
+        if count:
+            metrics.inc('sessions_archived_total', {'status': status}, count)
+    if any(counts.values()):
+        logger.info(f"Archived sessions in {batches} batches: {counts}")
+    return counts
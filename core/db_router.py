@@ -0,0 +1,78 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+
+# Request-scoped routing state, set by core.middleware.ReplicaRoutingMiddleware.
+_use_replica = ContextVar('core_use_replica', default=False)
+_wrote_primary = ContextVar('core_wrote_primary', default=False)
+
+
+def get_replica_aliases():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+def replica_reads(view_func):
+    """
+    Marks a read-heavy view as safe to serve from a read replica. The
+    middleware only honours it for GET/HEAD requests from users who have not
+    written recently.
+    """
+    view_func.replica_reads = True
+    return view_func
+
+
+def use_replica(enabled: bool):
+    return _use_replica.set(enabled)
+
+
+def reset_replica(token):
+    _use_replica.reset(token)
+
+
+def start_write_tracking():
+    return _wrote_primary.set(False)
+
+
+def wrote_to_primary() -> bool:
+    return _wrote_primary.get()
+
+
+def reset_write_tracking(token):
+    _wrote_primary.reset(token)
+
+
+class PrimaryReplicaRouter:
+    """
+    A router to split core database traffic between the primary and read replicas.
+    Reads go to a replica only when the current request has opted in; every
+    write goes to the primary and is remembered so the middleware can pin the
+    user to the primary for a short while (read-your-writes).
+    """
+
+    def db_for_read(self, model, **hints):
+        """Suggest the database to read from."""
+        if model._meta.app_label != 'core' or not _use_replica.get():
+            return None  # Use default
+        replicas = get_replica_aliases()
+        return random.choice(replicas) if replicas else None
+
+    def db_for_write(self, model, **hints):
+        """Suggest the database to write to."""
+        if model._meta.app_label == 'core':
+            _wrote_primary.set(True)
+            return 'default'
+        return None  # Use default for other apps
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """Replicas hold the same data as the primary, so relations across them are fine."""
+        databases = {'default', *get_replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        """Replicas are copies of the primary and are never migrated directly."""
+        if db in get_replica_aliases():
+            return False
+        return None
@@ -0,0 +1,107 @@
+import logging
+from contextlib import contextmanager
+from typing import Dict, Any
+
+from django.conf import settings
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+# Pragmas we allow to be configured, with the values SQLite accepts for them.
+# Anything else in settings.SQLITE_PRAGMAS is ignored with a warning rather than
+# interpolated into SQL. busy_timeout is deliberately absent: the lock wait comes
+# only from DATABASES[...]['OPTIONS']['timeout'].
+ALLOWED_PRAGMAS = {
+    'journal_mode': {'DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF'},
+    'synchronous': {'OFF', 'NORMAL', 'FULL', 'EXTRA'},
+    'temp_store': {'DEFAULT', 'FILE', 'MEMORY'},
+    'cache_size': int,
+    'mmap_size': int,
+    'wal_autocheckpoint': int,
+    'foreign_keys': {'ON', 'OFF'},
+}
+
+DEFAULT_SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -20000,
+    'mmap_size': 134217728,
+    'temp_store': 'MEMORY',
+}
+
+
+def get_configured_pragmas() -> Dict[str, Any]:
+    return getattr(settings, 'SQLITE_PRAGMAS', DEFAULT_SQLITE_PRAGMAS)
+
+
+def pragma_statements(pragmas: Dict[str, Any]) -> list:
+    """Validates configured pragmas and returns the PRAGMA statements to run."""
+    statements = []
+    for name, value in pragmas.items():
+        allowed = ALLOWED_PRAGMAS.get(name)
+        if name == 'busy_timeout':
+            logger.warning("Ignoring SQLite pragma busy_timeout: set DATABASES OPTIONS['timeout'] instead")
+            continue
+        if allowed is None:
+            logger.warning(f"Ignoring unsupported SQLite pragma '{name}'")
+            continue
+        if allowed is int:
+            try:
+                value = int(value)
+            except (TypeError, ValueError):
+                logger.warning(f"Ignoring SQLite pragma {name}={value!r}: expected an integer")
+                continue
+        else:
+            value = str(value).upper()
+            if value not in allowed:
+                logger.warning(f"Ignoring SQLite pragma {name}={value!r}: expected one of {sorted(allowed)}")
+                continue
+        statements.append(f"PRAGMA {name} = {value}")
+    return statements
+
+
+def apply_pragmas(cursor, pragmas: Dict[str, Any]) -> None:
+    for statement in pragma_statements(pragmas):
+        cursor.execute(statement)
+
+
+def configure_sqlite_connection(sender, connection, **kwargs):
+    """
+    connection_created handler: applies settings.SQLITE_PRAGMAS to every new
+    SQLite connection. journal_mode=WAL is persistent in the database file;
+    the others are per-connection and must be set each time.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = get_configured_pragmas()
+    if not pragmas:
+        return
+    with connection.cursor() as cursor:
+        apply_pragmas(cursor, pragmas)
+
+
+@contextmanager
+def write_transaction(using=None):
+    """
+    atomic() for read-then-write transactions. On SQLite the outermost block
+    starts with BEGIN IMMEDIATE, taking the write lock up front: a deferred
+    transaction that reads first cannot be retried by the busy timeout when
+    its lock upgrade fails. Plain atomic() elsewhere, so read-only
+    transactions never queue behind writers.
+    """
+    connection = transaction.get_connection(using)
+    if connection.vendor != 'sqlite' or connection.in_atomic_block:
+        with transaction.atomic(using=using):
+            yield
+        return
+
+    # transaction_mode is read from OPTIONS on connect, so connect before overriding it
+    connection.ensure_connection()
+    previous = connection.transaction_mode
+    connection.transaction_mode = 'IMMEDIATE'
+    try:
+        with transaction.atomic(using=using):
+            connection.transaction_mode = previous
+            yield
+    finally:
+        connection.transaction_mode = previous
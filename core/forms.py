@@ -3,9 +3,10 @@ from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 
 from .models import (
-    Grower, Farm, PlantPart, Pest, Region,
-    SEASON_CHOICES, CONFIDENCE_CHOICES, Disease, Observation
+    Grower, Farm, PlantPart, Region,
+    SEASON_CHOICES, CONFIDENCE_CHOICES, Observation
 )
+from .taxonomy import get_taxonomy
 
 
 class SignUpForm(forms.ModelForm):
@@ -128,14 +129,19 @@ class CalculatorForm(forms.Form):
 
 
 class ObservationForm(forms.ModelForm):
-    pests_observed = forms.ModelMultipleChoiceField(
-        queryset=Pest.objects.all().order_by('name'),
+    # Choices come from the in-memory taxonomy snapshot, so rendering and
+    # validating the form never queries the pest/disease tables. Cleaned
+    # values are lists of ids.
+    pests_observed = forms.TypedMultipleChoiceField(
+        choices=lambda: get_taxonomy().pest_choices(),
+        coerce=int,
         widget=forms.CheckboxSelectMultiple,
         required=False,
         label="Pests Observed at this Plant"
     )
-    diseases_observed = forms.ModelMultipleChoiceField(
-        queryset=Disease.objects.all().order_by('name'),
+    diseases_observed = forms.TypedMultipleChoiceField(
+        choices=lambda: get_taxonomy().disease_choices(),
+        coerce=int,
         widget=forms.CheckboxSelectMultiple,
         required=False,
         label="Diseases Observed at this Plant"
@@ -0,0 +1,314 @@
+import math
+from typing import Dict, Any, Optional, List, Tuple
+
+# Geometry helpers for farm boundaries. Everything here works on plain
+# GeoJSON-style coordinates ([longitude, latitude] pairs) so it can be used
+# from models, services and migrations alike.
+
+DEFAULT_SIMPLIFY_ZOOM = 17
+DEFAULT_PRECISION = 6
+
+# Web Mercator tiles are 256px wide and cover 360 degrees of longitude at zoom 0.
+TILE_SIZE = 256
+
+Point = Tuple[float, float]
+
+
+def tolerance_for_zoom(zoom: int, latitude: float = 0.0, pixels: float = 0.5) -> float:
+    """
+    Returns the simplification tolerance (in degrees) that keeps the geometry
+    visually unchanged up to the given map zoom level.
+    """
+    degrees_per_pixel = 360.0 / (TILE_SIZE * (2 ** zoom))
+    # A pixel covers fewer degrees of latitude than longitude away from the
+    # equator, so scale by cos(lat) to stay within the tolerance on both axes.
+    return degrees_per_pixel * max(math.cos(math.radians(latitude)), 0.01) * pixels
+
+
+def _perpendicular_distance(point: Point, start: Point, end: Point) -> float:
+    dx = end[0] - start[0]
+    dy = end[1] - start[1]
+    if dx == 0 and dy == 0:
+        return math.hypot(point[0] - start[0], point[1] - start[1])
+    t = ((point[0] - start[0]) * dx + (point[1] - start[1]) * dy) / (dx * dx + dy * dy)
+    t = max(0.0, min(1.0, t))
+    return math.hypot(point[0] - (start[0] + t * dx), point[1] - (start[1] + t * dy))
+
+
+def simplify_line(points: List[Point], tolerance: float) -> List[Point]:
+    """
+    Douglas-Peucker simplification of a line. Uses an explicit stack so
+    parcels with thousands of vertices do not hit the recursion limit.
+    """
+    if len(points) < 3 or tolerance <= 0:
+        return list(points)
+
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+
+    while stack:
+        first, last = stack.pop()
+        max_distance = 0.0
+        index = None
+        for i in range(first + 1, last):
+            distance = _perpendicular_distance(points[i], points[first], points[last])
+            if distance > max_distance:
+                max_distance = distance
+                index = i
+        if index is not None and max_distance > tolerance:
+            keep[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+
+    return [point for point, kept in zip(points, keep) if kept]
+
+
+def simplify_ring(ring: List[Point], tolerance: float) -> List[Point]:
+    """
+    Simplifies a closed polygon ring, keeping it closed and valid (at least
+    four positions). Falls back to the original ring if it would collapse.
+    """
+    if len(ring) <= 4:
+        return list(ring)
+
+    closed = ring[0] == ring[-1]
+    open_ring = ring[:-1] if closed else list(ring)
+
+    # Split the ring at its farthest vertex from the start so Douglas-Peucker
+    # never has to work with coincident endpoints.
+    start = open_ring[0]
+    split = max(range(len(open_ring)), key=lambda i: math.hypot(open_ring[i][0] - start[0], open_ring[i][1] - start[1]))
+    first_half = simplify_line(open_ring[:split + 1], tolerance)
+    second_half = simplify_line(open_ring[split:] + [start], tolerance)
+    simplified = first_half[:-1] + second_half
+
+    if len(simplified) < 4:
+        return list(ring)
+    return simplified
+
+
+def _rings_of(geometry: Dict[str, Any]) -> List[List[List[Point]]]:
+    """Normalises Polygon and MultiPolygon coordinates to a list of polygons."""
+    geometry_type = geometry.get('type')
+    coordinates = geometry.get('coordinates') or []
+    if geometry_type == 'Polygon':
+        return [coordinates]
+    if geometry_type == 'MultiPolygon':
+        return list(coordinates)
+    raise ValueError(f"Unsupported boundary geometry type: {geometry_type}")
+
+
+# WGS84 equatorial radius, as used by the spherical-excess area formula below.
+EARTH_RADIUS_M = 6378137.0
+SQUARE_METRES_PER_HECTARE = 10000.0
+
+
+def _ring_area_m2(ring: List[Point]) -> float:
+    """
+    Geodesic area of a ring on the sphere (Chamberlain & Duquette, "Some
+    algorithms for polygons on a sphere"). Accurate to well under 1% for
+    parcel-sized polygons.
+    """
+    points = ring[:-1] if len(ring) > 1 and ring[0] == ring[-1] else ring
+    count = len(points)
+    if count < 3:
+        return 0.0
+    total = 0.0
+    for i in range(count):
+        lower = points[i]
+        middle = points[(i + 1) % count]
+        upper = points[(i + 2) % count]
+        total += (math.radians(upper[0]) - math.radians(lower[0])) * math.sin(math.radians(middle[1]))
+    return abs(total * EARTH_RADIUS_M * EARTH_RADIUS_M / 2.0)
+
+
+def geodesic_area_hectares(geometry: Optional[Dict[str, Any]]) -> Optional[float]:
+    """Area of a Polygon/MultiPolygon in hectares, with holes subtracted."""
+    if not geometry:
+        return None
+    try:
+        polygons = _rings_of(geometry)
+    except ValueError:
+        return None
+    area = 0.0
+    for polygon in polygons:
+        if not polygon:
+            continue
+        area += _ring_area_m2(polygon[0])
+        for hole in polygon[1:]:
+            area -= _ring_area_m2(hole)
+    return max(area, 0.0) / SQUARE_METRES_PER_HECTARE
+
+
+def bounding_box(geometry: Optional[Dict[str, Any]]) -> Optional[Tuple[float, float, float, float]]:
+    """Returns (min_lng, min_lat, max_lng, max_lat) for the outer rings."""
+    if not geometry:
+        return None
+    try:
+        polygons = _rings_of(geometry)
+    except ValueError:
+        return None
+    points = [point for polygon in polygons if polygon for point in polygon[0]]
+    if not points:
+        return None
+    longitudes = [point[0] for point in points]
+    latitudes = [point[1] for point in points]
+    return min(longitudes), min(latitudes), max(longitudes), max(latitudes)
+
+
+def centroid(geometry: Optional[Dict[str, Any]]) -> Optional[Tuple[float, float]]:
+    """
+    Area-weighted centroid (lng, lat) of the outer rings. Parcels are small
+    enough that planar weighting in degrees is indistinguishable from a
+    geodesic centroid at map scale.
+    """
+    if not geometry:
+        return None
+    try:
+        polygons = _rings_of(geometry)
+    except ValueError:
+        return None
+
+    box = bounding_box(geometry)
+    if not box:
+        return None
+    # Work relative to the bbox corner to avoid cancellation in the cross products.
+    origin_x, origin_y = box[0], box[1]
+
+    weighted_x = weighted_y = total_area = 0.0
+    for polygon in polygons:
+        if not polygon:
+            continue
+        ring = polygon[0]
+        for i in range(len(ring) - 1):
+            x0, y0 = ring[i][0] - origin_x, ring[i][1] - origin_y
+            x1, y1 = ring[i + 1][0] - origin_x, ring[i + 1][1] - origin_y
+            cross = x0 * y1 - x1 * y0
+            total_area += cross
+            weighted_x += (x0 + x1) * cross
+            weighted_y += (y0 + y1) * cross
+
+    if total_area == 0:
+        return (box[0] + box[2]) / 2.0, (box[1] + box[3]) / 2.0
+    return origin_x + weighted_x / (3.0 * total_area), origin_y + weighted_y / (3.0 * total_area)
+
+
+def _encode_number(value: int) -> str:
+    value = ~(value << 1) if value < 0 else value << 1
+    chunks = []
+    while value >= 0x20:
+        chunks.append(chr((0x20 | (value & 0x1f)) + 63))
+        value >>= 5
+    chunks.append(chr(value + 63))
+    return ''.join(chunks)
+
+
+def encode_coordinates(points: List[Point], precision: int = DEFAULT_PRECISION) -> str:
+    """
+    Encodes a list of [lng, lat] pairs as a quantized, delta-encoded string
+    (the polyline algorithm, keeping GeoJSON axis order).
+    """
+    factor = 10 ** precision
+    encoded = []
+    previous_x = previous_y = 0
+    for point in points:
+        x = int(round(point[0] * factor))
+        y = int(round(point[1] * factor))
+        encoded.append(_encode_number(x - previous_x))
+        encoded.append(_encode_number(y - previous_y))
+        previous_x, previous_y = x, y
+    return ''.join(encoded)
+
+
+def decode_coordinates(encoded: str, precision: int = DEFAULT_PRECISION) -> List[List[float]]:
+    """Reverses encode_coordinates."""
+    factor = 10 ** precision
+    values = []
+    index = 0
+    while index < len(encoded):
+        result = shift = 0
+        while True:
+            byte = ord(encoded[index]) - 63
+            index += 1
+            result |= (byte & 0x1f) << shift
+            shift += 5
+            if byte < 0x20:
+                break
+        values.append(~(result >> 1) if result & 1 else result >> 1)
+
+    points = []
+    x = y = 0
+    for i in range(0, len(values) - 1, 2):
+        x += values[i]
+        y += values[i + 1]
+        points.append([x / factor, y / factor])
+    return points
+
+
+def encode_boundary(
+    geometry: Optional[Dict[str, Any]],
+    zoom: int = DEFAULT_SIMPLIFY_ZOOM,
+    precision: int = DEFAULT_PRECISION
+) -> Optional[Dict[str, Any]]:
+    """
+    Simplifies a Polygon/MultiPolygon boundary for rendering up to the given
+    zoom level and returns it in compact encoded form. Returns None for empty
+    or unsupported geometries.
+    """
+    if not geometry:
+        return None
+    try:
+        polygons = _rings_of(geometry)
+    except ValueError:
+        return None
+
+    latitudes = [point[1] for polygon in polygons for ring in polygon for point in ring]
+    if not latitudes:
+        return None
+    # The tolerance shrinks towards the poles, so take the latitude furthest
+    # from the equator to stay within half a pixel across the whole parcel.
+    tolerance = tolerance_for_zoom(zoom, max(latitudes, key=abs))
+
+    encoded_polygons = []
+    for polygon in polygons:
+        encoded_polygons.append([
+            encode_coordinates(simplify_ring([tuple(point[:2]) for point in ring], tolerance), precision)
+            for ring in polygon
+        ])
+
+    return {
+        'type': geometry.get('type'),
+        'zoom': zoom,
+        'precision': precision,
+        'coordinates': encoded_polygons[0] if geometry.get('type') == 'Polygon' else encoded_polygons,
+    }
+
+
+def decode_boundary(encoded: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Turns an encoded boundary back into a (simplified) GeoJSON geometry."""
+    if not encoded:
+        return None
+    precision = encoded.get('precision', DEFAULT_PRECISION)
+    polygons = encoded['coordinates'] if encoded.get('type') == 'MultiPolygon' else [encoded['coordinates']]
+    decoded = [[decode_coordinates(ring, precision) for ring in polygon] for polygon in polygons]
+    return {
+        'type': encoded.get('type'),
+        'coordinates': decoded[0] if encoded.get('type') == 'Polygon' else decoded,
+    }
+
+
+__all__ = [
+    'tolerance_for_zoom',
+    'simplify_line',
+    'simplify_ring',
+    'encode_coordinates',
+    'decode_coordinates',
+    'encode_boundary',
+    'decode_boundary',
+    'geodesic_area_hectares',
+    'bounding_box',
+    'centroid',
+    'DEFAULT_SIMPLIFY_ZOOM',
+    'DEFAULT_PRECISION',
+]
@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.archive import archivable_sessions, archive_sessions
+
+
+class Command(BaseCommand):
+    help = (
+        'Move old abandoned survey sessions, with their observations, into the SessionArchive '
+        'table. Completed sessions are never archived.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--abandoned-days',
+            type=int,
+            default=settings.SESSION_ARCHIVE_ABANDONED_DAYS,
+            help='Archive abandoned sessions started more than N days ago '
+                 '(default: settings.SESSION_ARCHIVE_ABANDONED_DAYS)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.SESSION_ARCHIVE_BATCH_SIZE,
+            help='Sessions archived per transaction (default: settings.SESSION_ARCHIVE_BATCH_SIZE)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only count the sessions that would be archived'
+        )
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            count = archivable_sessions(options['abandoned_days']).count()
+            self.stdout.write(self.style.WARNING(f'DRY RUN: Would archive {count} sessions.'))
+            return
+
+        counts = archive_sessions(
+            abandoned_days=options['abandoned_days'],
+            batch_size=options['batch_size'],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Archived {counts.get('abandoned', 0)} abandoned sessions."))
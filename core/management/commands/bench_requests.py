@@ -0,0 +1,123 @@
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import Grower, Farm, Region, SurveySession, SessionParticipant, Observation, Pest, Disease
+
+BENCH_USERNAME = 'bench_surveyor'
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure request throughput of the main surveillance-hub pages against the configured database. '
+        'Run once per database profile (e.g. DJANGO_DB_ENGINE=postgresql) to compare them.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Requests per page (default: 200)')
+        parser.add_argument('--concurrency', type=int, default=4, help='Client threads (default: 4)')
+        parser.add_argument('--sessions', type=int, default=50, help='Completed sessions in the fixture (default: 50)')
+        parser.add_argument('--observations', type=int, default=20, help='Observations per session (default: 20)')
+        parser.add_argument('--cleanup', action='store_true', help='Delete the benchmark fixture and exit')
+
+    def handle(self, *args, **options):
+        if options['cleanup']:
+            User.objects.filter(username=BENCH_USERNAME).delete()
+            self.stdout.write(self.style.SUCCESS('Benchmark fixture removed.'))
+            return
+
+        user, farm, session = self._ensure_fixture(options['sessions'], options['observations'])
+        pages = [
+            ('dashboard', reverse('core:dashboard')),
+            ('myfarms', reverse('core:myfarms')),
+            ('farm_detail', reverse('core:farm_detail', kwargs={'farm_id': farm.id})),
+            ('record_list', reverse('core:record_list')),
+            ('session_list', reverse('core:survey_session_list', kwargs={'farm_id': farm.id})),
+            ('session_detail', reverse('core:survey_session_detail', kwargs={'session_id': session.session_id})),
+        ]
+
+        engine = settings.DATABASES['default']['ENGINE'].rsplit('.', 1)[-1]
+        self.stdout.write(
+            f"Database: {engine}, {options['requests']} requests/page, {options['concurrency']} threads"
+        )
+        total_requests = total_elapsed = 0
+        for name, url in pages:
+            elapsed, errors = self._bench_page(user, url, options['requests'], options['concurrency'])
+            total_requests += options['requests']
+            total_elapsed += elapsed
+            self.stdout.write(
+                f"  {name:<16} {options['requests'] / elapsed:>8.1f} req/s  "
+                f"{elapsed / options['requests'] * 1000:>7.2f} ms/req  errors={errors}"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Overall: {total_requests / total_elapsed:.1f} req/s"))
+
+    def _bench_page(self, user, url, requests, concurrency):
+        counts = [requests // concurrency + (1 if i < requests % concurrency else 0) for i in range(concurrency)]
+        errors = []
+
+        def worker(count):
+            client = Client(HTTP_HOST='localhost')
+            client.force_login(user)
+            for _ in range(count):
+                response = client.get(url)
+                if response.status_code != 200:
+                    errors.append(response.status_code)
+            connection.close()
+
+        threads = [threading.Thread(target=worker, args=(count,)) for count in counts]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - started, len(errors)
+
+    def _ensure_fixture(self, session_count, observation_count):
+        user, created = User.objects.get_or_create(username=BENCH_USERNAME, defaults={'email': 'bench@example.com'})
+        grower, _ = Grower.objects.get_or_create(user=user, defaults={'business_name': 'Benchmark Orchards'})
+        region, _ = Region.objects.get_or_create(name='Benchmark Region', defaults={'state_abbreviation': 'NT'})
+        farm, _ = Farm.objects.get_or_create(
+            owner=grower, name='Benchmark Farm',
+            defaults={'region': region, 'size_hectares': 40, 'stocking_rate': 150}
+        )
+
+        existing = SurveySession.objects.filter(farm=farm, status='completed')
+        if existing.count() < session_count:
+            pests = list(Pest.objects.all()[:3])
+            diseases = list(Disease.objects.all()[:3])
+            now = timezone.now()
+            for i in range(session_count - existing.count()):
+                start = now - timedelta(days=i + 1)
+                session = SurveySession.objects.create(
+                    farm=farm, surveyor=user, status='completed', start_time=start,
+                    end_time=start + timedelta(minutes=45), target_plants_surveyed=observation_count,
+                    last_allocated_sequence=observation_count
+                )
+                participant = SessionParticipant.objects.create(
+                    session=session, user=user, joined_at=start, target_share=observation_count,
+                    sequence_start=1, sequence_end=observation_count,
+                    last_sequence_number=observation_count, observations_recorded=observation_count
+                )
+                for sequence in range(1, observation_count + 1):
+                    observation = Observation.objects.create(
+                        session=session, participant=participant, plant_sequence_number=sequence,
+                        observation_time=start + timedelta(minutes=sequence)
+                    )
+                    if pests and sequence % 5 == 0:
+                        observation.pests_observed.set(pests[:1 + sequence % len(pests)])
+                    if diseases and sequence % 7 == 0:
+                        observation.diseases_observed.set(diseases[:1])
+                session.completion_snapshot = session.build_completion_snapshot()
+                session.save(update_fields=['completion_snapshot'])
+            self.stdout.write(f"Created benchmark fixture for user '{BENCH_USERNAME}'.")
+
+        session = SurveySession.objects.filter(farm=farm, status='completed').order_by('-end_time').first()
+        return user, farm, session
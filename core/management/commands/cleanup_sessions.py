@@ -1,79 +1,126 @@
 # core/management/commands/cleanup_sessions.py
 # Create this file to automatically clean up stale sessions
 
+from django.conf import settings
 from django.core.management.base import BaseCommand
+from django.db import transaction
 from django.utils import timezone
 from datetime import timedelta
 from core.models import SurveySession
+from core import metrics
+import json
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
 class Command(BaseCommand):
-    help = 'Clean up stale survey sessions that have been in progress too long'
+    help = 'Mark survey sessions that have been in progress too long as abandoned'
 
     def add_arguments(self, parser):
         parser.add_argument(
             '--hours',
             type=int,
-            default=2,
-            help='Sessions older than this many hours will be cleaned up (default: 2)'
+            default=settings.SESSION_STALE_HOURS,
+            help='Sessions older than this many hours will be abandoned (default: settings.SESSION_STALE_HOURS)'
         )
         parser.add_argument(
             '--dry-run',
             action='store_true',
-            help='Show what would be cleaned up without actually deleting'
+            help='Show what would be abandoned without changing anything'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.SESSION_CLEANUP_BATCH_SIZE,
+            help='Sessions abandoned per transaction (default: settings.SESSION_CLEANUP_BATCH_SIZE)'
+        )
+        parser.add_argument(
+            '--max-runtime',
+            type=float,
+            default=0,
+            help='Stop after the batch that passes this many seconds (default: no limit)'
         )
 
     def handle(self, *args, **options):
         hours = options['hours']
         dry_run = options['dry_run']
+        batch_size = options['batch_size']
+        max_runtime = options['max_runtime']
+        started = time.monotonic()
         
         cutoff_time = timezone.now() - timedelta(hours=hours)
         
+        # Ordered by id so an interrupted run resumes where it stopped
         stale_sessions = SurveySession.objects.filter(
             status='in_progress',
             start_time__lt=cutoff_time
-        ).select_related('farm', 'surveyor')
-        
-        count = stale_sessions.count()
-        
-        if count == 0:
-            self.stdout.write(
-                self.style.SUCCESS('No stale sessions found.')
-            )
-            return
+        ).order_by('id')
         
         if dry_run:
-            self.stdout.write(
-                self.style.WARNING(f'DRY RUN: Would clean up {count} stale sessions:')
-            )
-            for session in stale_sessions:
-                self.stdout.write(
-                    f'  - Session {session.session_id} on {session.farm.name} '
-                    f'by {session.surveyor.username} '
-                    f'(started {session.start_time})'
-                )
+            count = 0
+            # Streamed; farm and user names come from the same query
+            for session_id, farm_name, username, start_time in stale_sessions.values_list(
+                'session_id', 'farm__name', 'surveyor__username', 'start_time'
+            ).iterator(chunk_size=batch_size):
+                if not count:
+                    self.stdout.write(self.style.WARNING('DRY RUN: Would abandon these stale sessions:'))
+                self.stdout.write(f'  - Session {session_id} on {farm_name} by {username} (started {start_time})')
+                count += 1
+            if not count:
+                self.stdout.write(self.style.SUCCESS('No stale sessions found.'))
+            else:
+                self.stdout.write(self.style.WARNING(f'DRY RUN: Would abandon {count} stale sessions.'))
         else:
-            # Actually delete the sessions
-            session_details = []
-            for session in stale_sessions:
-                session_details.append({
-                    'id': str(session.session_id),
-                    'farm': session.farm.name,
-                    'user': session.surveyor.username,
-                    'started': session.start_time
-                })
-            
-            stale_sessions.delete()
+            count = 0
+            batches = 0
+            stopped_early = False
+            last_id = 0
+            # Keyset batches, re-queried after each UPDATE (no cursor is held
+            # open over the rows being changed); see cleanup_stale_sessions
+            while True:
+                batch = list(stale_sessions.filter(id__gt=last_id).values_list('id', 'farm_id')[:batch_size])
+                if not batch:
+                    break
+                count += self._abandon_batch(batches + 1, batch)
+                last_id = batch[-1][0]
+                batches += 1
+                # A full batch means there may be more to do
+                if max_runtime and len(batch) == batch_size and time.monotonic() - started >= max_runtime:
+                    stopped_early = True
+                    break
             
-            self.stdout.write(
-                self.style.SUCCESS(f'Successfully cleaned up {count} stale sessions.')
-            )
-            
-            # Log the cleanup for audit purposes
-            logger.info(f'Cleaned up {count} stale sessions: {session_details}')
+            if not count:
+                self.stdout.write(self.style.SUCCESS('No stale sessions found.'))
+            else:
+                self.stdout.write(
+                    self.style.SUCCESS(f'Successfully abandoned {count} stale sessions in {batches} batches.')
+                )
+            if stopped_early:
+                self.stdout.write(self.style.WARNING(
+                    f'Stopped after {max_runtime}s (--max-runtime); run again to continue.'
+                ))
         
         self.stdout.write(
             f'Sessions are considered stale if in_progress for more than {hours} hours.'
-        )
\ No newline at end of file
+        )
+
+    def _abandon_batch(self, number, batch):
+        """Abandons one batch in its own short transaction and writes its audit record."""
+        batch_started = time.monotonic()
+        ids = [pk for pk, _ in batch]
+        with transaction.atomic():
+            count = SurveySession.objects.abandon_sessions(ids)
+        metrics.inc('stale_sessions_cleaned_total', {'source': 'command'}, count)
+        
+        # Compact audit record: one line per batch, ids as a range
+        logger.info('Abandoned stale sessions: ' + json.dumps({
+            'batch': number,
+            'count': count,
+            'first_id': ids[0],
+            'last_id': ids[-1],
+            'farms': len({farm_id for _, farm_id in batch}),
+            'ms': round((time.monotonic() - batch_started) * 1000, 1),
+        }, separators=(',', ':')))
+        self.stdout.write(f'  Batch {number}: abandoned {count} sessions (ids {ids[0]}-{ids[-1]})')
+        return count
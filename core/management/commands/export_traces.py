@@ -0,0 +1,48 @@
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        'Convert the JSON-lines span logs (one per process, next to TRACE_FILE, and their rotated backups) '
+        'into a Chrome trace file that can be opened in chrome://tracing or https://ui.perfetto.dev.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='Path of the trace JSON file to write')
+        parser.add_argument('--trace-id', help='Only export spans belonging to this trace')
+        parser.add_argument('--slowest', type=int, help='Only export the N slowest request traces')
+
+    def handle(self, *args, **options):
+        trace_file = Path(settings.TRACE_FILE)
+        # spans.<pid>.jsonl, their backups (spans.<pid>.jsonl.1, ...) and a log from before per-process files
+        patterns = [f"{trace_file.stem}.*{trace_file.suffix}*", f"{trace_file.name}*"]
+        sources = sorted({path for pattern in patterns for path in trace_file.parent.glob(pattern)})
+        if not sources:
+            raise CommandError(f"No span logs found next to {trace_file}")
+
+        events = []
+        for path in sources:
+            with open(path) as f:
+                for line in f:
+                    try:
+                        events.append(json.loads(line))
+                    except ValueError:
+                        continue
+
+        if options['trace_id']:
+            events = [e for e in events if e['args'].get('trace_id') == options['trace_id']]
+        elif options['slowest']:
+            roots = sorted(
+                (e for e in events if not e['args'].get('parent_id')), key=lambda e: e['dur'], reverse=True
+            )
+            keep = {e['args']['trace_id'] for e in roots[:options['slowest']]}
+            events = [e for e in events if e['args'].get('trace_id') in keep]
+
+        with open(options['output'], 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+        traces = len({e['args'].get('trace_id') for e in events})
+        self.stdout.write(self.style.SUCCESS(f"Wrote {len(events)} spans from {traces} traces to {options['output']}"))
@@ -1,45 +1,79 @@
-from django.core.management.base import BaseCommand
-from django.utils import timezone
+import time
 from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, Q
 from core.models import SurveySession
 
+# Durations outside this range are unrealistic (same limits as SurveySession.duration())
+MAX_DURATION = timedelta(minutes=1440)
+
 class Command(BaseCommand):
     help = 'Fix sessions with unrealistic durations'
 
     def add_arguments(self, parser):
         parser.add_argument('--dry-run', action='store_true', help='Show what would be fixed')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Sessions fixed per transaction (default: 1000)')
 
     def handle(self, *args, **options):
         dry_run = options['dry_run']
+        batch_size = options['batch_size']
+        verbose = options['verbosity'] > 1
+        started = time.perf_counter()
         
-        # Find sessions with problematic durations
-        problematic = []
-        for session in SurveySession.objects.filter(status='completed'):
-            duration = session.duration()
-            if duration and (duration < 0 or duration > 1440):  # Less than 0 or more than 24 hours
-                problematic.append(session)
+        # Find sessions with problematic durations: negative or more than 24 hours, compared in SQL
+        problematic = SurveySession.objects.filter(
+            status='completed', end_time__isnull=False
+        ).filter(
+            Q(end_time__lt=F('start_time')) | Q(end_time__gt=F('start_time') + MAX_DURATION)
+        ).order_by('id')
         
-        if not problematic:
+        total = problematic.count()
+        if not total:
             self.stdout.write(self.style.SUCCESS('No problematic sessions found!'))
             return
         
-        self.stdout.write(f'Found {len(problematic)} sessions with unrealistic durations:')
+        self.stdout.write(f'Found {total} sessions with unrealistic durations:')
         
-        for session in problematic:
-            old_duration = session.duration()
-            obs_count = session.observation_count()
+        processed = 0
+        last_id = 0
+        while True:
+            batch = list(
+                problematic.filter(id__gt=last_id).annotate(
+                    obs_count=Count('observations', filter=Q(observations__status='completed'))
+                ).values_list('id', 'session_id', 'start_time', 'end_time', 'obs_count', 'completion_snapshot')[:batch_size]
+            )
+            if not batch:
+                break
             
-            if dry_run:
-                self.stdout.write(f'  Session {session.session_id}: {old_duration} minutes ({obs_count} observations)')
-            else:
+            fixes = []
+            for pk, session_id, start_time, end_time, obs_count, snapshot in batch:
+                old_duration = round((end_time - start_time).total_seconds() / 60, 1)
                 # Fix by setting reasonable end time
                 estimated_minutes = max(10, obs_count * 2)  # 2 min per observation, min 10
-                session.end_time = session.start_time + timedelta(minutes=estimated_minutes)
-                session.save(update_fields=['end_time'])
-                new_duration = session.duration()
-                self.stdout.write(f'  Fixed session {session.session_id}: {old_duration} → {new_duration} minutes')
+                if snapshot:
+                    # The completion snapshot carries the duration too
+                    snapshot['duration_minutes'] = float(estimated_minutes)
+                fixes.append(SurveySession(
+                    id=pk, end_time=start_time + timedelta(minutes=estimated_minutes), completion_snapshot=snapshot
+                ))
+                # A dry run always lists the sessions; a real run only at -v 2
+                if dry_run:
+                    self.stdout.write(f'  Session {session_id}: {old_duration} minutes ({obs_count} observations)')
+                elif verbose:
+                    self.stdout.write(f'  Fixed session {session_id}: {old_duration} → {estimated_minutes} minutes')
+            
+            if not dry_run:
+                with transaction.atomic():
+                    SurveySession.objects.bulk_update(fixes, ['end_time', 'completion_snapshot'])
+            
+            processed += len(batch)
+            last_id = batch[-1][0]
+            self.stdout.write(f'  {processed}/{total} sessions {"checked" if dry_run else "fixed"} '
+                              f'({time.perf_counter() - started:.1f}s)')
         
         if dry_run:
             self.stdout.write('\nRun without --dry-run to fix these sessions')
         else:
-            self.stdout.write(f'\nFixed {len(problematic)} sessions!')
\ No newline at end of file
+            self.stdout.write(f'\nFixed {processed} sessions in {time.perf_counter() - started:.1f}s!')
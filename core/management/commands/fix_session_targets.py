@@ -1,12 +1,56 @@
 from django.core.management.base import BaseCommand
-from django.utils import timezone
-from core.models import SurveySession, SurveillanceCalculation
+from django.db import transaction
+from django.db.models import Q
+from core.models import Farm, SurveySession, SurveillanceCalculation
 from core.season_utils import get_seasonal_stage_info
 from core.calculations import calculate_surveillance_effort, DEFAULT_CONFIDENCE
 import logging
 
 logger = logging.getLogger(__name__)
 
+
+FALLBACK_SOURCE = "fallback (10% of plants, min 1, max 5)"
+
+
+def fallback_target(total_plants):
+    """10% of the farm's plants, at least 1 and at most 5; None without a plant count."""
+    if total_plants and total_plants > 0:
+        return max(1, min(5, total_plants // 10))
+    return None
+
+
+def default_target(farm, prevalence_p):
+    """
+    Compute a target for a farm without a current calculation.
+    Returns (target or None, source).
+    """
+    total_plants = farm.total_plants()
+    target_plants = None
+    if total_plants:
+        if prevalence_p is not None:
+            calculation_results = calculate_surveillance_effort(
+                farm=farm,
+                confidence_level_percent=DEFAULT_CONFIDENCE,
+                prevalence_p=prevalence_p
+            )
+            if not calculation_results.get('error'):
+                target_plants = calculation_results['required_plants_to_survey']
+                source = "calculated default"
+            else:
+                source = f"calculation error: {calculation_results.get('error')}"
+        else:
+            source = "no seasonal prevalence data"
+    else:
+        source = "no farm plant count"
+    
+    # Fallback target
+    if target_plants is None:
+        target_plants = fallback_target(total_plants)
+        if target_plants is not None:
+            source = FALLBACK_SOURCE
+    return target_plants, source
+
+
 class Command(BaseCommand):
     help = 'Fix survey sessions that have missing or zero target_plants_surveyed'
 
@@ -22,24 +66,23 @@ class Command(BaseCommand):
             default='in_progress',
             help='Status of sessions to fix (default: in_progress)'
         )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Sessions updated per transaction (default: 1000)'
+        )
 
     def handle(self, *args, **options):
         dry_run = options['dry_run']
         status_filter = options['status']
+        verbose = options['verbosity'] > 1
         
-        # Find sessions with missing targets
-        sessions_to_fix = SurveySession.objects.filter(
-            status=status_filter,
-            target_plants_surveyed__isnull=True
-        ).select_related('farm')
-        
-        # Also find sessions with zero targets
-        zero_target_sessions = SurveySession.objects.filter(
-            status=status_filter,
-            target_plants_surveyed=0
-        ).select_related('farm')
-        
-        all_sessions = list(sessions_to_fix) + list(zero_target_sessions)
+        # Find sessions with missing or zero targets (one query, each session once)
+        all_sessions = list(SurveySession.objects.filter(
+            Q(target_plants_surveyed__isnull=True) | Q(target_plants_surveyed=0),
+            status=status_filter
+        ).order_by('id').values_list('id', 'session_id', 'farm_id', 'target_plants_surveyed'))
         
         if not all_sessions:
             self.stdout.write(
@@ -49,79 +92,69 @@ class Command(BaseCommand):
         
         self.stdout.write(f'Found {len(all_sessions)} sessions that need target fixes:')
         
+        # Targets are per farm: resolve each farm once
+        farm_ids = {farm_id for _, _, farm_id, _ in all_sessions}
+        farms = Farm.objects.in_bulk(farm_ids)
+        targets = {}
+        
+        # Current calculations for all affected farms; the latest per farm wins
+        for farm_id, calc_id, required_plants in SurveillanceCalculation.objects.filter(
+            farm_id__in=farm_ids, is_current=True
+        ).order_by('farm_id', 'date_created').values_list('farm_id', 'id', 'required_plants'):
+            targets[farm_id] = (required_plants, f"saved calculation (ID: {calc_id})")
+        
+        # A saved calculation with no target (0 or None) gets the fallback target too
+        for farm_id, (required_plants, source) in list(targets.items()):
+            if not required_plants:
+                target_plants = fallback_target(farms[farm_id].total_plants())
+                targets[farm_id] = (target_plants, FALLBACK_SOURCE) if target_plants else (None, f"{source} has no target")
+        
+        # Farms without one get a default target computed from the current stage's prevalence
+        to_calculate = [farms[farm_id] for farm_id in sorted(farm_ids - targets.keys())]
+        if to_calculate:
+            prevalence_p = get_seasonal_stage_info().get('prevalence_p')
+            for farm in to_calculate:
+                targets[farm.id] = default_target(farm, prevalence_p)
+        
         fixed_count = 0
         error_count = 0
+        updates = []
         
-        for session in all_sessions:
-            farm = session.farm
-            original_target = session.target_plants_surveyed
+        for pk, session_id, farm_id, original_target in all_sessions:
+            farm = farms[farm_id]
+            target_plants, source = targets[farm_id]
             
-            try:
-                # Try to get target from current calculation
-                target_plants = None
-                try:
-                    latest_calc = SurveillanceCalculation.objects.filter(
-                        farm=farm, 
-                        is_current=True
-                    ).latest('date_created')
-                    target_plants = latest_calc.required_plants
-                    source = f"saved calculation (ID: {latest_calc.id})"
-                except SurveillanceCalculation.DoesNotExist:
-                    # Calculate a default target
-                    if farm.total_plants():
-                        seasonal_info = get_seasonal_stage_info()
-                        prevalence_p = seasonal_info.get('prevalence_p')
-                        if prevalence_p is not None:
-                            calculation_results = calculate_surveillance_effort(
-                                farm=farm,
-                                confidence_level_percent=DEFAULT_CONFIDENCE,
-                                prevalence_p=prevalence_p
-                            )
-                            if not calculation_results.get('error'):
-                                target_plants = calculation_results['required_plants_to_survey']
-                                source = "calculated default"
-                            else:
-                                source = f"calculation error: {calculation_results.get('error')}"
-                        else:
-                            source = "no seasonal prevalence data"
-                    else:
-                        source = "no farm plant count"
-                
-                # Fallback target
-                if target_plants is None and farm.total_plants() and farm.total_plants() > 0:
-                    target_plants = max(1, min(5, farm.total_plants() // 10))
-                    source = "fallback (10% of plants, min 1, max 5)"
-                
-                if target_plants is not None:
-                    if dry_run:
-                        self.stdout.write(f'  Would fix session {session.session_id} on {farm.name}:')
-                        self.stdout.write(f'    Original target: {original_target} → New target: {target_plants}')
-                        self.stdout.write(f'    Source: {source}')
-                    else:
-                        session.target_plants_surveyed = target_plants
-                        session.save(update_fields=['target_plants_surveyed'])
-                        self.stdout.write(f'  Fixed session {session.session_id} on {farm.name}:')
-                        self.stdout.write(f'    Target: {original_target} → {target_plants} (from {source})')
-                    fixed_count += 1
-                else:
-                    self.stdout.write(
-                        self.style.WARNING(f'  Cannot fix session {session.session_id} on {farm.name}: {source}')
-                    )
-                    error_count += 1
-                    
-            except Exception as e:
+            if target_plants is not None:
+                if verbose:
+                    verb = 'Would fix' if dry_run else 'Fixing'
+                    self.stdout.write(f'  {verb} session {session_id} on {farm.name}:')
+                    self.stdout.write(f'    Target: {original_target} → {target_plants} (from {source})')
+                updates.append(SurveySession(id=pk, target_plants_surveyed=target_plants))
+                fixed_count += 1
+            else:
                 self.stdout.write(
-                    self.style.ERROR(f'  Error fixing session {session.session_id}: {e}')
+                    self.style.WARNING(f'  Cannot fix session {session_id} on {farm.name}: {source}')
                 )
                 error_count += 1
         
+        if not dry_run:
+            batch_size = options['batch_size']
+            for start in range(0, len(updates), batch_size):
+                with transaction.atomic():
+                    SurveySession.objects.bulk_update(updates[start:start + batch_size], ['target_plants_surveyed'])
+                    if status_filter == 'in_progress':
+                        # Split the new target among the surveyors still recording
+                        for session in updates[start:start + batch_size]:
+                            session.rebalance_target_shares()
+                self.stdout.write(f'  {min(start + batch_size, len(updates))}/{len(updates)} sessions updated')
+        
         if dry_run:
             self.stdout.write(f'\nDRY RUN: Would fix {fixed_count} sessions, {error_count} could not be fixed')
-            self.stdout.write('Run without --dry-run to apply changes')
+            self.stdout.write('Run without --dry-run to apply changes (add -v 2 to list them)')
         else:
             self.stdout.write(f'\nFixed {fixed_count} sessions successfully')
             if error_count > 0:
                 self.stdout.write(f'{error_count} sessions could not be fixed')
         
         # Additional info about how to use the command
-        self.stdout.write('\nTip: You can also fix completed sessions with --status=completed')
\ No newline at end of file
+        self.stdout.write('\nTip: You can also fix completed sessions with --status=completed')
@@ -0,0 +1,60 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.archive import archive_sessions
+from core.models import SurveySession
+
+
+class Command(BaseCommand):
+    help = (
+        'Periodically abandon survey sessions left in progress for too long and archive old abandoned and '
+        'completed sessions, in bounded batches. Run this as a long-lived worker (or with --once from cron).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=settings.SESSION_CLEANUP_INTERVAL,
+            help='Seconds between cleanup passes (default: settings.SESSION_CLEANUP_INTERVAL)'
+        )
+        parser.add_argument(
+            '--hours',
+            type=int,
+            default=settings.SESSION_STALE_HOURS,
+            help='Sessions in progress for longer than this are stale (default: settings.SESSION_STALE_HOURS)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.SESSION_CLEANUP_BATCH_SIZE,
+            help='Sessions abandoned per transaction (default: settings.SESSION_CLEANUP_BATCH_SIZE)'
+        )
+        parser.add_argument(
+            '--no-archive',
+            action='store_true',
+            help='Only abandon stale sessions; do not run the archiver'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Run a single pass and exit'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.perf_counter()
+            abandoned = SurveySession.objects.cleanup_stale_sessions(
+                hours=options['hours'], batch_size=options['batch_size'], source='worker'
+            )
+            archived = {} if options['no_archive'] else archive_sessions()
+            if abandoned or any(archived.values()) or options['verbosity'] > 1:
+                self.stdout.write(self.style.SUCCESS(
+                    f'Abandoned {abandoned} stale sessions and archived {sum(archived.values())} sessions '
+                    f'in {time.perf_counter() - started:.2f}s'
+                ))
+            if options['once']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,111 @@
+import multiprocessing
+import os
+import sqlite3
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.db_tuning import apply_pragmas, get_configured_pragmas
+
+# Mirrors the observation ingest path: read the session's last sequence
+# number, then insert the next observation, in one transaction.
+SCHEMA = """
+CREATE TABLE observation (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id INTEGER NOT NULL,
+    plant_sequence_number INTEGER NOT NULL,
+    notes TEXT
+);
+CREATE INDEX observation_session_seq ON observation (session_id, plant_sequence_number);
+"""
+
+
+def _run_worker(args):
+    path, profile, worker_id, writes, sessions, pragmas, timeout = args
+    connection = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+    if profile == 'tuned':
+        apply_pragmas(connection.cursor(), pragmas)
+    begin = 'BEGIN IMMEDIATE' if profile == 'tuned' else 'BEGIN'
+
+    committed = lock_errors = 0
+    for i in range(writes):
+        session_id = (worker_id + i) % sessions
+        cursor = connection.cursor()
+        try:
+            cursor.execute(begin)
+            cursor.execute(
+                "SELECT MAX(plant_sequence_number) FROM observation WHERE session_id = ?", (session_id,)
+            )
+            last = cursor.fetchone()[0] or 0
+            cursor.execute(
+                "INSERT INTO observation (session_id, plant_sequence_number, notes) VALUES (?, ?, ?)",
+                (session_id, last + 1, f"worker {worker_id} write {i}")
+            )
+            cursor.execute('COMMIT')
+            committed += 1
+        except sqlite3.OperationalError as e:
+            if 'locked' not in str(e) and 'busy' not in str(e):
+                raise
+            lock_errors += 1
+            if connection.in_transaction:
+                cursor.execute('ROLLBACK')
+    connection.close()
+    return committed, lock_errors
+
+
+class Command(BaseCommand):
+    help = 'Concurrent observation-write stress test comparing default SQLite settings with the tuned profile'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8, help='Concurrent writer processes (default: 8)')
+        parser.add_argument('--writes', type=int, default=300, help='Writes per worker (default: 300)')
+        parser.add_argument('--sessions', type=int, default=4, help='Distinct sessions written to (default: 4)')
+        parser.add_argument(
+            '--profile',
+            choices=['default', 'tuned', 'both'],
+            default='both',
+            help='Which connection profile to run (default: both)'
+        )
+
+    def handle(self, *args, **options):
+        profiles = ['default', 'tuned'] if options['profile'] == 'both' else [options['profile']]
+        pragmas = get_configured_pragmas()
+        tuned_timeout = settings.DATABASES['default'].get('OPTIONS', {}).get('timeout', 5)
+
+        self.stdout.write(
+            f"{options['workers']} workers x {options['writes']} writes over {options['sessions']} sessions"
+        )
+        self.stdout.write(f"Tuned pragmas: {pragmas}, timeout={tuned_timeout}s, BEGIN IMMEDIATE")
+
+        for profile in profiles:
+            # Python's sqlite3 default timeout (5s) is what Django uses without OPTIONS.
+            timeout = tuned_timeout if profile == 'tuned' else 5
+            committed, lock_errors, elapsed = self._run_profile(profile, options, pragmas, timeout)
+            attempted = committed + lock_errors
+            self.stdout.write(
+                f"  {profile:<8} committed={committed:<6} lock_errors={lock_errors:<6} "
+                f"error_rate={lock_errors / attempted:.1%}  throughput={committed / elapsed:.0f} writes/s "
+                f"({elapsed:.2f}s)"
+            )
+
+    def _run_profile(self, profile, options, pragmas, timeout):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'stress.sqlite3')
+            setup = sqlite3.connect(path)
+            setup.executescript(SCHEMA)
+            setup.close()
+
+            jobs = [
+                (path, profile, worker_id, options['writes'], options['sessions'], pragmas, timeout)
+                for worker_id in range(options['workers'])
+            ]
+            started = time.perf_counter()
+            with multiprocessing.Pool(options['workers']) as pool:
+                results = pool.map(_run_worker, jobs)
+            elapsed = time.perf_counter() - started
+
+        committed = sum(result[0] for result in results)
+        lock_errors = sum(result[1] for result in results)
+        return committed, lock_errors, elapsed
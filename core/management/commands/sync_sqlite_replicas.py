@@ -0,0 +1,48 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Copy the primary SQLite database to each configured replica file (local read/write-split testing)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=0,
+            help='Keep syncing every N seconds instead of copying once'
+        )
+
+    def handle(self, *args, **options):
+        primary = settings.DATABASES['default']
+        if primary['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError('sync_sqlite_replicas only works with the SQLite profile.')
+        replicas = [settings.DATABASES[alias] for alias in getattr(settings, 'DATABASE_REPLICAS', [])]
+        if not replicas:
+            raise CommandError('No replicas configured. Set SQLITE_REPLICA_PATHS to a comma-separated list of files.')
+
+        while True:
+            started = time.perf_counter()
+            self._sync(str(primary['NAME']), [str(replica['NAME']) for replica in replicas])
+            self.stdout.write(
+                self.style.SUCCESS(f'Synced {len(replicas)} replica(s) in {time.perf_counter() - started:.2f}s')
+            )
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
+
+    def _sync(self, primary_path, replica_paths):
+        # The online backup API takes a consistent snapshot even while the primary is being written to.
+        source = sqlite3.connect(primary_path)
+        try:
+            for path in replica_paths:
+                target = sqlite3.connect(path)
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+        finally:
+            source.close()
@@ -0,0 +1,314 @@
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows: stores of exited processes are never compacted
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+# name -> (type, help, buckets)
+METRICS = {
+    'http_requests_total': ('counter', 'HTTP requests served, by URL name, method and status.', None),
+    'http_request_duration_seconds': ('histogram', 'HTTP request latency by URL name.', LATENCY_BUCKETS),
+    'db_queries_per_request': ('histogram', 'Database queries run per request, by URL name.', QUERY_COUNT_BUCKETS),
+    'db_query_seconds_per_request': ('histogram', 'Time spent in the database per request, by URL name.', LATENCY_BUCKETS),
+    'query_budget_violations_total': ('counter', 'Requests that exceeded their query budget, by URL name.', None),
+    'cache_requests_total': ('counter', 'Application cache lookups, by cache and result (hit/miss).', None),
+    'geoscape_requests_total': ('counter', 'Geoscape API calls, by endpoint and outcome (HTTP status or error).', None),
+    'geoscape_request_duration_seconds': ('histogram', 'Geoscape API call latency, by endpoint.', LATENCY_BUCKETS),
+    'observations_ingested_total': ('counter', 'Observations recorded.', None),
+    'stale_sessions_cleaned_total': ('counter', 'Stale in-progress survey sessions abandoned, by source.', None),
+    'sessions_archived_total': ('counter', 'Survey sessions moved to the archive table, by status.', None),
+}
+
+# Stores of exited processes are folded into this file, so the directory does not grow
+AGGREGATE_FILE = 'aggregate.json'
+AGGREGATE_LOCK_FILE = '.aggregate.lock'
+
+_lock = threading.Lock()
+_values: Dict[str, Dict[Tuple, Any]] = {}
+_pid = None
+# <pid>-<random>: a restarted worker that is given a recycled PID gets a new store
+_store_name = None
+# Held (flock) for the life of the process; a store whose lock is free is dead
+_store_lock = None
+_last_flush = 0.0
+
+
+def metrics_enabled() -> bool:
+    return getattr(settings, 'METRICS_ENABLED', True)
+
+
+def get_metrics_dir() -> Path:
+    return Path(getattr(settings, 'METRICS_DIR', Path(settings.BASE_DIR) / 'metrics'))
+
+
+def _labels_key(labels: Optional[Dict[str, Any]]) -> Tuple:
+    return tuple(sorted((k, str(v)) for k, v in (labels or {}).items()))
+
+
+def _reset_after_fork():
+    global _pid, _values, _last_flush, _store_name, _store_lock
+    if _pid != os.getpid():
+        if _store_lock is not None:
+            # The parent's lock stays held by the parent's own descriptor
+            _store_lock.close()
+            _store_lock = None
+        _pid = os.getpid()
+        _store_name = f"{_pid}-{uuid.uuid4().hex[:12]}"
+        _values = {}
+        _last_flush = 0.0
+        atexit.register(flush)
+
+
+def _hold_store_lock(metrics_dir: Path) -> None:
+    """Locks <store>.lock until this process exits, marking the store as live."""
+    global _store_lock
+    if _store_lock is not None or fcntl is None:
+        return
+    lock_file = open(metrics_dir / f"{_store_name}.lock", 'a')
+    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    _store_lock = lock_file
+
+
+def inc(name: str, labels: Optional[Dict[str, Any]] = None, amount: float = 1) -> None:
+    """Adds to a counter in this process's store."""
+    if not metrics_enabled():
+        return
+    with _lock:
+        _reset_after_fork()
+        series = _values.setdefault(name, {})
+        key = _labels_key(labels)
+        series[key] = series.get(key, 0) + amount
+    _maybe_flush()
+
+
+def observe(name: str, value: float, labels: Optional[Dict[str, Any]] = None) -> None:
+    """Records a sample in a histogram declared in METRICS."""
+    if not metrics_enabled():
+        return
+    buckets = METRICS[name][2]
+    with _lock:
+        _reset_after_fork()
+        series = _values.setdefault(name, {})
+        key = _labels_key(labels)
+        state = series.setdefault(key, {'buckets': [0] * len(buckets), 'sum': 0.0, 'count': 0})
+        for index, bound in enumerate(buckets):
+            if value <= bound:
+                state['buckets'][index] += 1
+                break
+        state['sum'] += value
+        state['count'] += 1
+    _maybe_flush()
+
+
+def record_cache(cache_name: str, hit: bool) -> None:
+    inc('cache_requests_total', {'cache': cache_name, 'result': 'hit' if hit else 'miss'})
+
+
+def _maybe_flush() -> None:
+    if time.monotonic() - _last_flush >= getattr(settings, 'METRICS_FLUSH_INTERVAL', 1.0):
+        flush()
+
+
+def _serialize(values: Dict[str, Dict[Tuple, Any]]) -> Dict[str, list]:
+    return {name: [[dict(key), value] for key, value in series.items()] for name, series in values.items()}
+
+
+def _write_json(path: Path, data: Any) -> None:
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path: Path) -> Optional[Any]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def flush() -> None:
+    """Writes this process's metrics to <METRICS_DIR>/<pid>-<random>.json (atomically)."""
+    global _last_flush
+    with _lock:
+        if _pid != os.getpid() or not _values:
+            return
+        snapshot = _serialize(_values)
+        _last_flush = time.monotonic()
+    metrics_dir = get_metrics_dir()
+    path = metrics_dir / f"{_store_name}.json"
+    try:
+        metrics_dir.mkdir(parents=True, exist_ok=True)
+        _hold_store_lock(metrics_dir)
+        _write_json(path, snapshot)
+    except OSError as e:
+        logger.error(f"Could not write metrics to {path}: {e}")
+
+
+def _merge(merged: Dict[str, Dict[Tuple, Any]], data: Dict[str, list]) -> None:
+    """Adds one store's series (as written by flush) to `merged`."""
+    for name, series in data.items():
+        if name not in METRICS:
+            continue
+        target = merged.setdefault(name, {})
+        for labels, value in series:
+            key = _labels_key(labels)
+            if METRICS[name][0] == 'histogram':
+                state = target.setdefault(key, {'buckets': [0] * len(value['buckets']), 'sum': 0.0, 'count': 0})
+                state['buckets'] = [a + b for a, b in zip(state['buckets'], value['buckets'])]
+                state['sum'] += value['sum']
+                state['count'] += value['count']
+            else:
+                target[key] = target.get(key, 0) + value
+
+
+def _is_dead(store: Path) -> bool:
+    """True if the process that wrote `store` has exited (its lock file is not held)."""
+    try:
+        with open(store.with_suffix('.lock'), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+    except OSError:
+        return False
+
+
+def _remove_store(store: Path) -> None:
+    for path in (store, store.with_suffix('.lock')):
+        try:
+            path.unlink()
+        except OSError:
+            pass
+
+
+def _compact(metrics_dir: Path, aggregate: Dict[str, Any], stores: list) -> list:
+    """
+    Folds the stores of exited processes into AGGREGATE_FILE and deletes them.
+    The aggregate lists the stores it absorbed, so a crash before the deletes
+    never counts a store twice (collect finishes the deletes). Returns the
+    stores still live.
+    """
+    dead = [store for store in stores if store.stem != _store_name and _is_dead(store)]
+    if not dead:
+        return stores
+    merged: Dict[str, Dict[Tuple, Any]] = {}
+    _merge(merged, aggregate['metrics'])
+    for store in dead:
+        _merge(merged, _read_json(store) or {})
+    absorbed = [store.stem for store in dead]
+    _write_json(metrics_dir / AGGREGATE_FILE, {'metrics': _serialize(merged), 'absorbed': absorbed})
+    for store in dead:
+        _remove_store(store)
+    aggregate.update(metrics=_serialize(merged), absorbed=absorbed)
+    return [store for store in stores if store not in dead]
+
+
+def collect() -> Dict[str, Dict[Tuple, Any]]:
+    """
+    Merges the live stores in METRICS_DIR with the aggregate of exited
+    processes, compacting newly exited stores into the aggregate first so
+    counters stay monotonic without the directory growing.
+    """
+    flush()
+    merged: Dict[str, Dict[Tuple, Any]] = {}
+    metrics_dir = get_metrics_dir()
+    if not metrics_dir.is_dir():
+        return merged
+    guard = open(metrics_dir / AGGREGATE_LOCK_FILE, 'a')
+    try:
+        if fcntl is not None:
+            # One collector at a time, so no scrape sees a store both compacted and live
+            fcntl.flock(guard, fcntl.LOCK_EX)
+        aggregate = _read_json(metrics_dir / AGGREGATE_FILE) or {'metrics': {}, 'absorbed': []}
+        absorbed = set(aggregate['absorbed'])
+        stores = []
+        for path in metrics_dir.glob('*.json'):
+            if path.name == AGGREGATE_FILE:
+                continue
+            if path.stem in absorbed:
+                # Already counted in the aggregate; a previous compaction stopped short of deleting it
+                _remove_store(path)
+                continue
+            stores.append(path)
+        if fcntl is not None:
+            stores = _compact(metrics_dir, aggregate, stores)
+        _merge(merged, aggregate['metrics'])
+        for path in stores:
+            _merge(merged, _read_json(path) or {})
+    finally:
+        guard.close()
+    return merged
+
+
+def _format_labels(key: Tuple, extra: Optional[Tuple] = None) -> str:
+    pairs = list(key) + list(extra or ())
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value: float) -> str:
+    return str(value)
+
+
+def render(gauges: Optional[Dict[str, Tuple[str, Dict[Tuple, float]]]] = None) -> str:
+    """
+    Renders the merged metrics in the Prometheus text exposition format.
+    `gauges` adds point-in-time values computed at scrape time:
+    {name: (help, {labels_key: value})}.
+    """
+    merged = collect()
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for key, value in sorted(merged.get(name, {}).items()):
+            if kind != 'histogram':
+                lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+                continue
+            cumulative = 0
+            for bound, count in zip(buckets, value['buckets']):
+                cumulative += count
+                lines.append(f"{name}_bucket{_format_labels(key, (('le', bound),))} {cumulative}")
+            lines.append(f"{name}_bucket{_format_labels(key, (('le', '+Inf'),))} {value['count']}")
+            lines.append(f"{name}_sum{_format_labels(key)} {_format_value(value['sum'])}")
+            lines.append(f"{name}_count{_format_labels(key)} {value['count']}")
+
+    hits: Dict[Tuple, float] = {}
+    totals: Dict[Tuple, float] = {}
+    for key, value in merged.get('cache_requests_total', {}).items():
+        labels = dict(key)
+        cache_key = (('cache', labels.get('cache', '')),)
+        totals[cache_key] = totals.get(cache_key, 0) + value
+        if labels.get('result') == 'hit':
+            hits[cache_key] = hits.get(cache_key, 0) + value
+    ratios = {key: hits.get(key, 0) / total for key, total in totals.items() if total}
+    all_gauges = {'cache_hit_ratio': ('Share of application cache lookups that hit, by cache.', ratios)}
+    all_gauges.update(gauges or {})
+
+    for name, (help_text, series) in all_gauges.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        for key, value in sorted(series.items()):
+            lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+    return '\n'.join(lines) + '\n'
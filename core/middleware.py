@@ -0,0 +1,188 @@
+import logging
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from .db_router import (
+    get_replica_aliases, use_replica, reset_replica,
+    start_write_tracking, wrote_to_primary, reset_write_tracking,
+)
+from .query_budget import QueryRecorder, get_budget, report_violations
+from .profiling import should_profile, start_profiler, save_profile
+from . import metrics
+from .tracing import span
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def is_admin_changelist(request):
+    match = request.resolver_match
+    return bool(match and match.app_name == 'admin' and match.url_name and match.url_name.endswith('_changelist'))
+
+
+class MetricsMiddleware:
+    """
+    Records request count and latency per URL name, plus the per-request
+    query count and DB time gathered by QueryBudgetMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        response = self.get_response(request)
+        duration = time.perf_counter() - started
+
+        match = request.resolver_match
+        view = (match.view_name if match else None) or 'unresolved'
+        metrics.inc('http_requests_total', {'view': view, 'method': request.method, 'status': response.status_code})
+        metrics.observe('http_request_duration_seconds', duration, {'view': view})
+        recorder = getattr(request, 'query_recorder', None)
+        if recorder is not None:
+            metrics.observe('db_queries_per_request', recorder.count, {'view': view})
+            metrics.observe('db_query_seconds_per_request', recorder.total_time, {'view': view})
+        return response
+
+
+class TracingMiddleware:
+    """
+    Opens the root span for each request (when TRACING_ENABLED), so service
+    and view spans nest under it. The span is named after the resolved URL.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with span('http.request', **{'http.method': request.method, 'http.path': request.path}) as current:
+            response = self.get_response(request)
+            if current is not None:
+                match = request.resolver_match
+                current.name = f"{request.method} {(match.view_name if match else None) or 'unresolved'}"
+                current.set_attribute('http.status', response.status_code)
+                user = getattr(request, 'user', None)
+                if user is not None and user.is_authenticated:
+                    current.set_attribute('user.id', user.id)
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Lets views marked with @replica_reads (and admin changelists) read core
+    data from a replica. After a user writes, a short-lived cookie pins their
+    reads to the primary so they always see their own changes.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.cookie_name = getattr(settings, 'REPLICA_PIN_COOKIE', 'db_primary_pin')
+        self.pin_seconds = getattr(settings, 'REPLICA_PIN_SECONDS', 15)
+
+    def __call__(self, request):
+        request._replica_token = None
+        write_token = start_write_tracking()
+        try:
+            response = self.get_response(request)
+        finally:
+            if request._replica_token is not None:
+                reset_replica(request._replica_token)
+            wrote = wrote_to_primary()
+            reset_write_tracking(write_token)
+
+        if get_replica_aliases() and (wrote or request.method not in SAFE_METHODS):
+            response.set_cookie(
+                self.cookie_name, '1', max_age=self.pin_seconds, httponly=True, samesite='Lax'
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not get_replica_aliases() or request.method not in SAFE_METHODS:
+            return None
+        if request.COOKIES.get(self.cookie_name):
+            return None
+        if getattr(view_func, 'replica_reads', False) or is_admin_changelist(request):
+            request._replica_token = use_replica(True)
+        return None
+
+
+class QueryBudgetMiddleware:
+    """
+    Records every query a request runs (on all configured connections),
+    checks it against the view's @query_budget (or QUERY_BUDGET_DEFAULT) and
+    reports any overruns, including the same query shape repeating more than
+    max_repeats times - the usual signature of an N+1.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not getattr(settings, 'QUERY_BUDGET_ENABLED', True):
+            return self.get_response(request)
+
+        sample_rate = getattr(settings, 'QUERY_BUDGET_SQL_SAMPLE_RATE', 0)
+        recorder = QueryRecorder(keep_log=settings.DEBUG or random.random() < sample_rate)
+        request.query_recorder = recorder
+        request._query_budget = get_budget()
+        with ExitStack() as stack:
+            for conn in connections.all():
+                stack.enter_context(conn.execute_wrapper(recorder))
+            response = self.get_response(request)
+
+        problems = recorder.violations(request._query_budget)
+        if problems:
+            match = request.resolver_match
+            view_name = (match.view_name if match else None) or request.path
+            report_violations(view_name, request.path, recorder, problems)
+        if settings.DEBUG:
+            response['X-Query-Count'] = str(recorder.count)
+            response['X-DB-Time-Ms'] = f"{recorder.total_time_ms:.1f}"
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not hasattr(request, '_query_budget'):
+            return None
+        request._query_budget = get_budget(view_func)
+        if is_admin_changelist(request):
+            request._query_budget.update(getattr(settings, 'QUERY_BUDGET_ADMIN_CHANGELIST', {}))
+        return None
+
+
+class RequestProfilingMiddleware:
+    """
+    Runs a single request under cProfile when a superuser asks for it with
+    an "X-Profile: 1" header or "?_profile=1". The stats and the request's
+    SQL log are saved to PROFILE_DIR and listed in the admin.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not should_profile(request):
+            return self.get_response(request)
+        profiler = start_profiler()
+        if profiler is None:
+            return self.get_response(request)
+
+        recorder = QueryRecorder(keep_log=True)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for conn in connections.all():
+                    stack.enter_context(conn.execute_wrapper(recorder))
+                response = self.get_response(request)
+                if hasattr(response, 'render') and callable(response.render) and not response.is_rendered:
+                    response.render()
+        finally:
+            profiler.disable()
+        profile_id = save_profile(request, response, profiler, time.perf_counter() - started, recorder.log)
+        if profile_id:
+            response['X-Profile-Id'] = profile_id
+        return response
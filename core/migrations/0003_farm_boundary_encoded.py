@@ -0,0 +1,30 @@
+# Generated by Django 5.2.1 on 2026-10-18 22:38
+
+from django.conf import settings
+from django.db import migrations, models
+
+from core.geometry import encode_boundary, DEFAULT_SIMPLIFY_ZOOM
+
+
+def encode_existing_boundaries(apps, schema_editor):
+    Farm = apps.get_model('core', 'Farm')
+    zoom = getattr(settings, 'FARM_BOUNDARY_SIMPLIFY_ZOOM', DEFAULT_SIMPLIFY_ZOOM)
+    for farm in Farm.objects.exclude(boundary__isnull=True).only('id', 'boundary').iterator(chunk_size=500):
+        farm.boundary_encoded = encode_boundary(farm.boundary, zoom=zoom)
+        farm.save(update_fields=['boundary_encoded'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_remove_grower_farm_name_grower_business_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='farm',
+            name='boundary_encoded',
+            field=models.JSONField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(encode_existing_boundaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 5.2.1 on 2026-10-18 22:40
+
+from django.db import migrations, models
+
+from core.geometry import geodesic_area_hectares, centroid, bounding_box
+
+
+def derive_existing_boundary_metrics(apps, schema_editor):
+    Farm = apps.get_model('core', 'Farm')
+    for farm in Farm.objects.exclude(boundary__isnull=True).only('id', 'boundary').iterator(chunk_size=500):
+        center = centroid(farm.boundary)
+        box = bounding_box(farm.boundary)
+        farm.boundary_area_hectares = geodesic_area_hectares(farm.boundary)
+        farm.centroid_lng, farm.centroid_lat = center if center else (None, None)
+        farm.bbox_min_lng, farm.bbox_min_lat, farm.bbox_max_lng, farm.bbox_max_lat = box if box else (None, None, None, None)
+        farm.save(update_fields=[
+            'boundary_area_hectares', 'centroid_lat', 'centroid_lng',
+            'bbox_min_lat', 'bbox_min_lng', 'bbox_max_lat', 'bbox_max_lng',
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_farm_boundary_encoded'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='farm',
+            name='bbox_max_lat',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='farm',
+            name='bbox_max_lng',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='farm',
+            name='bbox_min_lat',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='farm',
+            name='bbox_min_lng',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='farm',
+            name='boundary_area_hectares',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='farm',
+            name='centroid_lat',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='farm',
+            name='centroid_lng',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='farm',
+            index=models.Index(fields=['centroid_lat', 'centroid_lng'], name='core_farm_centroi_7607bc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='farm',
+            index=models.Index(fields=['bbox_min_lat', 'bbox_max_lat'], name='core_farm_bbox_mi_59a8bc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='farm',
+            index=models.Index(fields=['bbox_min_lng', 'bbox_max_lng'], name='core_farm_bbox_mi_4b7cec_idx'),
+        ),
+        migrations.RunPython(derive_existing_boundary_metrics, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.1 on 2026-10-18 23:08
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_farm_boundary_metrics'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='surveysession',
+            index=models.Index(fields=['status', 'start_time'], name='core_survey_status_aa1371_idx'),
+        ),
+    ]
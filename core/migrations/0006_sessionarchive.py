@@ -0,0 +1,39 @@
+# Generated by Django 5.2.1 on 2026-10-18 23:10
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_surveysession_status_start_time_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SessionArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('session_id', models.UUIDField(unique=True)),
+                ('status', models.CharField(choices=[('in_progress', 'In Progress'), ('completed', 'Completed'), ('abandoned', 'Abandoned')], max_length=20)),
+                ('start_time', models.DateTimeField()),
+                ('end_time', models.DateTimeField(blank=True, null=True)),
+                ('target_plants_surveyed', models.PositiveIntegerField(blank=True, null=True)),
+                ('observation_count', models.PositiveIntegerField(default=0)),
+                ('observations', models.JSONField(default=list)),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('farm', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_sessions', to='core.farm')),
+                ('surveyor', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_sessions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Archived Survey Session',
+                'verbose_name_plural': 'Archived Survey Sessions',
+                'ordering': ['-start_time'],
+                'indexes': [models.Index(fields=['farm', '-start_time'], name='core_sessio_farm_id_2f0bb5_idx')],
+            },
+        ),
+    ]
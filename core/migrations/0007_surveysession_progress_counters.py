@@ -0,0 +1,58 @@
+# Generated by Django 5.2.1 on 2026-10-18 23:14
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Q
+
+
+def backfill_progress_counters(apps, schema_editor):
+    SurveySession = apps.get_model('core', 'SurveySession')
+    Observation = apps.get_model('core', 'Observation')
+    sessions = SurveySession.objects.annotate(
+        recorded=Count('observations', filter=Q(observations__status='completed')),
+        last_sequence=Max('observations__plant_sequence_number'),
+    ).filter(recorded__gt=0)
+    for session in sessions.iterator(chunk_size=500):
+        completed = Observation.objects.filter(session_id=session.id, status='completed')
+        session.observations_recorded = session.recorded
+        session.last_sequence_number = session.last_sequence or 0
+        session.pests_seen = sorted(set(
+            completed.filter(pests_observed__isnull=False).values_list('pests_observed', flat=True)))
+        session.diseases_seen = sorted(set(
+            completed.filter(diseases_observed__isnull=False).values_list('diseases_observed', flat=True)))
+        session.save(update_fields=['observations_recorded', 'last_sequence_number', 'pests_seen', 'diseases_seen'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_sessionarchive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='surveysession',
+            name='diseases_seen',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='surveysession',
+            name='last_sequence_number',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='surveysession',
+            name='observations_recorded',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='surveysession',
+            name='pests_seen',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='surveysession',
+            name='progress_updated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_progress_counters, migrations.RunPython.noop),
+    ]
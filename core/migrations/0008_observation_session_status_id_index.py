@@ -0,0 +1,21 @@
+# Generated by Django 5.2.1 on 2026-10-18 23:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_surveysession_progress_counters'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='observation',
+            name='core_observ_session_f87950_idx',
+        ),
+        migrations.AddIndex(
+            model_name='observation',
+            index=models.Index(fields=['session', 'status', 'id'], name='core_observ_session_dcf681_idx'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.1 on 2026-10-18 23:20
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.utils import timezone
+
+
+def backfill_completion_snapshots(apps, schema_editor):
+    """Same figures as SurveySession.build_completion_snapshot, for sessions completed before it existed."""
+    SurveySession = apps.get_model('core', 'SurveySession')
+    Observation = apps.get_model('core', 'Observation')
+    PestThrough = Observation.pests_observed.through
+    DiseaseThrough = Observation.diseases_observed.through
+    sessions = SurveySession.objects.filter(status='completed', completion_snapshot__isnull=True)
+    for session in sessions.iterator(chunk_size=500):
+        completed = {'observation__session_id': session.id, 'observation__status': 'completed'}
+        pests = list(PestThrough.objects.filter(**completed).values_list(
+            'pest_id').annotate(occurrences=Count('id')).order_by('pest_id'))
+        diseases = list(DiseaseThrough.objects.filter(**completed).values_list(
+            'disease_id').annotate(occurrences=Count('id')).order_by('disease_id'))
+        duration = None
+        if session.end_time:
+            minutes = (session.end_time - session.start_time).total_seconds() / 60
+            if 0 <= minutes <= 1440:
+                duration = round(minutes, 1)
+        session.completion_snapshot = {
+            'schema': 1,
+            'observation_count': Observation.objects.filter(session_id=session.id, status='completed').count(),
+            'pests': [list(pair) for pair in pests],
+            'diseases': [list(pair) for pair in diseases],
+            'duration_minutes': duration,
+            'has_issues': bool(pests or diseases),
+            'built_at': timezone.now().isoformat(),
+        }
+        session.save(update_fields=['completion_snapshot'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_observation_session_status_id_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='surveysession',
+            name='completion_snapshot',
+            field=models.JSONField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_completion_snapshots, migrations.RunPython.noop),
+    ]
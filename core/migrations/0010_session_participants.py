@@ -0,0 +1,117 @@
+# Generated by Django 5.2.1 on 2026-10-18 23:30
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Max, OuterRef, Subquery
+
+# SESSION_SEQUENCE_BLOCK_SIZE when this migration was written
+BLOCK_SIZE = 100
+
+
+def create_surveyor_participants(apps, schema_editor):
+    """
+    Every existing session gets its surveyor as sole participant, carrying the
+    session's progress counters, the whole target as its share and a sequence
+    block covering the numbers already used. Observations are attributed to it.
+    """
+    SurveySession = apps.get_model('core', 'SurveySession')
+    SessionParticipant = apps.get_model('core', 'SessionParticipant')
+    Observation = apps.get_model('core', 'Observation')
+    sessions = SurveySession.objects.annotate(max_sequence=Max('observations__plant_sequence_number'))
+    participants = []
+    for session in sessions.iterator(chunk_size=500):
+        used = max(session.last_sequence_number, session.max_sequence or 0)
+        blocks = max(1, -(-used // BLOCK_SIZE))
+        # Leave room for the next plant when the last block is full
+        if used == blocks * BLOCK_SIZE:
+            blocks += 1
+        session.last_allocated_sequence = blocks * BLOCK_SIZE
+        session.save(update_fields=['last_allocated_sequence'])
+        participants.append(SessionParticipant(
+            session_id=session.id,
+            user_id=session.surveyor_id,
+            joined_at=session.start_time,
+            target_share=session.target_plants_surveyed,
+            sequence_start=1,
+            sequence_end=session.last_allocated_sequence,
+            observations_recorded=session.observations_recorded,
+            last_sequence_number=used,
+            pests_seen=session.pests_seen,
+            diseases_seen=session.diseases_seen,
+            progress_updated_at=session.progress_updated_at,
+        ))
+        if len(participants) >= 500:
+            SessionParticipant.objects.bulk_create(participants)
+            participants = []
+    SessionParticipant.objects.bulk_create(participants)
+    Observation.objects.update(participant_id=Subquery(
+        SessionParticipant.objects.filter(session_id=OuterRef('session_id')).values('id')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_surveysession_completion_snapshot'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='surveysession',
+            name='last_allocated_sequence',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='SessionParticipant',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('joined_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('target_share', models.PositiveIntegerField(blank=True, null=True)),
+                ('sequence_start', models.PositiveIntegerField()),
+                ('sequence_end', models.PositiveIntegerField()),
+                ('observations_recorded', models.PositiveIntegerField(default=0)),
+                ('last_sequence_number', models.PositiveIntegerField(default=0)),
+                ('pests_seen', models.JSONField(blank=True, default=list)),
+                ('diseases_seen', models.JSONField(blank=True, default=list)),
+                ('progress_updated_at', models.DateTimeField(blank=True, null=True)),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='participants', to='core.surveysession')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='session_participations', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['joined_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='observation',
+            name='participant',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='observations', to='core.sessionparticipant'),
+        ),
+        migrations.AddConstraint(
+            model_name='sessionparticipant',
+            constraint=models.UniqueConstraint(fields=('session', 'user'), name='unique_session_participant'),
+        ),
+        migrations.RunPython(create_surveyor_participants, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='surveysession',
+            name='diseases_seen',
+        ),
+        migrations.RemoveField(
+            model_name='surveysession',
+            name='last_sequence_number',
+        ),
+        migrations.RemoveField(
+            model_name='surveysession',
+            name='observations_recorded',
+        ),
+        migrations.RemoveField(
+            model_name='surveysession',
+            name='pests_seen',
+        ),
+        migrations.RemoveField(
+            model_name='surveysession',
+            name='progress_updated_at',
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.1 on 2026-10-18 23:41
+
+from django.db import migrations, models
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+
+def derive_bbox_extent(apps, schema_editor):
+    Farm = apps.get_model('core', 'Farm')
+    Farm.objects.filter(bbox_min_lat__isnull=False).update(
+        bbox_extent_degrees=Greatest(F('bbox_max_lat') - F('bbox_min_lat'), F('bbox_max_lng') - F('bbox_min_lng'))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_session_participants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='farm',
+            name='bbox_extent_degrees',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='farm',
+            index=models.Index(fields=['bbox_extent_degrees'], name='core_farm_bbox_ex_120098_idx'),
+        ),
+        migrations.RunPython(derive_bbox_extent, migrations.RunPython.noop),
+    ]
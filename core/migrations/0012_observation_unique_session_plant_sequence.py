@@ -0,0 +1,42 @@
+# Generated by Django 5.2.1 on 2026-10-18 23:45
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def renumber_duplicate_sequences(apps, schema_editor):
+    """
+    Gives every repeated (session, plant_sequence_number) but the first a new
+    number past the session's allocated blocks, so the constraint can be added.
+    """
+    SurveySession = apps.get_model('core', 'SurveySession')
+    Observation = apps.get_model('core', 'Observation')
+    duplicates = Observation.objects.filter(plant_sequence_number__isnull=False).values(
+        'session_id', 'plant_sequence_number'
+    ).annotate(n=Count('id')).filter(n__gt=1)
+    for duplicate in duplicates:
+        extra = list(Observation.objects.filter(
+            session_id=duplicate['session_id'], plant_sequence_number=duplicate['plant_sequence_number']
+        ).order_by('id').values_list('id', flat=True)[1:])
+        session = SurveySession.objects.get(pk=duplicate['session_id'])
+        highest = Observation.objects.filter(session=session).aggregate(top=Max('plant_sequence_number'))['top']
+        session.last_allocated_sequence = max(session.last_allocated_sequence, highest)
+        for observation_id in extra:
+            session.last_allocated_sequence += 1
+            Observation.objects.filter(pk=observation_id).update(plant_sequence_number=session.last_allocated_sequence)
+        session.save(update_fields=['last_allocated_sequence'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_farm_bbox_extent_degrees'),
+    ]
+
+    operations = [
+        migrations.RunPython(renumber_duplicate_sequences, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='observation',
+            constraint=models.UniqueConstraint(fields=('session', 'plant_sequence_number'), name='unique_session_plant_sequence'),
+        ),
+    ]
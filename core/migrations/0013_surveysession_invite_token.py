@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 23:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_observation_unique_session_plant_sequence'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='surveysession',
+            name='invite_token',
+            field=models.CharField(blank=True, editable=False, max_length=32, null=True),
+        ),
+    ]
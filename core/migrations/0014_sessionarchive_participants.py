@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 23:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_surveysession_invite_token'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sessionarchive',
+            name='participants',
+            field=models.JSONField(default=list),
+        ),
+    ]
@@ -1,11 +1,19 @@
-from django.db import models
+from django.db import models, connections, router, transaction
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.utils import timezone
 from datetime import datetime, timedelta
 from decimal import Decimal
+import copy
+import secrets
 import uuid
 import logging
 
+from .geometry import (
+    encode_boundary, geodesic_area_hectares, centroid, bounding_box, DEFAULT_SIMPLIFY_ZOOM
+)
+from . import metrics
+
 logger = logging.getLogger(__name__)
 
 # Constants for choices
@@ -200,6 +208,25 @@ class Farm(models.Model):
     geoscape_address_id = models.CharField(max_length=50, blank=True, null=True, unique=True, db_index=True)
     formatted_address = models.CharField(max_length=500, blank=True, null=True)
     boundary = models.JSONField(null=True, blank=True)
+    # Simplified, delta-encoded copy of `boundary` used for map rendering.
+    boundary_encoded = models.JSONField(null=True, blank=True, editable=False)
+    # Metrics derived from `boundary` when it is saved, so map views and
+    # spatial queries never need to parse the GeoJSON.
+    boundary_area_hectares = models.FloatField(null=True, blank=True, editable=False)
+    centroid_lat = models.FloatField(null=True, blank=True, editable=False)
+    centroid_lng = models.FloatField(null=True, blank=True, editable=False)
+    bbox_min_lat = models.FloatField(null=True, blank=True, editable=False)
+    bbox_min_lng = models.FloatField(null=True, blank=True, editable=False)
+    bbox_max_lat = models.FloatField(null=True, blank=True, editable=False)
+    bbox_max_lng = models.FloatField(null=True, blank=True, editable=False)
+    # Larger of the bbox's lat/lng spans; parcels wider than FARM_MAX_EXTENT_DEGREES
+    # are found by this column instead of the narrow bbox index range
+    bbox_extent_degrees = models.FloatField(null=True, blank=True, editable=False)
+
+    BOUNDARY_DERIVED_FIELDS = [
+        'boundary_encoded', 'boundary_area_hectares', 'centroid_lat', 'centroid_lng',
+        'bbox_min_lat', 'bbox_min_lng', 'bbox_max_lat', 'bbox_max_lng', 'bbox_extent_degrees',
+    ]
     
     class Meta:
         ordering = ['name']
@@ -209,10 +236,93 @@ class Farm(models.Model):
             models.Index(fields=['plant_type']),
             models.Index(fields=['region']),
             models.Index(fields=['geoscape_address_id']),
+            models.Index(fields=['centroid_lat', 'centroid_lng']),
+            models.Index(fields=['bbox_min_lat', 'bbox_max_lat']),
+            models.Index(fields=['bbox_min_lng', 'bbox_max_lng']),
+            models.Index(fields=['bbox_extent_degrees']),
         ]
 
     def __str__(self):
         return self.name
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored boundary so save() can tell whether it was edited
+        if 'boundary' not in instance.get_deferred_fields():
+            instance._loaded_boundary = copy.deepcopy(instance.boundary)
+        return instance
+
+    def boundary_modified(self):
+        """True if `boundary` differs from the value loaded from the database (or was never loaded)."""
+        if 'boundary' in self.get_deferred_fields():
+            return False
+        return not hasattr(self, '_loaded_boundary') or self.boundary != self._loaded_boundary
+
+    def save(self, *args, **kwargs):
+        # Keep the values derived from the boundary in step with the raw geometry
+        update_fields = kwargs.get('update_fields')
+        boundary_modified = (update_fields is None or 'boundary' in update_fields) and self.boundary_modified()
+        if boundary_modified:
+            self.refresh_boundary_derivatives()
+            if update_fields is not None:
+                kwargs['update_fields'] = list(update_fields) + [
+                    field for field in self.BOUNDARY_DERIVED_FIELDS if field not in update_fields
+                ]
+        super().save(*args, **kwargs)
+        if boundary_modified:
+            self._loaded_boundary = copy.deepcopy(self.boundary)
+
+    def refresh_boundary_derivatives(self):
+        """Recompute the encoded rendering boundary, area, centroid and bbox from `boundary`."""
+        zoom = getattr(settings, 'FARM_BOUNDARY_SIMPLIFY_ZOOM', DEFAULT_SIMPLIFY_ZOOM)
+        # This runs in save() before a new farm has a primary key.
+        label = f"Farm {self.pk} ('{self.name}')" if self.pk else f"New farm '{self.name}'"
+        try:
+            self.boundary_encoded = encode_boundary(self.boundary, zoom=zoom)
+            self.boundary_area_hectares = geodesic_area_hectares(self.boundary)
+            center = centroid(self.boundary)
+            box = bounding_box(self.boundary)
+        except Exception as e:
+            logger.error(f"{label}: Could not derive boundary metrics: {e}")
+            self.boundary_encoded = None
+            self.boundary_area_hectares = None
+            center = box = None
+
+        self.centroid_lng, self.centroid_lat = center if center else (None, None)
+        self.bbox_min_lng, self.bbox_min_lat, self.bbox_max_lng, self.bbox_max_lat = box if box else (None, None, None, None)
+        self.bbox_extent_degrees = max(box[2] - box[0], box[3] - box[1]) if box else None
+        max_extent = getattr(settings, 'FARM_MAX_EXTENT_DEGREES', 0.5)
+        if self.bbox_extent_degrees is not None and self.bbox_extent_degrees > max_extent:
+            logger.warning(
+                f"{label}: boundary spans {self.bbox_extent_degrees:.3f} degrees, more than "
+                f"FARM_MAX_EXTENT_DEGREES ({max_extent}). Spatial queries use the slower oversize path for it."
+            )
+
+        # The farm page and admin already flag mismatches, so this is only debug detail.
+        discrepancy = self.boundary_area_discrepancy()
+        if discrepancy is not None and self.has_area_mismatch():
+            logger.debug(
+                f"{label}: boundary area {self.boundary_area_hectares:.2f} ha differs from "
+                f"size_hectares {self.size_hectares} by {discrepancy:.0%}. total_plants() may be wrong."
+            )
+
+    def boundary_area_discrepancy(self):
+        """Relative difference between the entered size and the boundary area, or None if either is missing."""
+        if not self.boundary_area_hectares or self.size_hectares is None:
+            return None
+        return abs(float(self.size_hectares) - self.boundary_area_hectares) / self.boundary_area_hectares
+
+    def has_area_mismatch(self):
+        discrepancy = self.boundary_area_discrepancy()
+        tolerance = getattr(settings, 'FARM_BOUNDARY_AREA_TOLERANCE', 0.25)
+        return discrepancy is not None and discrepancy > tolerance
+
+    def bounding_box(self):
+        """Stored bbox as [[min_lat, min_lng], [max_lat, max_lng]] (Leaflet order), or None."""
+        if self.bbox_min_lat is None:
+            return None
+        return [[self.bbox_min_lat, self.bbox_min_lng], [self.bbox_max_lat, self.bbox_max_lng]]
     
     def total_plants(self):
         if self.size_hectares is None or self.stocking_rate is None:
@@ -412,21 +522,82 @@ class SurveySessionManager(models.Manager):
         
     def recent(self, limit=10):
         return self.completed().order_by('-end_time')[:limit]
+
+    def with_participant(self, user):
+        """Sessions the user takes part in (the surveyor always does)."""
+        return self.filter(participants__user=user)
     
-    def cleanup_stale_sessions(self, hours=2):
-        """Clean up sessions that have been in progress for too long"""
+    def cleanup_stale_sessions(self, hours=None, batch_size=None, max_batches=None, source='worker'):
+        """
+        Marks sessions that have been in progress for too long as abandoned,
+        in chunks of batch_size sessions (one short UPDATE each). Their
+        observations are kept; the archiver (core.archive) moves them out of
+        the hot tables later. Meant for the session_cleanup_worker command,
+        not for requests. Returns the number of sessions abandoned.
+        """
+        hours = hours if hours is not None else settings.SESSION_STALE_HOURS
+        batch_size = batch_size or settings.SESSION_CLEANUP_BATCH_SIZE
         cutoff_time = timezone.now() - timedelta(hours=hours)
-        stale_sessions = self.filter(
-            status='in_progress',
-            start_time__lt=cutoff_time
+        # Served by the (status, start_time) index
+        stale_ids = self.filter(status='in_progress', start_time__lt=cutoff_time).order_by('id')
+
+        total = 0
+        batches = 0
+        last_id = 0
+        while max_batches is None or batches < max_batches:
+            ids = list(stale_ids.filter(id__gt=last_id).values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+            total += self.abandon_sessions(ids)
+            last_id = ids[-1]
+            batches += 1
+        if total:
+            logger.info(f"Abandoned {total} stale sessions older than {hours} hours in {batches} batches")
+            metrics.inc('stale_sessions_cleaned_total', {'source': source}, total)
+        return total
+
+    def abandon_sessions(self, session_ids):
+        """
+        Marks the given sessions as abandoned with one UPDATE. The status is
+        re-checked so a session finished meanwhile is left alone. Returns the
+        number of sessions abandoned.
+        """
+        return self.filter(id__in=session_ids, status='in_progress').update(
+            status='abandoned', end_time=timezone.now()
         )
-        count = stale_sessions.count()
-        if count > 0:
-            logger.info(f"Cleaning up {count} stale sessions older than {hours} hours")
-            stale_sessions.delete()
-        return count
 
+    def delete_sessions(self, session_ids):
+        """
+        Deletes the given sessions with their observations, observation M2M
+        rows and participants using raw DELETE statements, children first, in
+        one transaction.
+        Skips the ORM delete collector and its signals. Returns the number of
+        sessions deleted.
+        """
+        if not session_ids:
+            return 0
+        alias = router.db_for_write(self.model)
+        connection = connections[alias]
+        quote = connection.ops.quote_name
+        placeholders = ', '.join(['%s'] * len(session_ids))
+        observation_table = quote(Observation._meta.db_table)
+        observations_of_sessions = f"SELECT id FROM {observation_table} WHERE session_id IN ({placeholders})"
 
+        with transaction.atomic(using=alias), connection.cursor() as cursor:
+            for field in (Observation.pests_observed, Observation.diseases_observed):
+                through_table = quote(field.through._meta.db_table)
+                cursor.execute(
+                    f"DELETE FROM {through_table} WHERE observation_id IN ({observations_of_sessions})", session_ids
+                )
+            cursor.execute(f"DELETE FROM {observation_table} WHERE session_id IN ({placeholders})", session_ids)
+            cursor.execute(
+                f"DELETE FROM {quote(SessionParticipant._meta.db_table)} WHERE session_id IN ({placeholders})",
+                session_ids,
+            )
+            cursor.execute(
+                f"DELETE FROM {quote(self.model._meta.db_table)} WHERE id IN ({placeholders})", session_ids
+            )
+            return cursor.rowcount
 
 
 class SurveySession(models.Model):
@@ -437,9 +608,17 @@ class SurveySession(models.Model):
     status = models.CharField(max_length=20, choices=SURVEY_STATUS_CHOICES, default='in_progress', db_index=True)
     target_plants_surveyed = models.PositiveIntegerField(null=True, blank=True)
     session_id = models.UUIDField(default=uuid.uuid4, editable=False, unique=True, db_index=True)
+    # Highest plant sequence number handed out to a participant (see allocate_sequence_block)
+    last_allocated_sequence = models.PositiveIntegerField(default=0)
+    # Secret part of the join link the farm owner hands out; None when no link is active
+    invite_token = models.CharField(max_length=32, null=True, blank=True, editable=False)
+    # Written in the transaction that completes the session (see build_completion_snapshot)
+    completion_snapshot = models.JSONField(null=True, blank=True, editable=False)
     
     objects = SurveySessionManager()
 
+    COMPLETION_SNAPSHOT_SCHEMA = 1
+
     class Meta:
         ordering = ['-start_time']
         verbose_name = "Survey Session"
@@ -448,6 +627,8 @@ class SurveySession(models.Model):
             models.Index(fields=['status']),
             models.Index(fields=['farm', 'status']),
             models.Index(fields=['surveyor', '-start_time']),
+            # Stale-session cleanup: status='in_progress' AND start_time < cutoff
+            models.Index(fields=['status', 'start_time']),
         ]
     
     def __str__(self):
@@ -462,6 +643,12 @@ class SurveySession(models.Model):
         return status_classes.get(self.status, 'bg-secondary')
     
     def duration(self):
+        """Duration in minutes, from the completion snapshot once the session is completed"""
+        if self.completion_snapshot:
+            return self.completion_snapshot['duration_minutes']
+        return self._duration_from_times()
+
+    def _duration_from_times(self):
         """Calculate duration in minutes with better error handling"""
         if self.status not in ['completed', 'abandoned']:
             return None
@@ -525,10 +712,142 @@ class SurveySession(models.Model):
         return None
         
     def observation_count(self):
+        if self.completion_snapshot:
+            return self.completion_snapshot['observation_count']
         return self.observations.filter(status='completed').count()
         
     def is_active(self):
         return self.status == 'in_progress'
+
+    def create_invite(self):
+        """Issues a new join-link token, replacing (and so revoking) any earlier one."""
+        self.invite_token = secrets.token_urlsafe(24)
+        self.save(update_fields=['invite_token'])
+        return self.invite_token
+
+    def revoke_invite(self):
+        self.invite_token = None
+        self.save(update_fields=['invite_token'])
+
+    def invite_matches(self, token):
+        return bool(self.invite_token) and secrets.compare_digest(self.invite_token.encode(), token.encode())
+
+    def allocate_sequence_block(self, size=None):
+        """
+        Reserves the next `size` plant sequence numbers (default
+        SESSION_SEQUENCE_BLOCK_SIZE) for a participant and returns the block as
+        (first, last). A single-row UPDATE; run it inside the caller's
+        transaction.
+        """
+        size = size or settings.SESSION_SEQUENCE_BLOCK_SIZE
+        sessions = SurveySession.objects.filter(pk=self.pk)
+        sessions.update(last_allocated_sequence=models.F('last_allocated_sequence') + size)
+        self.last_allocated_sequence = sessions.values_list('last_allocated_sequence', flat=True).get()
+        return self.last_allocated_sequence - size + 1, self.last_allocated_sequence
+
+    def rebalance_target_shares(self):
+        """
+        Splits the plants still to survey evenly among the participants, on top
+        of what each has recorded, so the shares always add up to the session
+        target. Locks the participant rows; run it inside a transaction.
+        """
+        participants = list(self.participants.select_for_update().order_by('id'))
+        if not participants:
+            return []
+        target = self.target_plants_surveyed
+        if target:
+            remaining = max(0, target - sum(p.observations_recorded for p in participants))
+            portion, extra = divmod(remaining, len(participants))
+            for index, participant in enumerate(participants):
+                participant.target_share = participant.observations_recorded + portion + (1 if index < extra else 0)
+        else:
+            for participant in participants:
+                participant.target_share = None
+        SessionParticipant.objects.bulk_update(participants, ['target_share'])
+        return participants
+
+    def recount_progress(self):
+        """Rebuilds every participant's progress counters from the observations."""
+        for participant in self.participants.all():
+            participant.recount_progress()
+
+    def progress(self, participants=None):
+        """
+        Live progress, summed over the participants' running counters (one
+        query, none if `participants` is given); no observation queries.
+        """
+        if participants is None:
+            participants = list(self.participants.select_related('user'))
+        target = self.target_plants_surveyed or 0
+        count = sum(p.observations_recorded for p in participants)
+        updated = max((p.progress_updated_at for p in participants if p.progress_updated_at), default=None)
+        return {
+            'session_id': str(self.session_id),
+            'status': self.status,
+            'observation_count': count,
+            'target_plants': target,
+            'progress_percent': min(int(count / target * 100), 100) if target > 0 else 0,
+            'target_reached': bool(target) and count >= target,
+            'unique_pests': len(set().union(*(p.pests_seen for p in participants))),
+            'unique_diseases': len(set().union(*(p.diseases_seen for p in participants))),
+            'participants': [p.progress() for p in participants],
+            'updated_at': updated.isoformat() if updated else None,
+        }
+
+    def build_completion_snapshot(self):
+        """
+        The figures every read path shows for a finished session: observation
+        count, the pest and disease ids found with their occurrence counts,
+        duration and has_issues. Three queries. _finish_survey_session stores
+        it in completion_snapshot in the transaction that completes the
+        session; completed sessions never change afterwards.
+        """
+        completed = {'observation__session': self, 'observation__status': 'completed'}
+        pests = list(Observation.pests_observed.through.objects.filter(**completed).values_list(
+            'pest_id').annotate(occurrences=models.Count('id')).order_by('pest_id'))
+        diseases = list(Observation.diseases_observed.through.objects.filter(**completed).values_list(
+            'disease_id').annotate(occurrences=models.Count('id')).order_by('disease_id'))
+        return {
+            'schema': self.COMPLETION_SNAPSHOT_SCHEMA,
+            'observation_count': self.observations.filter(status='completed').count(),
+            'pests': [list(pair) for pair in pests],
+            'diseases': [list(pair) for pair in diseases],
+            'duration_minutes': self._duration_from_times(),
+            'has_issues': bool(pests or diseases),
+            'built_at': timezone.now().isoformat(),
+        }
+
+    def session_stats(self):
+        """The completion snapshot, or the same figures computed now for a session that is not completed."""
+        return self.completion_snapshot or self.build_completion_snapshot()
+
+    def findings(self, stats=None):
+        """
+        (pests, diseases) found in the session, each a list of
+        {'id', 'name', 'occurrences'} ordered by name. Names come from the
+        taxonomy snapshot, so this adds no queries to session_stats().
+        """
+        from .taxonomy import get_taxonomy
+        stats = stats or self.session_stats()
+        taxonomy = get_taxonomy()
+
+        def named(pairs, records):
+            found = [
+                {'id': pk, 'name': records[pk].name, 'occurrences': occurrences}
+                for pk, occurrences in pairs if pk in records
+            ]
+            return sorted(found, key=lambda item: item['name'])
+
+        return named(stats['pests'], taxonomy.pests), named(stats['diseases'], taxonomy.diseases)
+
+    def abandon(self):
+        """Ends an in-progress session without completing it; its observations are kept."""
+        if self.status != 'in_progress':
+            return False
+        self.status = 'abandoned'
+        self.end_time = timezone.now()
+        self.save(update_fields=['status', 'end_time'])
+        return True
         
     def get_progress_percentage(self):
         if not self.target_plants_surveyed or self.target_plants_surveyed <= 0:
@@ -558,6 +877,8 @@ class SurveySession(models.Model):
     
     def has_issues(self):
         """Check if any pests or diseases were found"""
+        if self.completion_snapshot:
+            return self.completion_snapshot['has_issues']
         return self.get_unique_pests().exists() or self.get_unique_diseases().exists()
     
     def get_status_icon(self):
@@ -570,6 +891,7 @@ class SurveySession(models.Model):
             return 'bi-clock-fill text-primary'
         
     def summarize(self):
+        stats = self.session_stats()
         return {
             'id': self.session_id,
             'farm_name': self.farm.name,
@@ -578,22 +900,96 @@ class SurveySession(models.Model):
             'status': self.status,
             'duration_minutes': self.duration(),
             'duration_display': self.duration_display(),
-            'observations_count': self.observation_count(),
+            'observations_count': stats['observation_count'],
             'target_plants': self.target_plants_surveyed,
             'progress_percentage': self.get_progress_percentage(),
-            'unique_pests_count': self.get_unique_pests().count(),
-            'unique_diseases_count': self.get_unique_diseases().count(),
+            'unique_pests_count': len(stats['pests']),
+            'unique_diseases_count': len(stats['diseases']),
             'surveyor_name': f"{self.surveyor.first_name} {self.surveyor.last_name}".strip() or self.surveyor.username,
             'can_finish': self.can_finish(),
             'remaining_plants': self.get_remaining_plants(),
             'has_issues': self.has_issues(),
         }
 
-    def save(self, *args, **kwargs):
-        # Auto-cleanup stale sessions when saving new ones
-        if self.pk is None:  # New session
-            SurveySession.objects.cleanup_stale_sessions()
-        super().save(*args, **kwargs)
+
+class SessionParticipant(models.Model):
+    """
+    A surveyor taking part in a survey session; the session's surveyor is its
+    first participant. Each participant numbers plants from its own
+    pre-allocated block of sequence numbers, records up to its target_share
+    and keeps its own running counters, so concurrent observations only lock
+    their participant's row. Session progress is the sum over participants.
+    """
+    session = models.ForeignKey(SurveySession, on_delete=models.CASCADE, related_name='participants')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='session_participations')
+    joined_at = models.DateTimeField(default=timezone.now)
+    # Share of the session's target_plants_surveyed; None when the session has no target
+    target_share = models.PositiveIntegerField(null=True, blank=True)
+    # Current block of plant sequence numbers, inclusive
+    sequence_start = models.PositiveIntegerField()
+    sequence_end = models.PositiveIntegerField()
+    # Running progress counters, kept up to date by create_observation (see record_observation)
+    observations_recorded = models.PositiveIntegerField(default=0)
+    last_sequence_number = models.PositiveIntegerField(default=0)
+    pests_seen = models.JSONField(default=list, blank=True)
+    diseases_seen = models.JSONField(default=list, blank=True)
+    progress_updated_at = models.DateTimeField(null=True, blank=True)
+
+    PROGRESS_FIELDS = ['observations_recorded', 'last_sequence_number', 'pests_seen', 'diseases_seen', 'progress_updated_at']
+
+    class Meta:
+        ordering = ['joined_at']
+        constraints = [
+            models.UniqueConstraint(fields=['session', 'user'], name='unique_session_participant'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} in {self.session}"
+
+    def next_sequence_number(self):
+        """The next unused number of the current block, or None once the block is used up."""
+        candidate = max(self.last_sequence_number + 1, self.sequence_start)
+        return candidate if candidate <= self.sequence_end else None
+
+    def share_reached(self):
+        return self.target_share is not None and self.observations_recorded >= self.target_share
+
+    def record_observation(self, sequence_number, pest_ids, disease_ids):
+        """
+        Adds a completed observation to the progress counters. The caller saves
+        PROGRESS_FIELDS, holding a lock on the row (see _create_observation).
+        """
+        self.observations_recorded += 1
+        if sequence_number and self.sequence_start <= sequence_number <= self.sequence_end:
+            # Numbers outside the current block never move it on (see recount_progress)
+            self.last_sequence_number = max(self.last_sequence_number, sequence_number)
+        self.pests_seen = sorted(set(self.pests_seen) | {int(pk) for pk in pest_ids})
+        self.diseases_seen = sorted(set(self.diseases_seen) | {int(pk) for pk in disease_ids})
+        self.progress_updated_at = timezone.now()
+
+    def recount_progress(self, save=True):
+        """Rebuilds the progress counters from the observations, e.g. after observations were deleted."""
+        observations = self.observations.filter(status='completed')
+        self.observations_recorded = observations.count()
+        self.last_sequence_number = observations.filter(
+            plant_sequence_number__range=(self.sequence_start, self.sequence_end)
+        ).aggregate(last=models.Max('plant_sequence_number'))['last'] or 0
+        self.pests_seen = sorted(set(observations.filter(
+            pests_observed__isnull=False).values_list('pests_observed', flat=True)))
+        self.diseases_seen = sorted(set(observations.filter(
+            diseases_observed__isnull=False).values_list('diseases_observed', flat=True)))
+        self.progress_updated_at = timezone.now()
+        if save:
+            self.save(update_fields=self.PROGRESS_FIELDS)
+
+    def progress(self):
+        return {
+            'user_id': self.user_id,
+            'username': self.user.username,
+            'observation_count': self.observations_recorded,
+            'target_share': self.target_share,
+            'next_sequence_number': self.next_sequence_number(),
+        }
 
 
 class ObservationManager(models.Manager):
@@ -612,6 +1008,10 @@ class ObservationManager(models.Manager):
 
 class Observation(models.Model):
     session = models.ForeignKey(SurveySession, on_delete=models.CASCADE, related_name='observations', db_index=True)
+    # Who recorded it; null for observations added outside the app (e.g. the admin)
+    participant = models.ForeignKey(
+        SessionParticipant, on_delete=models.SET_NULL, null=True, blank=True, related_name='observations'
+    )
     observation_time = models.DateTimeField(default=timezone.now, db_index=True)
     pests_observed = models.ManyToManyField(Pest, related_name='observations', blank=True)
     diseases_observed = models.ManyToManyField(Disease, related_name='observations', blank=True)
@@ -627,10 +1027,15 @@ class Observation(models.Model):
         verbose_name_plural = "Observation Points"
         indexes = [
             models.Index(fields=['status']),
-            models.Index(fields=['session', 'status']),
+            # Also serves the keyset pages of a session's observations (get_observation_page)
+            models.Index(fields=['session', 'status', 'id']),
             models.Index(fields=['observation_time']),
             models.Index(fields=['plant_sequence_number']),
         ]
+        constraints = [
+            # Participants number from disjoint blocks; this is the guard if anything else assigns numbers
+            models.UniqueConstraint(fields=['session', 'plant_sequence_number'], name='unique_session_plant_sequence'),
+        ]
     
     def __str__(self):
         return f"Observation {self.plant_sequence_number or 'n/a'} on {self.observation_time.strftime('%Y-%m-%d %H:%M')}"
@@ -656,4 +1061,48 @@ class Observation(models.Model):
             'notes': self.notes,
             'pests': list(self.pests_observed.values('id', 'name')),
             'diseases': list(self.diseases_observed.values('id', 'name')),
-        }
\ No newline at end of file
+        }
+
+
+class SessionArchive(models.Model):
+    """
+    An abandoned survey session moved out of the SurveySession and
+    Observation tables by the archiver (core.archive). The observations are
+    stored as one compact JSON list of
+    [plant_sequence_number, observation_time, status, notes, pest_ids, disease_ids, recorded_by],
+    where recorded_by is the recording participant's user id (rows archived
+    before team sessions have no recorded_by), and the participants as
+    [user_id, joined_at, target_share, sequence_start, sequence_end, observations_recorded].
+    """
+    session_id = models.UUIDField(unique=True)
+    farm = models.ForeignKey(Farm, on_delete=models.CASCADE, related_name='archived_sessions', db_index=True)
+    surveyor = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='archived_sessions')
+    status = models.CharField(max_length=20, choices=SURVEY_STATUS_CHOICES)
+    start_time = models.DateTimeField()
+    end_time = models.DateTimeField(null=True, blank=True)
+    target_plants_surveyed = models.PositiveIntegerField(null=True, blank=True)
+    observation_count = models.PositiveIntegerField(default=0)
+    observations = models.JSONField(default=list)
+    participants = models.JSONField(default=list)
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-start_time']
+        verbose_name = "Archived Survey Session"
+        verbose_name_plural = "Archived Survey Sessions"
+        indexes = [
+            models.Index(fields=['farm', '-start_time']),
+        ]
+
+    def __str__(self):
+        return f"Archived survey on {self.farm.name} ({self.start_time.strftime('%Y-%m-%d')})"
+
+    def observation_rows(self):
+        """The archived observations as dicts."""
+        keys = ('plant_sequence_number', 'observation_time', 'status', 'notes', 'pest_ids', 'disease_ids', 'recorded_by')
+        return [dict(zip(keys, row)) for row in self.observations]
+
+    def participant_rows(self):
+        """The archived participants as dicts."""
+        keys = ('user_id', 'joined_at', 'target_share', 'sequence_start', 'sequence_end', 'observations_recorded')
+        return [dict(zip(keys, row)) for row in self.participants]
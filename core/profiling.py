@@ -0,0 +1,144 @@
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import re
+import uuid
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+_PROFILE_ID = re.compile(r'^[0-9]{8}T[0-9]{6}-[0-9a-f]{8}$')
+
+
+def profiling_enabled() -> bool:
+    return getattr(settings, 'PROFILING_ENABLED', False)
+
+
+def get_profile_dir() -> Path:
+    return Path(getattr(settings, 'PROFILE_DIR', Path(settings.BASE_DIR) / 'profiles'))
+
+
+def can_use_profiles(user) -> bool:
+    """Profiles expose code paths and SQL, so only superusers may capture or read them."""
+    return bool(user and user.is_authenticated and user.is_superuser)
+
+
+def should_profile(request) -> bool:
+    """A request is profiled only when a superuser asks for it via header or query flag."""
+    if not profiling_enabled():
+        return False
+    if not can_use_profiles(getattr(request, 'user', None)):
+        return False
+    return request.headers.get('X-Profile') == '1' or request.GET.get('_profile') == '1'
+
+
+def start_profiler() -> Optional[cProfile.Profile]:
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError as e:
+        # Only one profiler can be active at a time; skip rather than fail the request.
+        logger.warning(f"Could not start request profiler: {e}")
+        return None
+    return profiler
+
+
+def save_profile(request, response, profiler: cProfile.Profile, duration: float, queries: List[Dict[str, Any]]) -> Optional[str]:
+    """Writes the pstats dump and a JSON sidecar (request info + SQL log). Returns the profile id."""
+    profile_dir = get_profile_dir()
+    now = timezone.now()
+    profile_id = f"{now:%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+    match = request.resolver_match
+    meta = {
+        'id': profile_id,
+        'created': now.isoformat(),
+        'method': request.method,
+        'path': request.get_full_path(),
+        'view': match.view_name if match else None,
+        'user': request.user.get_username(),
+        'status': response.status_code,
+        'duration_ms': round(duration * 1000, 2),
+        'query_count': len(queries),
+        'query_time_ms': round(sum(q['time_ms'] for q in queries), 2),
+        'queries': queries,
+    }
+    try:
+        profile_dir.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(profile_dir / f"{profile_id}.prof")
+        with open(profile_dir / f"{profile_id}.json", 'w') as f:
+            json.dump(meta, f)
+    except OSError as e:
+        logger.error(f"Could not save request profile to {profile_dir}: {e}")
+        return None
+    _prune(profile_dir)
+    logger.info(f"Saved request profile {profile_id} for {meta['path']} ({meta['duration_ms']} ms)")
+    return profile_id
+
+
+def _prune(profile_dir: Path) -> None:
+    keep = getattr(settings, 'PROFILE_KEEP', 50)
+    metas = sorted(profile_dir.glob('*.json'), reverse=True)
+    for stale in metas[keep:]:
+        for path in (stale, stale.with_suffix('.prof')):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def list_profiles(limit: int = 50) -> List[Dict[str, Any]]:
+    """Most recent profiles first, without their SQL logs."""
+    profile_dir = get_profile_dir()
+    if not profile_dir.is_dir():
+        return []
+    profiles = []
+    for path in sorted(profile_dir.glob('*.json'), reverse=True)[:limit]:
+        try:
+            with open(path) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            continue
+        meta.pop('queries', None)
+        profiles.append(meta)
+    return profiles
+
+
+def load_profile(profile_id: str, top: int = 30) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Returns (profile, error) where profile is the stored metadata plus the top
+    functions by cumulative time and the raw pstats report.
+    """
+    if not _PROFILE_ID.match(profile_id):
+        return None, "Invalid profile id."
+    profile_dir = get_profile_dir()
+    report = io.StringIO()
+    try:
+        with open(profile_dir / f"{profile_id}.json") as f:
+            meta = json.load(f)
+        stats = pstats.Stats(str(profile_dir / f"{profile_id}.prof"), stream=report)
+    except (OSError, ValueError) as e:
+        return None, f"Profile {profile_id} could not be loaded: {e}"
+
+    stats.sort_stats('cumulative')
+    functions = []
+    for func in stats.fcn_list[:top]:
+        primitive_calls, total_calls, total_time, cumulative_time, _ = stats.stats[func]
+        filename, line, name = func
+        functions.append({
+            'function': name,
+            'location': f"{filename}:{line}",
+            'calls': total_calls,
+            'total_ms': round(total_time * 1000, 2),
+            'cumulative_ms': round(cumulative_time * 1000, 2),
+        })
+    stats.print_stats(top)
+    meta['functions'] = functions
+    meta['report'] = report.getvalue()
+    return meta, None
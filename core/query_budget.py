@@ -0,0 +1,128 @@
+import logging
+import re
+import time
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, Any, Optional, List
+
+from django.conf import settings
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUERY_BUDGET = {
+    'max_queries': 50,
+    'max_time_ms': 500,
+    'max_repeats': 10,
+}
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(sql: str) -> str:
+    """
+    Normalises SQL to its shape: literals and placeholders become '?', IN
+    lists of any length collapse to '(...)'. Queries that differ only in
+    their parameters share a fingerprint. The ORM sends the same SQL string
+    for the same query shape, so the result is cached.
+    """
+    shape = _STRING_LITERAL.sub('?', sql)
+    shape = _NUMBER.sub('?', shape)
+    shape = shape.replace('%s', '?')
+    shape = _PLACEHOLDER_LIST.sub('(...)', shape)
+    return _WHITESPACE.sub(' ', shape).strip()
+
+
+def query_budget(max_queries: Optional[int] = None, max_time_ms: Optional[float] = None, max_repeats: Optional[int] = None):
+    """
+    Declares a per-view query budget for QueryBudgetMiddleware. Limits left
+    as None fall back to settings.QUERY_BUDGET_DEFAULT.
+    """
+    def decorator(view_func):
+        view_func.query_budget = {
+            key: value for key, value in (
+                ('max_queries', max_queries), ('max_time_ms', max_time_ms), ('max_repeats', max_repeats)
+            ) if value is not None
+        }
+        return view_func
+    return decorator
+
+
+def get_budget(view_func=None) -> Dict[str, Any]:
+    budget = dict(getattr(settings, 'QUERY_BUDGET_DEFAULT', DEFAULT_QUERY_BUDGET))
+    budget.update(getattr(view_func, 'query_budget', {}) if view_func else {})
+    return budget
+
+
+class QueryRecorder:
+    """
+    execute_wrapper that counts, times and fingerprints every query on a
+    connection. Only the per-shape counts are kept, unless keep_log asks for
+    the SQL of each query (profiling, DEBUG, sampled requests).
+    """
+
+    def __init__(self, keep_log: bool = False):
+        self.count = 0
+        self.total_time = 0.0
+        self.shapes = Counter()
+        self.keep_log = keep_log
+        self.log: List[Dict[str, Any]] = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.count += 1
+            self.total_time += duration
+            self.shapes[fingerprint(sql)] += 1
+            if self.keep_log:
+                self.log.append({
+                    'sql': sql,
+                    'time_ms': round(duration * 1000, 3),
+                    'alias': context['connection'].alias,
+                })
+
+    @property
+    def total_time_ms(self) -> float:
+        return self.total_time * 1000
+
+    def violations(self, budget: Dict[str, Any]) -> List[str]:
+        problems = []
+        if budget.get('max_queries') is not None and self.count > budget['max_queries']:
+            problems.append(f"{self.count} queries (budget {budget['max_queries']})")
+        if budget.get('max_time_ms') is not None and self.total_time_ms > budget['max_time_ms']:
+            problems.append(f"{self.total_time_ms:.1f} ms in DB (budget {budget['max_time_ms']} ms)")
+        if budget.get('max_repeats') is not None:
+            for shape, repeats in self.shapes.most_common():
+                if repeats <= budget['max_repeats']:
+                    break
+                problems.append(f"N+1: {repeats}x {shape[:200]}")
+        return problems
+
+
+def report_violations(view_name: str, path: str, recorder: QueryRecorder, problems: List[str]) -> None:
+    """
+    Counts the overrun in the query_budget_violations_total metric.
+    Development and tests also get a readable warning, with the slowest
+    query when the request kept its SQL.
+    """
+    metrics.inc('query_budget_violations_total', {'view': view_name})
+    if settings.DEBUG or getattr(settings, 'QUERY_BUDGET_VERBOSE', False):
+        if recorder.log:
+            slowest = max(recorder.log, key=lambda query: query['time_ms'])
+            problems = problems + [f"slowest {slowest['time_ms']} ms: {slowest['sql'][:200]}"]
+        logger.warning(
+            f"Query budget exceeded for {view_name} ({path}): " + '; '.join(problems)
+        )
+    else:
+        logger.debug(
+            f"Query budget exceeded for {view_name}: {recorder.count} queries, "
+            f"{recorder.total_time_ms:.1f} ms in DB"
+        )
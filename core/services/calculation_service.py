@@ -3,9 +3,13 @@ from django.utils import timezone
 from ..models import SurveillanceCalculation, Farm
 from django.contrib.auth.models import User
 from decimal import Decimal
+from ..tracing import traced
 
 logger = logging.getLogger(__name__)
 
+@traced('calculation.save', lambda calculation_result, farm, user, *args, **kwargs: {
+    'farm.id': farm.id, 'user.id': user.id,
+})
 def save_calculation_to_database(calculation_result: dict, farm: Farm, user: User) -> SurveillanceCalculation | None:
     """
     Saves a calculation result to the database.
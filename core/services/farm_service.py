@@ -4,6 +4,7 @@ from typing import Dict, Any, Optional, List, Tuple
 from django.contrib.auth.models import User
 from ..models import Farm, Grower, PlantType, SurveySession
 from .geoscape_service import fetch_cadastral_boundary
+from ..tracing import traced
 
 logger = logging.getLogger(__name__)
 
@@ -44,13 +45,16 @@ def get_user_farms(user: User) -> List[Farm]:
         return []
 
 
-def get_farm_details(farm_id: int, user: User) -> Tuple[Optional[Farm], Optional[str]]:
+@traced('farm.get_details', lambda farm_id, *args, **kwargs: {'farm.id': farm_id})
+def get_farm_details(farm_id: int, user: User, defer_boundary: bool = False) -> Tuple[Optional[Farm], Optional[str]]:
     """
     Retrieves a farm by ID with access control check.
+    Pass defer_boundary=True when only the encoded rendering boundary is needed.
     """
     try:
         grower = user.grower_profile
-        farm = Farm.objects.get(id=farm_id, owner=grower)
+        farms = Farm.objects.defer('boundary') if defer_boundary else Farm.objects
+        farm = farms.get(id=farm_id, owner=grower)
         return farm, None
     except Farm.DoesNotExist:
         logger.warning(f"Farm with id {farm_id} not found or not owned by user {user.username}.")
@@ -63,6 +67,7 @@ def get_farm_details(farm_id: int, user: User) -> Tuple[Optional[Farm], Optional
         return None, f"An unexpected error occurred: {e}"
 
 
+@traced('farm.create', lambda farm_data, user, *args, **kwargs: {'user.id': user.id})
 def create_farm(farm_data: Dict[str, Any], user: User) -> Tuple[Optional[Farm], Optional[str]]:
     """
     Creates a new farm for a user.
@@ -1,9 +1,13 @@
 # core/services/geoscape_service.py
 import requests
 import logging
+import time
 from django.conf import settings
 from typing import Dict, Any, Optional, List
 
+from .. import metrics
+from ..tracing import traced
+
 logger = logging.getLogger(__name__)
 
 # API URLs
@@ -24,6 +28,29 @@ def get_api_key() -> Optional[str]:
     return api_key
 
 
+def _geoscape_get(endpoint: str, url: str, **kwargs) -> requests.Response:
+    """
+    requests.get wrapper that records call count, latency and outcome
+    (HTTP status code or error type) for the metrics endpoint.
+    """
+    started = time.perf_counter()
+    outcome = 'error'
+    try:
+        response = requests.get(url, **kwargs)
+        outcome = str(response.status_code)
+        return response
+    except requests.exceptions.Timeout:
+        outcome = 'timeout'
+        raise
+    except requests.exceptions.ConnectionError:
+        outcome = 'connection_error'
+        raise
+    finally:
+        metrics.observe('geoscape_request_duration_seconds', time.perf_counter() - started, {'endpoint': endpoint})
+        metrics.inc('geoscape_requests_total', {'endpoint': endpoint, 'outcome': outcome})
+
+
+@traced('geoscape.fetch_cadastral_boundary', lambda address_id, *args, **kwargs: {'geoscape.address_id': address_id})
 def fetch_cadastral_boundary(address_id: str) -> Optional[Dict[str, Any]]:
     """
     Fetches the cadastral boundary geometry JSON for a given Geoscape address ID.
@@ -51,7 +78,8 @@ def fetch_cadastral_boundary(address_id: str) -> Optional[Dict[str, Any]]:
     
     try:
         logger.info(f"Fetching cadastral boundary for addressId: {address_id}")
-        response = requests.get(
+        response = _geoscape_get(
+            'cadastre',
             GEOSCAPE_CADASTRE_URL, 
             headers=headers, 
             params=params, 
@@ -116,7 +144,8 @@ def search_addresses(query: str, state_territory: str) -> List[Dict[str, Any]]:
     
     try:
         logger.info(f"Searching addresses: '{query}' in {state_territory}")
-        response = requests.get(
+        response = _geoscape_get(
+            'address_search',
             GEOSCAPE_ADDRESS_SEARCH_URL, 
             headers=headers, 
             params=params, 
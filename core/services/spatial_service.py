@@ -0,0 +1,155 @@
+import logging
+import math
+from typing import Dict, Any, Optional, List, Tuple
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.models import Q, QuerySet
+
+from ..models import Farm
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 111.32
+MAX_RADIUS_KM = 500
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance between two points in kilometres."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _search_box(lat: float, lng: float, radius_km: float) -> Tuple[float, float, float, float]:
+    """Lat/lng box (min_lat, min_lng, max_lat, max_lng) that contains the search circle."""
+    d_lat = radius_km / KM_PER_DEGREE_LAT
+    cos_lat = max(math.cos(math.radians(lat)), 0.01)
+    d_lng = radius_km / (KM_PER_DEGREE_LAT * cos_lat)
+    return lat - d_lat, lng - d_lng, lat + d_lat, lng + d_lng
+
+
+def _valid_point(lat: float, lng: float) -> bool:
+    """True for a finite latitude/longitude pair within the usual ranges."""
+    return math.isfinite(lat) and math.isfinite(lng) and -90 <= lat <= 90 and -180 <= lng <= 180
+
+
+def _visible_farms(user: Optional[User]) -> QuerySet:
+    """Staff (biosecurity officers) can query every farm; growers only their own."""
+    farms = Farm.objects.filter(centroid_lat__isnull=False)
+    if user is not None and not user.is_staff:
+        farms = farms.filter(owner__user=user)
+    return farms
+
+
+def _bbox_filter(farms: QuerySet, min_lat: float, min_lng: float, max_lat: float, max_lng: float) -> QuerySet:
+    """
+    Overlap test on the indexed bbox columns; the caller refines the candidates.
+    For parcels spanning at most FARM_MAX_EXTENT_DEGREES, bbox_min_* is also
+    bounded from below, turning the test into a narrow two-sided index range
+    instead of a scan over every farm south/west of the search box. The few
+    wider parcels are picked up through the bbox_extent_degrees index.
+    """
+    max_extent = getattr(settings, 'FARM_MAX_EXTENT_DEGREES', 0.5)
+    narrow = Q(bbox_min_lat__gte=min_lat - max_extent, bbox_min_lng__gte=min_lng - max_extent)
+    oversize = Q(bbox_extent_degrees__gt=max_extent)
+    return farms.filter(
+        narrow | oversize,
+        bbox_min_lat__lte=max_lat,
+        bbox_max_lat__gte=min_lat,
+        bbox_min_lng__lte=max_lng,
+        bbox_max_lng__gte=min_lng,
+    )
+
+
+def _distance_to_bbox_km(lat: float, lng: float, farm: Farm) -> float:
+    """Distance from a point to the nearest edge of a farm's bbox (0 when inside it)."""
+    nearest_lat = min(max(lat, farm.bbox_min_lat), farm.bbox_max_lat)
+    nearest_lng = min(max(lng, farm.bbox_min_lng), farm.bbox_max_lng)
+    return haversine_km(lat, lng, nearest_lat, nearest_lng)
+
+
+def _farm_result(farm: Farm, distance_km: Optional[float] = None) -> Dict[str, Any]:
+    result = {
+        'id': farm.id,
+        'name': farm.name,
+        'region': farm.region.name if farm.region else None,
+        'centroid': [farm.centroid_lat, farm.centroid_lng],
+        'bbox': farm.bounding_box(),
+        'boundary_area_hectares': farm.boundary_area_hectares,
+    }
+    if distance_km is not None:
+        result['distance_km'] = round(distance_km, 3)
+    return result
+
+
+def find_farms_within_radius(
+    lat: float,
+    lng: float,
+    radius_km: float,
+    user: Optional[User] = None,
+    exclude_farm_id: Optional[int] = None
+) -> Tuple[Optional[List[Dict[str, Any]]], Optional[str]]:
+    """
+    Finds farms whose boundary bbox comes within radius_km of a point, nearest first.
+    Candidates come from an indexed bbox-overlap query and are refined by
+    great-circle distance to each farm's bbox, so large parcels whose centroid
+    lies outside the radius are still reported.
+    """
+    if not _valid_point(lat, lng):
+        return None, "Latitude/longitude out of range."
+    if not math.isfinite(radius_km) or radius_km <= 0 or radius_km > MAX_RADIUS_KM:
+        return None, f"Radius must be between 0 and {MAX_RADIUS_KM} km."
+
+    try:
+        candidates = _bbox_filter(_visible_farms(user), *_search_box(lat, lng, radius_km))
+        if exclude_farm_id is not None:
+            candidates = candidates.exclude(id=exclude_farm_id)
+        candidates = candidates.select_related('region').only(
+            'id', 'name', 'region__name', 'centroid_lat', 'centroid_lng', 'boundary_area_hectares',
+            'bbox_min_lat', 'bbox_min_lng', 'bbox_max_lat', 'bbox_max_lng',
+        )
+
+        matches = []
+        for farm in candidates:
+            distance = _distance_to_bbox_km(lat, lng, farm)
+            if distance <= radius_km:
+                matches.append((distance, farm))
+        matches.sort(key=lambda match: (match[0], match[1].name))
+
+        logger.info(f"Radius query ({lat}, {lng}, {radius_km} km) matched {len(matches)} farms")
+        return [_farm_result(farm, distance) for distance, farm in matches], None
+    except Exception as e:
+        logger.exception(f"Error running radius query ({lat}, {lng}, {radius_km} km): {e}")
+        return None, f"An unexpected error occurred: {e}"
+
+
+def find_farms_in_bbox(
+    min_lat: float,
+    min_lng: float,
+    max_lat: float,
+    max_lng: float,
+    user: Optional[User] = None,
+    limit: Optional[int] = None
+) -> Tuple[Optional[List[Dict[str, Any]]], Optional[str]]:
+    """
+    Finds farms whose boundary bbox overlaps the given box, at most limit
+    (default: settings.FARM_BBOX_QUERY_LIMIT) of them, by name.
+    """
+    if not (_valid_point(min_lat, min_lng) and _valid_point(max_lat, max_lng)):
+        return None, "Latitude/longitude out of range."
+    if min_lat > max_lat or min_lng > max_lng:
+        return None, "Bounding box minimums must not exceed maximums."
+    if limit is None:
+        limit = getattr(settings, 'FARM_BBOX_QUERY_LIMIT', 500)
+
+    try:
+        farms = _bbox_filter(_visible_farms(user), min_lat, min_lng, max_lat, max_lng)
+        farms = farms.select_related('region').order_by('name')[:limit]
+        return [_farm_result(farm) for farm in farms], None
+    except Exception as e:
+        logger.exception(f"Error running bbox query: {e}")
+        return None, f"An unexpected error occurred: {e}"
@@ -2,72 +2,213 @@
 
 import logging
 from typing import Dict, Any, Optional, List, Tuple
+from django.db import IntegrityError
+from django.conf import settings
+from django.db.models import Count, Prefetch
 from django.utils import timezone
 
-from ..models import Farm, PlantPart, Pest, Disease, SurveySession, Observation
+from ..db_tuning import write_transaction
+from ..models import Farm, Pest, Disease, SurveySession, SessionParticipant, Observation
 from ..season_utils import get_seasonal_stage_info
+from ..taxonomy import get_taxonomy
+from ..write_queue import WriteTimeout, run_write
+from .. import metrics
+from ..tracing import traced
 
 logger = logging.getLogger(__name__)
 
 
+@traced('surveillance.create_observation', lambda participant, *args, **kwargs: {
+    'session.id': str(participant.session.session_id), 'farm.id': participant.session.farm_id,
+})
 def create_observation(
-    session: SurveySession,
+    participant: SessionParticipant,
     data: Dict[str, Any]
 ) -> Tuple[Optional[Observation], Optional[str]]:
-    """Creates a new completed observation within a survey session."""
+    """
+    Creates a new completed observation recorded by a session participant.
+    With SERIALIZE_DB_WRITES on, the write is group-committed by the writer thread.
+    """
     try:
-        # Check if we're exceeding the target
-        current_count = session.observation_count()
-        target_plants = session.target_plants_surveyed
-        
-        if target_plants and current_count >= target_plants:
-            return None, f"Cannot add observation. Target of {target_plants} plants already reached."
-        
-        observation = Observation(
-            session=session,
-            observation_time=timezone.now(),
-            status='completed'
-        )
+        observation, error = run_write(_create_observation, participant, data)
+        if observation:
+            metrics.inc('observations_ingested_total')
+        return observation, error
+    except WriteTimeout as e:
+        logger.warning(f"Observation for session {participant.session.session_id} not saved: {e}")
+        return None, "The server is busy and the observation was not saved. Please try again."
+    except Exception as e:
+        logger.exception(f"Error creating observation for session {participant.session.session_id}: {e}")
+        return None, f"An unexpected error occurred while creating observation: {e}"
 
-        # Handle notes
-        if 'notes' in data:
-            observation.notes = data['notes']
-        
-        # Handle plant sequence number - ensure it's always set properly
-        plant_sequence_number = data.get('plant_sequence_number')
-        if plant_sequence_number and plant_sequence_number > 0:
-            # Check if this sequence number is already used in this session
-            existing_obs = Observation.objects.filter(
-                session=session, 
-                plant_sequence_number=plant_sequence_number
-            ).first()
-            if existing_obs:
-                return None, f"Plant sequence number {plant_sequence_number} has already been used in this session."
-            observation.plant_sequence_number = plant_sequence_number
-        else:
-            # Auto-generate the next sequence number
-            last_obs = Observation.objects.filter(session=session).order_by('-plant_sequence_number').first()
-            observation.plant_sequence_number = (last_obs.plant_sequence_number + 1) if last_obs and last_obs.plant_sequence_number is not None else 1
-
-        observation.save()
-
-        # Set many-to-many relationships
-        pest_ids = data.get('pests_observed', [])
-        if pest_ids:
-            observation.pests_observed.set(pest_ids)
-
-        disease_ids = data.get('diseases_observed', [])
-        if disease_ids:
-            observation.diseases_observed.set(disease_ids)
+
+def _create_observation(
+    participant: SessionParticipant,
+    data: Dict[str, Any]
+) -> Tuple[Optional[Observation], Optional[str]]:
+    session = participant.session
+    try:
+        with write_transaction():
+            # Lock only this participant's row: its share check, its sequence block and
+            # its counters must agree when two of its devices record at once, while
+            # other participants record in parallel
+            locked = SessionParticipant.objects.select_for_update().get(pk=participant.pk)
+            # Read after taking the lock, so a session finished meanwhile is seen
+            # (_finish_survey_session locks the participants before completing)
+            status = SurveySession.objects.filter(pk=session.pk).values_list('status', flat=True).get()
+            if status != 'in_progress':
+                return None, "This survey session is no longer active."
+
+            # Check if we're exceeding this participant's share of the target
+            if locked.share_reached():
+                return None, f"Cannot add observation. Your share of {locked.target_share} plants is already surveyed."
+            
+            observation = Observation(
+                session=session,
+                participant=locked,
+                observation_time=timezone.now(),
+                status='completed'
+            )
+
+            # Handle notes
+            if 'notes' in data:
+                observation.notes = data['notes']
+            
+            # Handle plant sequence number - ensure it's always set properly
+            plant_sequence_number = data.get('plant_sequence_number')
+            if plant_sequence_number and plant_sequence_number > 0:
+                # Only numbers from the participant's own block: the rest of the
+                # session's numbers belong to other participants' blocks
+                if not locked.sequence_start <= plant_sequence_number <= locked.sequence_end:
+                    return None, (
+                        f"Plant sequence number {plant_sequence_number} is outside your current range "
+                        f"({locked.sequence_start}-{locked.sequence_end})."
+                    )
+                # Check if this sequence number is already used in this session
+                if Observation.objects.filter(session=session, plant_sequence_number=plant_sequence_number).exists():
+                    return None, f"Plant sequence number {plant_sequence_number} has already been used in this session."
+                observation.plant_sequence_number = plant_sequence_number
+            else:
+                # Next number of the participant's own block; no session-wide lookup
+                if locked.next_sequence_number() is None:
+                    locked.sequence_start, locked.sequence_end = session.allocate_sequence_block()
+                observation.plant_sequence_number = locked.next_sequence_number()
+
+            observation.save()
+
+            # Set many-to-many relationships
+            pest_ids = data.get('pests_observed', [])
+            if pest_ids:
+                observation.pests_observed.set(pest_ids)
+
+            disease_ids = data.get('diseases_observed', [])
+            if disease_ids:
+                observation.diseases_observed.set(disease_ids)
+
+            locked.record_observation(observation.plant_sequence_number, pest_ids, disease_ids)
+            if locked.next_sequence_number() is None:
+                # Block used up: reserve the next one now, so the next plant number is known
+                locked.sequence_start, locked.sequence_end = session.allocate_sequence_block()
+            locked.save(update_fields=SessionParticipant.PROGRESS_FIELDS + ['sequence_start', 'sequence_end'])
         
-        logger.info(f"Observation {observation.id} created for session {session.session_id}, plant #{observation.plant_sequence_number}")
+        # Hand the new counters and block back to the caller's instance
+        for field in SessionParticipant.PROGRESS_FIELDS + ['sequence_start', 'sequence_end']:
+            setattr(participant, field, getattr(locked, field))
+
+        logger.info(f"Observation {observation.id} created for session {session.session_id} by {participant.user_id}, plant #{observation.plant_sequence_number}")
         return observation, None
 
+    except IntegrityError as e:
+        # unique_session_plant_sequence: a number recorded outside this participant's block
+        logger.warning(f"Duplicate plant sequence number in session {session.session_id}: {e}")
+        return None, "This plant sequence number has already been used in this session."
     except Exception as e:
         logger.exception(f"Error creating observation for session {session.session_id}: {e}")
         return None, f"An unexpected error occurred while creating observation: {e}"
 
 
+def join_survey_session(session: SurveySession, user) -> Tuple[Optional[SessionParticipant], Optional[str]]:
+    """
+    Adds a user to an in-progress session (or returns their existing
+    participation). Goes through the writer thread when SERIALIZE_DB_WRITES is on.
+    """
+    try:
+        return run_write(_join_survey_session, session, user)
+    except Exception as e:
+        logger.exception(f"Error joining survey session {session.session_id}: {e}")
+        return None, f"An unexpected error occurred while joining the session: {e}"
+
+
+def _join_survey_session(session: SurveySession, user) -> Tuple[Optional[SessionParticipant], Optional[str]]:
+    with write_transaction():
+        # Participants before the session row, the same lock order as _create_observation
+        participants = list(session.participants.select_for_update().order_by('id'))
+        existing = next((p for p in participants if p.user_id == user.pk), None)
+        if existing:
+            return existing, None
+        if not SurveySession.objects.filter(pk=session.pk, status='in_progress').exists():
+            return None, "This survey session is no longer active."
+        first, last = session.allocate_sequence_block()
+        participant = SessionParticipant.objects.create(
+            session=session, user=user, sequence_start=first, sequence_end=last
+        )
+        # The new participant takes an even part of the plants still to survey
+        for balanced in session.rebalance_target_shares():
+            if balanced.pk == participant.pk:
+                participant.target_share = balanced.target_share
+    logger.info(f"User {user.pk} joined session {session.session_id}: plants {first}-{last}, share {participant.target_share}")
+    return participant, None
+
+
+def finish_survey_session(session: SurveySession) -> Tuple[bool, Optional[str]]:
+    """Marks a session completed now. Goes through the writer thread when SERIALIZE_DB_WRITES is on."""
+    try:
+        run_write(_finish_survey_session, session)
+        return True, None
+    except Exception as e:
+        logger.exception(f"Error completing survey session {session.session_id}: {e}")
+        return False, f"An unexpected error occurred while completing the session: {e}"
+
+
+def _finish_survey_session(session: SurveySession) -> SurveySession:
+    with write_transaction():
+        # Locking the participants keeps observations from landing between the
+        # snapshot and the status change (_create_observation locks its participant)
+        list(session.participants.select_for_update().order_by('id'))
+        locked = SurveySession.objects.select_for_update().get(pk=session.pk)
+        locked.status = 'completed'
+        locked.end_time = timezone.now()
+        locked.completion_snapshot = locked.build_completion_snapshot()
+        locked.save(update_fields=['status', 'end_time', 'completion_snapshot'])
+    session.status = locked.status
+    session.end_time = locked.end_time
+    session.completion_snapshot = locked.completion_snapshot
+    return session
+
+
+def get_observation_page(
+    session: SurveySession, before: Optional[int] = None, limit: Optional[int] = None
+) -> Tuple[List[Observation], Optional[int]]:
+    """
+    The newest `limit` completed observations of a session (older than the
+    observation id `before`, if given) with their pest and disease names
+    prefetched, and the cursor for the next (older) page, or None on the last
+    page. Three queries whatever the session's length.
+    """
+    limit = limit or settings.SESSION_OBSERVATION_PAGE_SIZE
+    observations = Observation.objects.filter(session=session, status='completed')
+    if before is not None:
+        observations = observations.filter(id__lt=before)
+    page = list(observations.order_by('-id').prefetch_related(
+        Prefetch('pests_observed', queryset=Pest.objects.only('id', 'name').order_by('name')),
+        Prefetch('diseases_observed', queryset=Disease.objects.only('id', 'name').order_by('name')),
+    )[:limit + 1])
+    if len(page) > limit:
+        return page[:limit], page[limit - 1].id
+    return page, None
+
+
+@traced('surveillance.get_recommendations', lambda farm, *args, **kwargs: {'farm.id': farm.id})
 def get_surveillance_recommendations(farm: Farm) -> Dict[str, Any]:
     """Gets surveillance recommendations for a farm based on the current seasonal stage."""
     seasonal_data = get_seasonal_stage_info() 
@@ -75,15 +216,18 @@ def get_surveillance_recommendations(farm: Farm) -> Dict[str, Any]:
     stage_name = seasonal_data.get('stage_name', 'Unknown')
     month_used = seasonal_data.get('month_used')
     
-    priority_pests = Pest.objects.filter(name__in=seasonal_data.get('pest_names', [])).order_by('name')
-    priority_diseases = Disease.objects.filter(name__in=seasonal_data.get('disease_names', [])).order_by('name')
-    recommended_parts = PlantPart.objects.filter(name__in=seasonal_data.get('part_names', [])).order_by('name')
+    # Read-only records from the taxonomy snapshot, already ordered by name
+    taxonomy = get_taxonomy()
+    stage = taxonomy.stages.get(seasonal_data.get('stage_id'))
+    priority_pests = taxonomy.pests_for(stage.pest_ids) if stage else []
+    priority_diseases = taxonomy.diseases_for(stage.disease_ids) if stage else []
+    recommended_parts = taxonomy.parts_for(stage.plant_part_ids) if stage else []
 
     last_date = farm.last_surveillance_date()
     next_due = farm.next_due_date()
     current_farm_season = farm.current_season() 
 
-    logger.info(f"Recommendations for farm {farm.id}: Stage='{stage_name}', MonthUsed={month_used}, Pests={priority_pests.count()}, Diseases={priority_diseases.count()}, Parts={recommended_parts.count()}")
+    logger.info(f"Recommendations for farm {farm.id}: Stage='{stage_name}', MonthUsed={month_used}, Pests={len(priority_pests)}, Diseases={len(priority_diseases)}, Parts={len(recommended_parts)}")
 
     return {
         'season': current_farm_season, 
@@ -114,7 +258,6 @@ def get_surveillance_stats(farm: Farm) -> Dict[str, Any]:
         end_time__gte=thirty_days_ago
     ).count()
 
-    from django.db.models import Count
     common_pests = Pest.objects.filter(
         observations__session__farm=farm,
         observations__status='completed'
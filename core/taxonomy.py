@@ -0,0 +1,297 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, astuple
+from decimal import Decimal
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+
+# Immutable, slotted records. Adjacency is stored as tuples of ids, ordered by name.
+
+@dataclass(frozen=True, slots=True)
+class PlantTypeRecord:
+    id: int
+    name: str
+    description: str
+
+    def __str__(self):
+        return self.name
+
+
+@dataclass(frozen=True, slots=True)
+class PlantPartRecord:
+    id: int
+    name: str
+    description: str
+    pest_ids: Tuple[int, ...]
+    disease_ids: Tuple[int, ...]
+
+    def __str__(self):
+        return self.name
+
+
+@dataclass(frozen=True, slots=True)
+class PestRecord:
+    id: int
+    name: str
+    description: str
+    plant_type_ids: Tuple[int, ...]
+    plant_part_ids: Tuple[int, ...]
+    stage_ids: Tuple[int, ...]
+
+    def __str__(self):
+        return self.name
+
+
+@dataclass(frozen=True, slots=True)
+class DiseaseRecord:
+    id: int
+    name: str
+    description: str
+    plant_type_ids: Tuple[int, ...]
+    plant_part_ids: Tuple[int, ...]
+    stage_ids: Tuple[int, ...]
+
+    def __str__(self):
+        return self.name
+
+
+@dataclass(frozen=True, slots=True)
+class SeasonalStageRecord:
+    id: int
+    name: str
+    months: Tuple[int, ...]
+    prevalence_p: Decimal
+    pest_ids: Tuple[int, ...]
+    disease_ids: Tuple[int, ...]
+    # Parts affected by any of the stage's pests or diseases
+    plant_part_ids: Tuple[int, ...]
+
+    def __str__(self):
+        return self.name
+
+
+class TaxonomySnapshot:
+    """
+    Read-only, in-memory copy of the pest/disease taxonomy (plant types, plant
+    parts, pests, diseases and seasonal stages). Lookups never touch the
+    database. `version` is a hash of the content, so it is identical in every
+    process that loaded the same data.
+    """
+
+    __slots__ = (
+        'version', 'loaded_at', 'modified', 'plant_types', 'plant_parts', 'pests', 'diseases', 'stages',
+        '_pests_by_name', '_diseases_by_name', '_parts_by_name',
+    )
+
+    def __init__(self, plant_types, plant_parts, pests, diseases, stages, modified=0.0):
+        self.plant_types: Dict[int, PlantTypeRecord] = plant_types
+        self.plant_parts: Dict[int, PlantPartRecord] = plant_parts
+        self.pests: Dict[int, PestRecord] = pests
+        self.diseases: Dict[int, DiseaseRecord] = diseases
+        self.stages: Dict[int, SeasonalStageRecord] = stages
+        self._pests_by_name = {p.name.lower(): p for p in pests.values()}
+        self._diseases_by_name = {d.name.lower(): d for d in diseases.values()}
+        self._parts_by_name = {p.name.lower(): p for p in plant_parts.values()}
+        digest = hashlib.sha1()
+        for records in (plant_types, plant_parts, pests, diseases, stages):
+            for record in records.values():
+                digest.update(repr(astuple(record)).encode())
+        self.version = digest.hexdigest()[:12]
+        self.loaded_at = time.time()
+        # Time of the last taxonomy change (the stamp file's mtime), 0 if unknown
+        self.modified = modified
+
+    def pests_sorted(self):
+        return sorted(self.pests.values(), key=lambda p: p.name)
+
+    def diseases_sorted(self):
+        return sorted(self.diseases.values(), key=lambda d: d.name)
+
+    def pest_choices(self):
+        return [(p.id, p.name) for p in self.pests_sorted()]
+
+    def disease_choices(self):
+        return [(d.id, d.name) for d in self.diseases_sorted()]
+
+    def stage_for_month(self, month: int) -> Optional[SeasonalStageRecord]:
+        """The first stage (by id) whose months include `month`."""
+        for stage_id in sorted(self.stages):
+            if month in self.stages[stage_id].months:
+                return self.stages[stage_id]
+        return None
+
+    def find(self, name: str):
+        """Looks a pest or disease up by (case-insensitive) name."""
+        key = name.lower()
+        return self._pests_by_name.get(key) or self._diseases_by_name.get(key)
+
+    def pests_for(self, ids):
+        return [self.pests[i] for i in ids if i in self.pests]
+
+    def diseases_for(self, ids):
+        return [self.diseases[i] for i in ids if i in self.diseases]
+
+    def parts_for(self, ids):
+        return [self.plant_parts[i] for i in ids if i in self.plant_parts]
+
+    def stages_for(self, ids):
+        return [self.stages[i] for i in ids if i in self.stages]
+
+
+def _parse_months(months: str) -> Tuple[int, ...]:
+    return tuple(int(m) for m in months.replace(' ', '').split(',') if m.isdigit())
+
+
+def load_snapshot(modified: float = 0.0) -> TaxonomySnapshot:
+    """Builds a snapshot from the database: one query per table and per M2M table."""
+    from .models import PlantType, PlantPart, Pest, Disease, SeasonalStage
+
+    def pairs(through, left, right):
+        adjacency = {}
+        for a, b in through.objects.values_list(left, right):
+            adjacency.setdefault(a, []).append(b)
+        return adjacency
+
+    part_names = dict(PlantPart.objects.values_list('id', 'name'))
+    pest_names = dict(Pest.objects.values_list('id', 'name'))
+    disease_names = dict(Disease.objects.values_list('id', 'name'))
+
+    def by_name(ids, names):
+        return tuple(sorted(ids, key=lambda i: names.get(i, '')))
+
+    pest_types = pairs(Pest.affects_plant_types.through, 'pest_id', 'planttype_id')
+    pest_parts = pairs(Pest.affects_plant_parts.through, 'pest_id', 'plantpart_id')
+    disease_types = pairs(Disease.affects_plant_types.through, 'disease_id', 'planttype_id')
+    disease_parts = pairs(Disease.affects_plant_parts.through, 'disease_id', 'plantpart_id')
+    stage_pests = pairs(SeasonalStage.active_pests.through, 'seasonalstage_id', 'pest_id')
+    stage_diseases = pairs(SeasonalStage.active_diseases.through, 'seasonalstage_id', 'disease_id')
+
+    pest_stages, disease_stages = {}, {}
+    for stage_id, ids in stage_pests.items():
+        for pest_id in ids:
+            pest_stages.setdefault(pest_id, []).append(stage_id)
+    for stage_id, ids in stage_diseases.items():
+        for disease_id in ids:
+            disease_stages.setdefault(disease_id, []).append(stage_id)
+    part_pests, part_diseases = {}, {}
+    for pest_id, ids in pest_parts.items():
+        for part_id in ids:
+            part_pests.setdefault(part_id, []).append(pest_id)
+    for disease_id, ids in disease_parts.items():
+        for part_id in ids:
+            part_diseases.setdefault(part_id, []).append(disease_id)
+
+    plant_types = {
+        pk: PlantTypeRecord(pk, name, description or '')
+        for pk, name, description in PlantType.objects.values_list('id', 'name', 'description')
+    }
+    plant_parts = {
+        pk: PlantPartRecord(
+            pk, name, description or '',
+            by_name(part_pests.get(pk, ()), pest_names), by_name(part_diseases.get(pk, ()), disease_names),
+        )
+        for pk, name, description in PlantPart.objects.values_list('id', 'name', 'description')
+    }
+    pests = {
+        pk: PestRecord(
+            pk, name, description or '',
+            tuple(sorted(pest_types.get(pk, ()))), by_name(pest_parts.get(pk, ()), part_names),
+            tuple(sorted(pest_stages.get(pk, ()))),
+        )
+        for pk, name, description in Pest.objects.values_list('id', 'name', 'description')
+    }
+    diseases = {
+        pk: DiseaseRecord(
+            pk, name, description or '',
+            tuple(sorted(disease_types.get(pk, ()))), by_name(disease_parts.get(pk, ()), part_names),
+            tuple(sorted(disease_stages.get(pk, ()))),
+        )
+        for pk, name, description in Disease.objects.values_list('id', 'name', 'description')
+    }
+    stages = {}
+    for pk, name, months, prevalence_p in SeasonalStage.objects.values_list('id', 'name', 'months', 'prevalence_p'):
+        stage_part_ids = set()
+        for pest_id in stage_pests.get(pk, ()):
+            stage_part_ids.update(pest_parts.get(pest_id, ()))
+        for disease_id in stage_diseases.get(pk, ()):
+            stage_part_ids.update(disease_parts.get(disease_id, ()))
+        stages[pk] = SeasonalStageRecord(
+            pk, name, _parse_months(months), prevalence_p,
+            by_name(stage_pests.get(pk, ()), pest_names), by_name(stage_diseases.get(pk, ()), disease_names),
+            by_name(stage_part_ids, part_names),
+        )
+    return TaxonomySnapshot(plant_types, plant_parts, pests, diseases, stages, modified)
+
+
+# Process-wide snapshot. Changes made in this process invalidate it directly;
+# other processes notice through the mtime of TAXONOMY_STAMP_FILE, which they
+# check at most every TAXONOMY_CHECK_INTERVAL seconds.
+_snapshot: Optional[TaxonomySnapshot] = None
+_snapshot_stamp = None
+_last_check = 0.0
+_lock = threading.Lock()
+
+
+def _stamp_path() -> Path:
+    return Path(settings.TAXONOMY_STAMP_FILE)
+
+
+def _read_stamp():
+    try:
+        return os.stat(_stamp_path()).st_mtime_ns
+    except OSError:
+        return None
+
+
+def get_taxonomy() -> TaxonomySnapshot:
+    """Returns the current snapshot, loading it on first use or after a change."""
+    global _snapshot, _snapshot_stamp, _last_check
+    now = time.monotonic()
+    if _snapshot is not None and now - _last_check < getattr(settings, 'TAXONOMY_CHECK_INTERVAL', 5):
+        metrics.record_cache('taxonomy', True)
+        return _snapshot
+    with _lock:
+        stamp = _read_stamp()
+        _last_check = now
+        hit = _snapshot is not None and stamp == _snapshot_stamp
+        if not hit:
+            _snapshot = load_snapshot(stamp / 1e9 if stamp else 0.0)
+            _snapshot_stamp = stamp
+            logger.info(f"Loaded taxonomy snapshot {_snapshot.version}")
+        metrics.record_cache('taxonomy', hit)
+        return _snapshot
+
+
+def invalidate_taxonomy(using=None, **kwargs) -> None:
+    """
+    Signal handler for taxonomy changes. Waits for the transaction to commit,
+    since a process reloading earlier would cache the rows as they were before
+    the change until the next one.
+    """
+    transaction.on_commit(_drop_snapshot, using=using)
+
+
+def _drop_snapshot() -> None:
+    """Drops this process's snapshot and touches the stamp file so every other process reloads too."""
+    global _snapshot
+    with _lock:
+        _snapshot = None
+    path = _stamp_path()
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.touch()
+        # Make sure the mtime moves even if two changes land in the same tick
+        os.utime(path, ns=(time.time_ns(), time.time_ns()))
+    except OSError as e:
+        logger.error(f"Could not touch taxonomy stamp file {path}: {e}")
@@ -1,3 +1,1159 @@
-from django.test import TestCase
+import contextvars
+import json
+import multiprocessing
+import os
+import runpy
+import tempfile
+import threading
+import time
+import unittest
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .middleware import ReplicaRoutingMiddleware
+from .query_budget import QueryRecorder, fingerprint
+from .geometry import bounding_box, centroid, decode_boundary, encode_boundary, geodesic_area_hectares
+from . import metrics, taxonomy
+from .db_router import PrimaryReplicaRouter, replica_reads, reset_write_tracking, start_write_tracking, wrote_to_primary
+from .db_tuning import write_transaction
+from .archive import archive_sessions
+from .models import (
+    Farm, Grower, Observation, Pest, Region, SessionArchive, SessionParticipant, SurveillanceCalculation, SurveySession,
+)
+from .services.surveillance_service import create_observation, finish_survey_session, get_observation_page, join_survey_session
+from .services.spatial_service import find_farms_in_bbox, find_farms_within_radius
+from .tracing import span, trace_file_for
+from .write_queue import GroupCommitWriter, WriteTimeout, run_write
+
+
+def square(lng, lat, size):
+    """A closed square ring of `size` degrees with its south-west corner at (lng, lat)."""
+    return [[lng, lat], [lng + size, lat], [lng + size, lat + size], [lng, lat + size], [lng, lat]]
+
+
+def make_farm(owner, name='Test Farm', **kwargs):
+    return Farm.objects.create(owner=owner, name=name, size_hectares=120, stocking_rate=100, **kwargs)
+
+
+class GeometryTests(TestCase):
+    def test_area_of_known_square(self):
+        # 0.01 degrees at the equator is about 1113 m, so the square is about 123.9 ha
+        area = geodesic_area_hectares({'type': 'Polygon', 'coordinates': [square(0, 0, 0.01)]})
+        self.assertAlmostEqual(area, 123.9, delta=0.5)
+
+    def test_holes_are_subtracted(self):
+        polygon = {'type': 'Polygon', 'coordinates': [square(0, 0, 0.01), square(0.0025, 0.0025, 0.005)]}
+        outer = geodesic_area_hectares({'type': 'Polygon', 'coordinates': [square(0, 0, 0.01)]})
+        self.assertAlmostEqual(geodesic_area_hectares(polygon), outer * 0.75, delta=0.5)
+
+    def test_centroid_and_bbox(self):
+        polygon = {'type': 'Polygon', 'coordinates': [square(130.8, -12.4, 0.02)]}
+        lng, lat = centroid(polygon)
+        self.assertAlmostEqual(lng, 130.81)
+        self.assertAlmostEqual(lat, -12.39)
+        self.assertEqual([round(v, 9) for v in bounding_box(polygon)], [130.8, -12.4, 130.82, -12.38])
+
+    def test_centroid_is_area_weighted(self):
+        # A parcel four times the size of the other pulls the centroid 4/5 of the way towards it
+        parcels = {'type': 'MultiPolygon', 'coordinates': [[square(0, 0, 0.01)], [square(0.1, 0, 0.02)]]}
+        lng, _ = centroid(parcels)
+        self.assertAlmostEqual(lng, 0.005 + (0.11 - 0.005) * 0.8)
+        self.assertEqual([round(v, 9) for v in bounding_box(parcels)], [0, 0, 0.12, 0.02])
+
+    def test_invalid_geometry_has_no_area(self):
+        self.assertIsNone(geodesic_area_hectares(None))
+        self.assertIsNone(geodesic_area_hectares({'type': 'Point', 'coordinates': [0, 0]}))
+        self.assertIsNone(centroid(None))
+        self.assertIsNone(bounding_box({'type': 'Point', 'coordinates': [0, 0]}))
+
+    def test_encoding_round_trip(self):
+        ring = square(130.845123, -12.463457, 0.0042)
+        for geometry in (
+            {'type': 'Polygon', 'coordinates': [ring]},
+            {'type': 'MultiPolygon', 'coordinates': [[ring], [square(131.0, -12.5, 0.003)]]},
+        ):
+            decoded = decode_boundary(encode_boundary(geometry))
+            self.assertEqual(decoded['type'], geometry['type'])
+            self.assertEqual(decoded['coordinates'], geometry['coordinates'])
+
+    def test_simplification_uses_the_tightest_latitude(self):
+        # A 3e-6 degree kink is under half a pixel at the equator but over it at 65 degrees
+        ring = [[0, 0], [1, 0], [1, 65], [0.5, 65.000003], [0, 65], [0, 0]]
+        decoded = decode_boundary(encode_boundary({'type': 'Polygon', 'coordinates': [ring]}))
+        self.assertIn([0.5, 65.000003], decoded['coordinates'][0])
+
+
+class FarmBoundaryTests(TestCase):
+    def setUp(self):
+        self.owner = Grower.objects.create(user=User.objects.create_user('grower'))
+
+    def test_derived_fields_follow_the_boundary(self):
+        farm = make_farm(self.owner, boundary={'type': 'Polygon', 'coordinates': [square(130.8, -12.4, 0.01)]})
+        self.assertAlmostEqual(farm.boundary_area_hectares, 121.2, delta=1)
+        self.assertAlmostEqual(farm.centroid_lng, 130.805)
+        self.assertEqual(farm.bounding_box(), [[-12.4, 130.8], [-12.39, 130.81]])
+
+        farm.boundary = {'type': 'Polygon', 'coordinates': [square(131.0, -12.4, 0.01)]}
+        farm.save(update_fields=['boundary'])
+        farm.refresh_from_db()
+        self.assertAlmostEqual(farm.centroid_lng, 131.005)
+
+    def test_new_farms_are_logged_by_name(self):
+        with self.assertLogs('core.models', level='WARNING') as logs:
+            make_farm(self.owner, 'Big station', boundary={'type': 'Polygon', 'coordinates': [square(130.0, -12.0, 1.0)]})
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn("New farm 'Big station'", logs.output[0])
+
+    def test_area_mismatch_is_not_a_warning(self):
+        with self.assertNoLogs('core.models', level='WARNING'):
+            farm = make_farm(self.owner, boundary={'type': 'Polygon', 'coordinates': [square(130.8, -12.4, 0.02)]})
+        self.assertTrue(farm.has_area_mismatch())
+
+    def test_unchanged_boundary_is_not_rederived(self):
+        farm = make_farm(self.owner, boundary={'type': 'Polygon', 'coordinates': [square(130.8, -12.4, 0.01)]})
+        farm = Farm.objects.get(pk=farm.pk)
+        with mock.patch.object(Farm, 'refresh_boundary_derivatives') as refresh:
+            farm.name = 'Renamed'
+            farm.save()
+            Farm.objects.only('name').get(pk=farm.pk).save()
+            refresh.assert_not_called()
+
+            farm.boundary['coordinates'][0][0] = [130.79, -12.4]
+            farm.save()
+            refresh.assert_called_once()
+
+
+@override_settings(FARM_MAX_EXTENT_DEGREES=0.5)
+class SpatialQueryTests(TestCase):
+    def setUp(self):
+        self.owner = Grower.objects.create(user=User.objects.create_user('grower'))
+        self.officer = User.objects.create_user('officer', is_staff=True)
+
+    def add_farm(self, name, lng, lat, size):
+        return make_farm(self.owner, name, boundary={'type': 'Polygon', 'coordinates': [square(lng, lat, size)]})
+
+    def names(self, farms):
+        return sorted(farm['name'] for farm in farms)
+
+    def test_parcels_up_to_the_extent_limit_use_the_narrow_range(self):
+        self.add_farm('Just under', 130.0, -12.0, 0.49)
+        self.add_farm('Far away', 128.0, -12.0, 0.01)
+        farms, error = find_farms_in_bbox(-11.6, 130.45, -11.5, 130.5, user=self.officer)
+        self.assertIsNone(error)
+        self.assertEqual(self.names(farms), ['Just under'])
+
+    def test_oversize_parcels_are_still_found(self):
+        wide = self.add_farm('Station', 130.0, -12.0, 2.0)
+        self.assertEqual(wide.bbox_extent_degrees, 2.0)
+        farms, _ = find_farms_in_bbox(-10.2, 131.9, -10.1, 131.95, user=self.officer)
+        self.assertEqual(self.names(farms), ['Station'])
+        # A detection near the far corner of the parcel is inside the quarantine radius
+        farms, _ = find_farms_within_radius(-10.0, 132.05, 10, user=self.officer)
+        self.assertEqual(self.names(farms), ['Station'])
+
+    def test_boxes_that_miss_are_empty(self):
+        self.add_farm('Station', 130.0, -12.0, 2.0)
+        farms, _ = find_farms_in_bbox(-9.9, 132.1, -9.8, 132.2, user=self.officer)
+        self.assertEqual(farms, [])
+
+    def test_bbox_results_are_capped(self):
+        for i in range(5):
+            self.add_farm(f'Farm {i}', 130.0 + i * 0.01, -12.0, 0.005)
+        farms, _ = find_farms_in_bbox(-13, 129, -11, 131, user=self.officer, limit=3)
+        self.assertEqual(self.names(farms), ['Farm 0', 'Farm 1', 'Farm 2'])
+
+    def test_invalid_queries_are_rejected(self):
+        nan, inf = float('nan'), float('inf')
+        for args in ((-12, 130, nan), (-12, 130, inf), (-12, 130, 0), (nan, 130, 10), (-91, 130, 10), (-12, 181, 10)):
+            farms, error = find_farms_within_radius(*args, user=self.officer)
+            self.assertIsNone(farms, args)
+            self.assertTrue(error, args)
+        for args in ((-13, 129, -11, nan), (-95, 129, -11, 131), (-13, -190, -11, 131), (-11, 129, -13, 131), (-13, 131, -11, 129)):
+            farms, error = find_farms_in_bbox(*args, user=self.officer)
+            self.assertIsNone(farms, args)
+            self.assertTrue(error, args)
+
+    def test_api_returns_400_for_invalid_input(self):
+        self.client.force_login(self.officer)
+        nearby = reverse('core:api_farms_nearby')
+        self.assertEqual(self.client.get(nearby, {'lat': -12, 'lng': 130, 'radius_km': 5}).status_code, 200)
+        for params in ({'lat': -12, 'lng': 130, 'radius_km': 'nan'}, {'lat': 'inf', 'lng': 130}, {'lat': 100, 'lng': 130}):
+            self.assertEqual(self.client.get(nearby, params).status_code, 400, params)
+        in_bbox = reverse('core:api_farms_in_bbox')
+        self.assertEqual(self.client.get(in_bbox, {'bbox': '129,-13,131,-11'}).status_code, 200)
+        for bbox in ('129,-13,131,nan', '129,-13,200,-11', '131,-13,129,-11', '129,-11,131,-13', '129,-13,131'):
+            self.assertEqual(self.client.get(in_bbox, {'bbox': bbox}).status_code, 400, bbox)
+
+    def test_growers_only_see_their_own_farms(self):
+        self.add_farm('Mine', 130.0, -12.0, 0.01)
+        other = Grower.objects.create(user=User.objects.create_user('neighbour'))
+        make_farm(other, 'Theirs', boundary={'type': 'Polygon', 'coordinates': [square(130.02, -12.0, 0.01)]})
+        farms, _ = find_farms_in_bbox(-12.1, 129.9, -11.9, 130.1, user=self.owner.user)
+        self.assertEqual(self.names(farms), ['Mine'])
+
+
+def read_database(request):
+    return HttpResponse(PrimaryReplicaRouter().db_for_read(Farm) or 'default')
+
+
+@replica_reads
+def replica_read_database(request):
+    return read_database(request)
+
+
+def write_farm(request):
+    PrimaryReplicaRouter().db_for_write(Farm)
+    return read_database(request)
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'], REPLICA_PIN_SECONDS=15)
+class ReplicaRoutingTests(SimpleTestCase):
+    def get(self, view, method='get', pinned=False):
+        request = getattr(RequestFactory(), method)('/')
+        if pinned:
+            request.COOKIES['db_primary_pin'] = '1'
+        middleware = ReplicaRoutingMiddleware(
+            lambda request: middleware.process_view(request, view, (), {}) or view(request)
+        )
+        return middleware(request)
+
+    def test_only_marked_views_read_from_the_replica(self):
+        self.assertEqual(self.get(replica_read_database).content, b'replica1')
+        self.assertEqual(self.get(read_database).content, b'default')
+        self.assertEqual(self.get(replica_read_database, method='post').content, b'default')
+        # The routing flag does not leak out of the request
+        self.assertIsNone(PrimaryReplicaRouter().db_for_read(Farm))
+
+    def test_writes_pin_the_user_to_the_primary(self):
+        response = self.get(write_farm)
+        self.assertEqual(response.cookies['db_primary_pin']['max-age'], 15)
+        self.assertNotIn('db_primary_pin', self.get(replica_read_database).cookies)
+        self.assertEqual(self.get(replica_read_database, pinned=True).content, b'default')
+        self.assertIn('db_primary_pin', self.get(read_database, method='post').cookies)
+
+    def test_other_apps_stay_on_the_default_database(self):
+        router = PrimaryReplicaRouter()
+        token = start_write_tracking()
+        self.addCleanup(reset_write_tracking, token)
+        self.assertIsNone(router.db_for_write(User))
+        self.assertFalse(wrote_to_primary())
+        self.assertFalse(router.allow_migrate('replica1', 'core'))
+        self.assertIsNone(router.allow_migrate('default', 'core'))
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas_everything_reads_from_the_primary(self):
+        response = self.get(replica_read_database)
+        self.assertEqual(response.content, b'default')
+        self.assertNotIn('db_primary_pin', self.get(write_farm).cookies)
+
+
+@override_settings(QUERY_BUDGET_VERBOSE=True)
+class QueryBudgetTests(TestCase):
+    def test_fingerprints_ignore_parameters(self):
+        self.assertEqual(
+            fingerprint("SELECT * FROM farm WHERE id IN (%s, %s, %s) AND name = 'x'"),
+            fingerprint("SELECT * FROM farm  WHERE id IN (%s) AND name = 'y'"),
+        )
+        self.assertNotEqual(fingerprint('SELECT id FROM farm'), fingerprint('SELECT id FROM region'))
+
+    def test_repeated_shapes_are_reported_as_n_plus_one(self):
+        recorder = QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            for pk in range(12):
+                Farm.objects.filter(pk=pk).exists()
+            User.objects.exists()
+        self.assertEqual(recorder.count, 13)
+        self.assertEqual(recorder.log, [])  # Only shapes are kept unless asked for
+        problems = recorder.violations({'max_queries': 20, 'max_repeats': 10})
+        self.assertEqual(len(problems), 1)
+        self.assertTrue(problems[0].startswith('N+1: 12x SELECT'))
+        self.assertEqual(recorder.violations({'max_queries': 5}), ['13 queries (budget 5)'])
+
+    def test_sql_is_kept_only_on_request(self):
+        recorder = QueryRecorder(keep_log=True)
+        with connection.execute_wrapper(recorder):
+            User.objects.exists()
+        self.assertEqual(len(recorder.log), 1)
+        self.assertIn('auth_user', recorder.log[0]['sql'])
+
+    def test_overruns_are_logged(self):
+        Grower.objects.create(user=User.objects.create_user('grower'))
+        self.client.force_login(User.objects.get(username='grower'))
+        with override_settings(QUERY_BUDGET_DEFAULT={'max_queries': 1}):
+            with self.assertLogs('core.query_budget', level='WARNING') as logs:
+                self.client.get(reverse('core:create_farm'))
+        self.assertIn('budget 1', logs.output[0])
+
+    def test_farm_changelist_has_no_n_plus_one(self):
+        admin_user = User.objects.create_superuser('admin', password='pw')
+        self.client.force_login(admin_user)
+        url = reverse('admin:core_farm_changelist')
+
+        def add_farms(count):
+            for _ in range(count):
+                index = Farm.objects.count()
+                owner = Grower.objects.create(user=User.objects.create_user(f'grower{index}'))
+                make_farm(owner, f'Farm {index}', region=Region.objects.create(name=f'Region {index}'))
+
+        add_farms(2)
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(url)
+        add_farms(6)
+        with self.assertNoLogs('core.query_budget', level='WARNING'):
+            with CaptureQueriesContext(connection) as many:
+                response = self.client.get(url)
+        self.assertContains(response, 'Farm 7')
+        self.assertEqual(len(many), len(few))
+
+
+class RequestProfilingTests(TestCase):
+    def setUp(self):
+        profile_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(profile_dir.cleanup)
+        self.profile_dir = Path(profile_dir.name)
+        self.url = reverse('core:create_farm')
+
+    def profile_as(self, user):
+        self.client.force_login(user)
+        return self.client.get(self.url, {'_profile': '1'}, HTTP_X_PROFILE='1')
+
+    def test_profiling_is_off_by_default(self):
+        self.assertFalse(settings.PROFILING_ENABLED)
+        response = self.profile_as(User.objects.create_superuser('admin'))
+        self.assertFalse(response.has_header('X-Profile-Id'))
+
+    def test_only_superusers_can_profile(self):
+        with override_settings(PROFILING_ENABLED=True, PROFILE_DIR=str(self.profile_dir)):
+            for user in (User.objects.create_user('grower'), User.objects.create_user('officer', is_staff=True)):
+                self.assertFalse(self.profile_as(user).has_header('X-Profile-Id'), user.username)
+            self.assertEqual(list(self.profile_dir.iterdir()), [])
+            response = self.profile_as(User.objects.create_superuser('admin'))
+            self.assertTrue(response.has_header('X-Profile-Id'))
+            self.assertTrue(list(self.profile_dir.iterdir()))
+
+    def test_only_superusers_can_read_profiles(self):
+        self.client.force_login(User.objects.create_user('officer', is_staff=True))
+        self.assertEqual(self.client.get(reverse('admin_profiles')).status_code, 403)
+        self.client.force_login(User.objects.create_superuser('admin'))
+        self.assertEqual(self.client.get(reverse('admin_profiles')).status_code, 200)
+
+
+def record_archived(amount):
+    metrics.inc('sessions_archived_total', {'status': 'test'}, amount=amount)
+    metrics.flush()
+
+
+@unittest.skipUnless(hasattr(os, 'fork') and metrics.fcntl is not None, 'needs fork and flock')
+class MetricsStoreTests(SimpleTestCase):
+    def setUp(self):
+        metrics_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(metrics_dir.cleanup)
+        self.metrics_dir = Path(metrics_dir.name)
+        settings_override = override_settings(METRICS_DIR=metrics_dir.name, METRICS_ENABLED=True)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def archived(self):
+        return metrics.collect().get('sessions_archived_total', {}).get((('status', 'test'),), 0)
+
+    def run_worker(self, amount):
+        worker = multiprocessing.get_context('fork').Process(target=record_archived, args=(amount,))
+        worker.start()
+        worker.join()
+        self.assertEqual(worker.exitcode, 0)
+
+    def test_stores_of_all_processes_are_merged(self):
+        before = self.archived()
+        record_archived(1)
+        self.run_worker(2)
+        self.run_worker(4)
+        self.assertEqual(self.archived(), before + 7)
+        # The exited workers' stores were folded into the aggregate and removed
+        self.assertTrue((self.metrics_dir / metrics.AGGREGATE_FILE).exists())
+        self.assertEqual(len(list(self.metrics_dir.glob('*-*.json'))), 1)
+        self.run_worker(8)
+        self.assertEqual(self.archived(), before + 15)
+        self.assertIn('sessions_archived_total{status="test"} ', metrics.render())
+
+
+@override_settings(METRICS_ALLOWED_IPS=['127.0.0.1'], METRICS_BEARER_TOKEN='scrape-token')
+class MetricsEndpointTests(TestCase):
+    def setUp(self):
+        metrics_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(metrics_dir.cleanup)
+        settings_override = override_settings(METRICS_DIR=metrics_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.url = reverse('metrics')
+
+    def test_localhost_alone_is_not_enough(self):
+        # Behind a reverse proxy every request comes from localhost
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        self.client.force_login(User.objects.create_user('grower'))
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        self.assertEqual(self.client.get(self.url, HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+
+    def test_scrape_token_or_staff_login(self):
+        response = self.client.get(self.url, HTTP_AUTHORIZATION='Bearer scrape-token')
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '# TYPE survey_sessions_open gauge')
+        self.client.force_login(User.objects.create_user('officer', is_staff=True))
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+    def test_other_addresses_are_refused(self):
+        response = self.client.get(self.url, HTTP_AUTHORIZATION='Bearer scrape-token', REMOTE_ADDR='10.0.0.5')
+        self.assertEqual(response.status_code, 403)
+
+    def test_empty_allow_list_refuses_everyone(self):
+        with override_settings(METRICS_ALLOWED_IPS=[]):
+            response = self.client.get(self.url, HTTP_AUTHORIZATION='Bearer scrape-token')
+        self.assertEqual(response.status_code, 403)
+
+    def test_no_token_configured_disables_token_access(self):
+        with override_settings(METRICS_BEARER_TOKEN=''):
+            self.assertEqual(self.client.get(self.url, HTTP_AUTHORIZATION='Bearer ').status_code, 403)
+
+
+class TracingTests(TestCase):
+    def setUp(self):
+        trace_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(trace_dir.cleanup)
+        self.trace_dir = Path(trace_dir.name)
+        settings_override = override_settings(TRACING_ENABLED=True, TRACE_FILE=str(self.trace_dir / 'spans.jsonl'))
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def exported(self):
+        return [json.loads(line) for line in trace_file_for(os.getpid()).read_text().splitlines()]
+
+    def test_spans_nest_and_are_written_when_they_close(self):
+        with span('outer', **{'farm.id': 7}):
+            with span('inner'):
+                User.objects.exists()
+            self.assertEqual([exported['name'] for exported in self.exported()], ['inner'])
+            Farm.objects.exists()
+        inner, outer = self.exported()
+        self.assertEqual(outer['name'], 'outer')
+        self.assertIsNone(outer['args']['parent_id'])
+        self.assertEqual(inner['args']['parent_id'], outer['args']['span_id'])
+        self.assertEqual(inner['args']['trace_id'], outer['args']['trace_id'])
+        self.assertEqual((inner['args']['db.query_count'], outer['args']['db.query_count']), (1, 2))
+        self.assertEqual(outer['args']['farm.id'], 7)
+        self.assertGreaterEqual(outer['dur'], inner['dur'])
+
+    def test_failed_spans_are_marked(self):
+        with self.assertRaises(ValueError):
+            with span('broken'):
+                raise ValueError('no farm')
+        (exported,) = self.exported()
+        self.assertEqual(exported['args']['status'], 'error')
+        self.assertEqual(exported['args']['error'], 'ValueError: no farm')
+
+    @override_settings(TRACE_MAX_BYTES=2000, TRACE_BACKUP_COUNT=1, TRACE_MAX_TOTAL_BYTES=6000)
+    def test_span_logs_are_rotated_and_capped(self):
+        # Left behind by an exited worker
+        stale = self.trace_dir / 'spans.1.jsonl'
+        stale.write_text('x' * 5000)
+        os.utime(stale, (time.time() - 3600, time.time() - 3600))
+        for _ in range(100):
+            with span('request', payload='y' * 100):
+                pass
+        own = trace_file_for(os.getpid())
+        self.assertFalse(stale.exists())
+        self.assertEqual(sorted(self.trace_dir.iterdir()), [own, own.with_name(own.name + '.1')])
+        self.assertLessEqual(sum(path.stat().st_size for path in self.trace_dir.iterdir()), 6000)
+
+
+class DatabaseProfileTests(SimpleTestCase):
+    def load_settings(self, **environ):
+        with mock.patch.dict('os.environ', environ, clear=True):
+            return runpy.run_path(str(Path(settings.BASE_DIR) / 'finalproject' / 'settings.py'))
+
+    def test_sqlite_is_the_default(self):
+        databases = self.load_settings()['DATABASES']
+        self.assertEqual(list(databases), ['default'])
+        self.assertEqual(databases['default']['ENGINE'], 'django.db.backends.sqlite3')
+
+    def test_postgresql_profile_is_built_from_the_environment(self):
+        loaded = self.load_settings(
+            DJANGO_DB_ENGINE='postgresql', POSTGRES_DB='mango', POSTGRES_HOST='db.internal',
+            POSTGRES_CONN_MAX_AGE='120', POSTGRES_STATEMENT_TIMEOUT_MS='5000',
+            POSTGRES_DISABLE_SERVER_SIDE_CURSORS='1', POSTGRES_REPLICA_HOSTS='replica-a, replica-b',
+        )
+        default = loaded['DATABASES']['default']
+        self.assertEqual(default['ENGINE'], 'django.db.backends.postgresql')
+        self.assertEqual((default['NAME'], default['HOST'], default['PORT']), ('mango', 'db.internal', '5432'))
+        self.assertEqual(default['CONN_MAX_AGE'], 120)
+        self.assertTrue(default['CONN_HEALTH_CHECKS'])
+        self.assertTrue(default['DISABLE_SERVER_SIDE_CURSORS'])
+        self.assertEqual(default['OPTIONS']['options'], '-c statement_timeout=5000')
+        self.assertEqual(loaded['DATABASE_REPLICAS'], ['replica1', 'replica2'])
+        self.assertEqual(loaded['DATABASES']['replica2']['HOST'], 'replica-b')
+        self.assertEqual(loaded['DATABASES']['replica2']['NAME'], 'mango')
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'SQLite connection tuning')
+class SqliteTuningTests(TransactionTestCase):
+    def pragmas(self, *names):
+        new_connection = connection.copy()
+        self.addCleanup(new_connection.close)
+        values = {}
+        with new_connection.cursor() as cursor:
+            for name in names:
+                cursor.execute(f'PRAGMA {name}')
+                values[name] = cursor.fetchone()[0]
+        return values
+
+    def test_pragmas_are_applied_to_new_connections(self):
+        values = self.pragmas('synchronous', 'cache_size', 'temp_store', 'busy_timeout')
+        # NORMAL and MEMORY; the busy timeout comes from OPTIONS['timeout'] (20 s)
+        self.assertEqual(values, {'synchronous': 1, 'cache_size': -20000, 'temp_store': 2, 'busy_timeout': 20000})
+
+    @override_settings(SQLITE_PRAGMAS={'cache_size': -1234, 'busy_timeout': 1, 'secure_delete': 'ON'})
+    def test_unsupported_pragmas_are_skipped(self):
+        with self.assertLogs('core.db_tuning', level='WARNING') as logs:
+            values = self.pragmas('cache_size', 'busy_timeout')
+        self.assertEqual(values, {'cache_size': -1234, 'busy_timeout': 20000})
+        self.assertEqual(len(logs.output), 2)
+
+    def test_only_write_transactions_begin_immediate(self):
+        with CaptureQueriesContext(connection) as queries:
+            with write_transaction():
+                User.objects.exists()
+            with transaction.atomic():
+                User.objects.exists()
+        begins = [query['sql'] for query in queries if query['sql'].startswith('BEGIN')]
+        self.assertEqual(begins, ['BEGIN IMMEDIATE', 'BEGIN'])
+        self.assertIsNone(connection.transaction_mode)
+
+
+class RecordingWriter(GroupCommitWriter):
+    def __init__(self, *args, **kwargs):
+        self.batches = []
+        super().__init__(*args, **kwargs)
+
+    def _apply(self, batch):
+        self.batches.append(len(batch))
+        super()._apply(batch)
+
+
+@override_settings(SERIALIZE_DB_WRITES=True, WRITE_QUEUE_TIMEOUT=0.2)
+class GroupCommitWriterTests(TransactionTestCase):
+    def start_writer(self, window_ms=5):
+        writer = RecordingWriter(window_ms=window_ms)
+        self.addCleanup(writer.stop)
+        patcher = mock.patch('core.write_queue.get_writer', return_value=writer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return writer
+
+    def test_writes_in_one_window_share_a_transaction(self):
+        writer = self.start_writer(window_ms=200)
+
+        def fail():
+            raise ValueError('bad write')
+
+        futures = [writer.submit(Pest.objects.create, name=name) for name in ('Mango scale', 'Seed weevil')]
+        futures.insert(1, writer.submit(fail))
+        self.assertEqual(futures[0].result(timeout=5).name, 'Mango scale')
+        self.assertIsInstance(futures[1].exception(timeout=5), ValueError)
+        self.assertEqual(writer.batches, [3])
+        # The failed write rolled back only its own savepoint
+        self.assertEqual(sorted(Pest.objects.values_list('name', flat=True)), ['Mango scale', 'Seed weevil'])
+
+    def test_writes_inside_atomic_run_inline(self):
+        writer = self.start_writer()
+        with transaction.atomic():
+            self.assertEqual(run_write(threading.get_ident), threading.get_ident())
+        self.assertEqual(writer.batches, [])
+        self.assertNotEqual(run_write(threading.get_ident), threading.get_ident())
+        self.assertEqual(writer.batches, [1])
+
+    def test_writes_see_and_update_the_callers_context(self):
+        self.start_writer()
+        request_id = contextvars.ContextVar('request_id')
+        request_id.set('abc')
+        token = start_write_tracking()
+        self.addCleanup(reset_write_tracking, token)
+        self.assertEqual(run_write(request_id.get), 'abc')
+        self.assertFalse(wrote_to_primary())
+        run_write(Pest.objects.create, name='Mango scale')
+        # The write was tracked in the writer thread, so the caller still pins to the primary
+        self.assertTrue(wrote_to_primary())
+
+    def test_writes_not_started_in_time_are_cancelled(self):
+        writer = self.start_writer()
+        started, release = threading.Event(), threading.Event()
+        blocker = writer.submit(lambda: started.set() or release.wait(5))
+        started.wait(5)
+        with self.assertRaises(WriteTimeout):
+            run_write(Pest.objects.create, name='Mango scale')
+        release.set()
+        blocker.result(timeout=5)
+        writer.submit(lambda: None).result(timeout=5)
+        self.assertFalse(Pest.objects.exists())
+
+    def test_running_writes_are_waited_for(self):
+        self.start_writer()
+
+        def slow_write():
+            time.sleep(0.4)
+            return Pest.objects.create(name='Mango scale')
+
+        self.assertEqual(run_write(slow_write).name, 'Mango scale')
+        self.assertTrue(Pest.objects.exists())
+
+
+class TaxonomySnapshotTests(TestCase):
+    def setUp(self):
+        stamp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(stamp_dir.cleanup)
+        settings_override = override_settings(
+            TAXONOMY_STAMP_FILE=str(Path(stamp_dir.name) / 'taxonomy.stamp'), TAXONOMY_CHECK_INTERVAL=0
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        taxonomy._drop_snapshot()
+
+    def test_snapshot_is_dropped_only_when_the_change_commits(self):
+        self.assertIsNone(taxonomy.get_taxonomy().find('Seed weevil'))
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            pest = Pest.objects.create(name='Seed weevil')
+            self.assertEqual(taxonomy._snapshot_stamp, taxonomy._read_stamp())
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(taxonomy.get_taxonomy().find('seed weevil').id, pest.id)
+
+
+class ObservationPageTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('grower')
+        farm = make_farm(Grower.objects.create(user=self.user))
+        self.session = SurveySession.objects.create(farm=farm, surveyor=self.user, target_plants_surveyed=10)
+        self.observations = [
+            Observation.objects.create(session=self.session, plant_sequence_number=n) for n in range(1, 8)
+        ]
+        self.observations[2].pests_observed.add(Pest.objects.create(name='Mango scale'))
+
+    def walk(self, limit):
+        pages, cursor = [], None
+        while True:
+            page, cursor = get_observation_page(self.session, before=cursor, limit=limit)
+            pages.append([o.plant_sequence_number for o in page])
+            if cursor is None:
+                return pages
+
+    def test_pages_walk_the_session_newest_first(self):
+        self.assertEqual(self.walk(3), [[7, 6, 5], [4, 3, 2], [1]])
+        self.assertEqual(self.walk(7), [[7, 6, 5, 4, 3, 2, 1]])
+
+    def test_last_full_page_has_no_cursor(self):
+        self.assertEqual(self.walk(1)[-2:], [[2], [1]])
+        page, cursor = get_observation_page(self.session, before=self.observations[3].id, limit=3)
+        self.assertEqual([o.plant_sequence_number for o in page], [3, 2, 1])
+        self.assertIsNone(cursor)
+
+    def test_rows_recorded_between_pages_do_not_shift_the_cursor(self):
+        page, cursor = get_observation_page(self.session, limit=3)
+        Observation.objects.create(session=self.session, plant_sequence_number=8)
+        page, _ = get_observation_page(self.session, before=cursor, limit=3)
+        self.assertEqual([o.plant_sequence_number for o in page], [4, 3, 2])
+
+    def test_page_queries_do_not_grow_with_the_page(self):
+        with self.assertNumQueries(3):
+            page, _ = get_observation_page(self.session, limit=7)
+            names = [pest.name for o in page for pest in o.pests_observed.all()]
+        self.assertEqual(names, ['Mango scale'])
+
+    def test_fragment_rejects_bad_cursors(self):
+        self.client.force_login(self.user)
+        url = reverse('core:session_observations', kwargs={'session_id': self.session.session_id})
+        self.assertEqual(self.client.get(url, {'before': self.observations[3].id}).status_code, 200)
+        for before in ('abc', '', '\u00b2', '1.5'):
+            self.assertEqual(self.client.get(url, {'before': before}).status_code, 400, before)
+
+
+class CompletedSessionCachingTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('grower')
+        farm = make_farm(Grower.objects.create(user=self.user))
+        self.session = SurveySession.objects.create(farm=farm, surveyor=self.user, target_plants_surveyed=2)
+        participant, _ = join_survey_session(self.session, self.user)
+        for _ in range(2):
+            create_observation(participant, {'notes': 'ok'})
+        self.url = reverse('core:survey_session_detail', kwargs={'session_id': self.session.session_id})
+        self.client.force_login(self.user)
+
+    def finish(self):
+        finished, error = finish_survey_session(self.session)
+        self.assertTrue(finished, error)
+
+    def test_in_progress_sessions_have_no_etag(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('ETag'))
+
+    def test_unchanged_completed_page_is_not_modified(self):
+        self.finish()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        with self.assertNumQueries(3):  # Session, user and the snapshot lookup
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH='"other"').status_code, 200)
+
+    def test_etag_changes_with_the_user(self):
+        self.finish()
+        etag = self.client.get(self.url)['ETag']
+        teammate = User.objects.create_user('teammate')
+        self.session.participants.create(user=teammate, sequence_start=101, sequence_end=200)
+        self.client.force_login(teammate)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'teammate')
+
+    def test_etag_changes_with_the_farm_and_surveyor_names(self):
+        self.finish()
+        etag = self.client.get(self.url)['ETag']
+        Farm.objects.filter(pk=self.session.farm_id).update(name='Renamed Farm')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Renamed Farm')
+
+        etag = response['ETag']
+        User.objects.filter(pk=self.user.pk).update(username='renamed')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'renamed')
+
+    def test_etag_changes_with_the_csrf_secret(self):
+        self.finish()
+        response = self.client.get(self.url)
+        etag = response['ETag']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.client.cookies['csrftoken'] = 'x' * 32
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_flash_messages_skip_conditional_handling(self):
+        self.finish()
+        etag = self.client.get(self.url)['ETag']
+        # The active page of a completed session redirects here with a message, which must be shown
+        active_url = reverse('core:active_survey_session', kwargs={'session_id': self.session.session_id})
+        self.assertRedirects(self.client.get(active_url), self.url, fetch_redirect_response=False)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'already completed')
+
+
+@override_settings(SESSION_SEQUENCE_BLOCK_SIZE=3)
+class TeamSessionTests(TestCase):
+    def setUp(self):
+        self.lead = User.objects.create_user('lead')
+        self.teammate = User.objects.create_user('teammate')
+        farm = make_farm(Grower.objects.create(user=self.lead))
+        self.session = SurveySession.objects.create(farm=farm, surveyor=self.lead, target_plants_surveyed=9)
+        self.a, _ = join_survey_session(self.session, self.lead)
+        self.b, _ = join_survey_session(self.session, self.teammate)
+
+    def record(self, participant, **data):
+        observation, error = create_observation(participant, data)
+        return observation.plant_sequence_number if observation else error
+
+    def test_participants_get_disjoint_blocks(self):
+        self.assertEqual((self.a.sequence_start, self.a.sequence_end), (1, 3))
+        self.assertEqual((self.b.sequence_start, self.b.sequence_end), (4, 6))
+        numbers = [self.record(p) for p in (self.a, self.b, self.a, self.b, self.a, self.a)]
+        # A's block runs out after its third plant and the next free block (7-9) is reserved
+        self.assertEqual(numbers, [1, 4, 2, 5, 3, 7])
+        self.assertEqual(self.a.next_sequence_number(), 8)
+        self.assertEqual(self.b.next_sequence_number(), 6)
+
+    def test_rejoining_returns_the_same_participant(self):
+        again, error = join_survey_session(self.session, self.teammate)
+        self.assertIsNone(error)
+        self.assertEqual(again.pk, self.b.pk)
+        self.assertEqual(self.session.participants.count(), 2)
+
+    def test_shares_split_the_remaining_plants(self):
+        self.a.refresh_from_db()
+        self.assertEqual([self.a.target_share, self.b.target_share], [5, 4])
+        for _ in range(3):
+            self.record(self.a)
+        self.session.target_plants_surveyed = 6
+        self.session.save()
+        shares = {p.user_id: p.target_share for p in self.session.rebalance_target_shares()}
+        # A keeps its three plants; the three still to survey are split 2/1
+        self.assertEqual(shares, {self.lead.pk: 5, self.teammate.pk: 1})
+        self.assertEqual(sum(shares.values()), 6)
+
+    def test_share_limits_recording(self):
+        self.session.target_plants_surveyed = 2
+        self.session.save()
+        self.session.rebalance_target_shares()
+        self.b.refresh_from_db()
+        self.assertEqual(self.record(self.b), 4)
+        self.assertIn('share', self.record(self.b))
+
+    def test_explicit_numbers_must_come_from_the_own_block(self):
+        self.assertIn('outside your current range', self.record(self.a, plant_sequence_number=5))
+        self.assertEqual(self.record(self.a, plant_sequence_number=3), 3)
+        # The block is used up, so the next plant comes from a new block rather than B's numbers
+        self.assertEqual(self.record(self.a), 7)
+        self.assertEqual([self.record(self.b) for _ in range(3)], [4, 5, 6])
+        numbers = list(self.session.observations.values_list('plant_sequence_number', flat=True))
+        self.assertEqual(len(numbers), len(set(numbers)))
+
+    def test_numbers_outside_the_block_do_not_move_the_counter(self):
+        self.a.record_observation(50, [], [])
+        self.assertEqual(self.a.next_sequence_number(), 1)
+
+    def test_sequence_numbers_are_unique_per_session(self):
+        Observation.objects.create(session=self.session, plant_sequence_number=1)
+        with self.assertRaises(IntegrityError):
+            Observation.objects.create(session=self.session, plant_sequence_number=1)
+
+    def test_progress_sums_the_participants(self):
+        self.record(self.a, pests_observed=[Pest.objects.create(name='Mango scale').pk])
+        self.record(self.b)
+        progress = self.session.progress()
+        self.assertEqual(progress['observation_count'], 2)
+        self.assertEqual(progress['unique_pests'], 1)
+        self.assertEqual([p['observation_count'] for p in progress['participants']], [1, 1])
+
+
+@skipUnlessDBFeature('has_select_for_update')
+@override_settings(SESSION_SEQUENCE_BLOCK_SIZE=5)
+class ConcurrentIngestTests(TransactionTestCase):
+    """Several surveyors recording at once, on a database with row locks."""
+
+    def test_concurrent_observations_get_unique_numbers(self):
+        lead = User.objects.create_user('lead')
+        farm = make_farm(Grower.objects.create(user=lead))
+        session = SurveySession.objects.create(farm=farm, surveyor=lead)
+        participants = [join_survey_session(session, User.objects.create_user(f'surveyor{i}'))[0] for i in range(4)]
+        errors = []
+
+        def ingest(participant):
+            try:
+                for _ in range(12):
+                    _, error = create_observation(participant, {})
+                    if error:
+                        errors.append(error)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=ingest, args=(p,)) for p in participants]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        numbers = list(session.observations.values_list('plant_sequence_number', flat=True))
+        self.assertEqual(len(numbers), 48)
+        self.assertEqual(len(set(numbers)), 48)
+        self.assertEqual(session.progress()['observation_count'], 48)
+
+
+class SessionInviteTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner')
+        self.teammate = User.objects.create_user('teammate')
+        farm = make_farm(Grower.objects.create(user=self.owner))
+        self.session = SurveySession.objects.create(farm=farm, surveyor=self.owner, target_plants_surveyed=10)
+        join_survey_session(self.session, self.owner)
+        self.invite_url = reverse('core:session_invite', kwargs={'session_id': self.session.session_id})
+
+    def join_url(self, token):
+        return reverse('core:join_survey_session', kwargs={'session_id': self.session.session_id, 'token': token})
+
+    def create_invite(self):
+        self.client.force_login(self.owner)
+        self.client.post(self.invite_url)
+        self.session.refresh_from_db()
+        return self.session.invite_token
+
+    def test_joining_needs_the_owners_token(self):
+        self.client.force_login(self.teammate)
+        self.assertEqual(self.client.post(self.join_url('guessed-token')).status_code, 404)
+        token = self.create_invite()
+        self.client.force_login(self.teammate)
+        self.assertEqual(self.client.get(self.join_url(token)).status_code, 200)
+        self.client.post(self.join_url(token))
+        self.assertTrue(self.session.participants.filter(user=self.teammate).exists())
+
+    def test_only_the_owner_creates_links(self):
+        self.client.force_login(self.teammate)
+        self.assertEqual(self.client.post(self.invite_url).status_code, 404)
+        self.session.refresh_from_db()
+        self.assertIsNone(self.session.invite_token)
+
+    def test_new_and_revoked_links_stop_old_ones(self):
+        old = self.create_invite()
+        new = self.create_invite()
+        self.assertNotEqual(old, new)
+        self.client.post(self.invite_url, {'action': 'revoke'})
+        self.client.force_login(self.teammate)
+        for token in (old, new):
+            self.assertEqual(self.client.get(self.join_url(token)).status_code, 404)
+
+
+class SessionCleanupWorkerTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('grower')
+        self.farm = make_farm(Grower.objects.create(user=self.user))
+
+    def session(self, hours_ago, status='in_progress'):
+        return SurveySession.objects.create(
+            farm=self.farm, surveyor=self.user, status=status, start_time=timezone.now() - timedelta(hours=hours_ago)
+        )
+
+    def run_worker(self, *args):
+        stdout = StringIO()
+        call_command('session_cleanup_worker', '--once', '--no-archive', *args, stdout=stdout)
+        return stdout.getvalue()
+
+    def test_worker_abandons_stale_sessions(self):
+        stale = [self.session(hours_ago=5), self.session(hours_ago=3)]
+        current = self.session(hours_ago=1)
+        finished = self.session(hours_ago=9, status='completed')
+
+        self.assertRegex(self.run_worker(), r'^Abandoned 2 stale sessions and archived 0 sessions in [0-9.]+s\n$')
+        statuses = dict(SurveySession.objects.values_list('id', 'status'))
+        self.assertEqual(
+            [statuses[s.id] for s in (*stale, current, finished)], ['abandoned', 'abandoned', 'in_progress', 'completed']
+        )
+        self.assertTrue(all(s.end_time for s in SurveySession.objects.filter(status='abandoned')))
+
+    def test_quiet_passes_print_nothing(self):
+        self.session(hours_ago=1)
+        self.assertEqual(self.run_worker(), '')
+        self.assertIn('Abandoned 0 stale sessions', self.run_worker('--verbosity', '2'))
+        self.assertIn('Abandoned 1 stale sessions', self.run_worker('--hours', '0'))
+
+    def test_saving_a_session_does_not_clean_up(self):
+        stale = self.session(hours_ago=5)
+        self.session(hours_ago=0)
+        stale.refresh_from_db()
+        self.assertEqual(stale.status, 'in_progress')
+
+
+class SessionProgressEndpointTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('grower')
+        self.session = SurveySession.objects.create(
+            farm=make_farm(Grower.objects.create(user=self.user)), surveyor=self.user, target_plants_surveyed=4
+        )
+        participant, _ = join_survey_session(self.session, self.user)
+        create_observation(participant, {})
+        self.client.force_login(self.user)
+
+    def test_polling_endpoint(self):
+        response = self.client.get(reverse('core:api_session_progress', args=[self.session.session_id]))
+        progress = response.json()
+        self.assertEqual(progress['status'], 'in_progress')
+        self.assertEqual((progress['observation_count'], progress['target_plants'], progress['progress_percent']), (1, 4, 25))
+        self.assertFalse(progress['target_reached'])
+        self.assertEqual([p['username'] for p in progress['participants']], ['grower'])
+
+        self.client.force_login(User.objects.create_user('stranger'))
+        response = self.client.get(reverse('core:api_session_progress', args=[self.session.session_id]))
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(SESSION_PROGRESS_SSE_ENABLED=False)
+    def test_stream_disabled(self):
+        response = self.client.get(reverse('core:api_session_progress_stream', args=[self.session.session_id]))
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(
+        SESSION_PROGRESS_SSE_ENABLED=True, SESSION_PROGRESS_STREAM_SECONDS=0, SESSION_PROGRESS_RETRY_MS=3000
+    )
+    def test_stream_sends_the_polling_payload(self):
+        polled = self.client.get(reverse('core:api_session_progress', args=[self.session.session_id])).json()
+        response = self.client.get(reverse('core:api_session_progress_stream', args=[self.session.session_id]))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        retry, event, end = b''.join(response.streaming_content).decode().split('\n\n')
+        self.assertEqual((retry, end), ('retry: 3000', ''))
+        name, data = event.split('\n')
+        self.assertEqual(name, 'event: progress')
+        self.assertEqual(json.loads(data.removeprefix('data: ')), polled)
+
+
+class CleanupSessionsCommandTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user('grower')
+        farm = make_farm(Grower.objects.create(user=user))
+        self.stale = [SurveySession.objects.create(farm=farm, surveyor=user) for _ in range(5)]
+        SurveySession.objects.update(start_time=timezone.now() - timedelta(hours=3))
+        self.current = SurveySession.objects.create(farm=farm, surveyor=user)
+
+    def run_command(self, *args):
+        stdout = StringIO()
+        call_command('cleanup_sessions', '--batch-size', '2', *args, stdout=stdout)
+        return stdout.getvalue()
+
+    def test_abandons_in_keyset_batches(self):
+        ids = [session.id for session in self.stale]
+        output = self.run_command()
+        self.assertIn(f'Batch 1: abandoned 2 sessions (ids {ids[0]}-{ids[1]})', output)
+        self.assertIn(f'Batch 3: abandoned 1 sessions (ids {ids[4]}-{ids[4]})', output)
+        self.assertIn('Successfully abandoned 5 stale sessions in 3 batches.', output)
+        self.assertEqual(SurveySession.objects.filter(id__in=ids, status='abandoned').count(), 5)
+        self.current.refresh_from_db()
+        self.assertEqual(self.current.status, 'in_progress')
+        self.assertIn('No stale sessions found.', self.run_command())
+
+    def test_dry_run_lists_without_abandoning(self):
+        output = self.run_command('--dry-run')
+        self.assertIn('DRY RUN: Would abandon 5 stale sessions.', output)
+        self.assertIn(f'Session {self.stale[0].session_id} on Test Farm by grower', output)
+        self.assertFalse(SurveySession.objects.filter(status='abandoned').exists())
+
+
+class FixSessionDurationTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user('grower')
+        farm = make_farm(Grower.objects.create(user=user))
+        self.sessions = []
+        for _ in range(3):
+            session = SurveySession.objects.create(farm=farm, surveyor=user, target_plants_surveyed=1)
+            finish_survey_session(session)
+            session.refresh_from_db()
+            self.sessions.append(session)
+        self.long, self.negative, self.normal = self.sessions
+        SurveySession.objects.filter(pk=self.long.pk).update(end_time=self.long.start_time + timedelta(days=3))
+        SurveySession.objects.filter(pk=self.negative.pk).update(end_time=self.negative.start_time - timedelta(hours=1))
+
+    def run_command(self, *args):
+        stdout = StringIO()
+        call_command('fix_session_duration', *args, stdout=stdout)
+        return stdout.getvalue()
+
+    def test_dry_run_lists_sessions_without_fixing(self):
+        output = self.run_command('--dry-run')
+        self.assertIn('Found 2 sessions with unrealistic durations', output)
+        self.assertIn(f'Session {self.long.session_id}: 4320.0 minutes (0 observations)', output)
+        self.assertIn(f'Session {self.negative.session_id}: -60.0 minutes (0 observations)', output)
+        self.assertNotIn(str(self.normal.session_id), output)
+        self.long.refresh_from_db()
+        self.assertEqual(self.long.end_time - self.long.start_time, timedelta(days=3))
+
+    def test_fix_in_batches(self):
+        output = self.run_command('--batch-size', '1')
+        self.assertIn('1/2 sessions fixed', output)
+        self.assertIn('Fixed 2 sessions', output)
+        self.assertNotIn(str(self.long.session_id), output)
+        for session in (self.long, self.negative):
+            session.refresh_from_db()
+            self.assertEqual(session.end_time - session.start_time, timedelta(minutes=10))
+            self.assertEqual(session.duration(), 10.0)
+        self.assertIn('No problematic sessions found!', self.run_command())
+
+
+class FixSessionTargetsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('grower')
+        self.grower = Grower.objects.create(user=self.user)
+
+    def session_on(self, farm, required_plants=None):
+        if required_plants is not None:
+            SurveillanceCalculation.objects.create(
+                farm=farm, created_by=self.user, season='Wet', confidence_level=95, population_size=farm.total_plants(),
+                prevalence_percent=2, required_plants=required_plants, percentage_of_total=0,
+            )
+        return SurveySession.objects.create(farm=farm, surveyor=self.user, target_plants_surveyed=0)
+
+    def run_command(self, *args):
+        stdout = StringIO()
+        call_command('fix_session_targets', *args, stdout=stdout)
+        return stdout.getvalue()
+
+    def test_targets_come_from_the_calculation_or_the_fallback(self):
+        saved = self.session_on(make_farm(self.grower, 'Saved'), required_plants=42)
+        zero = self.session_on(make_farm(self.grower, 'Zero'), required_plants=0)
+        small = self.session_on(Farm.objects.create(owner=self.grower, name='Small', size_hectares=1, stocking_rate=30))
+        unknown = self.session_on(Farm.objects.create(owner=self.grower, name='Unknown'))
+
+        output = self.run_command('--batch-size', '2', '--verbosity', '2')
+        self.assertIn('Fixed 3 sessions successfully', output)
+        self.assertIn(f'Cannot fix session {unknown.session_id} on Unknown: no farm plant count', output)
+        self.assertIn('0 → 5 (from fallback (10% of plants, min 1, max 5))', output)
+        targets = dict(SurveySession.objects.values_list('id', 'target_plants_surveyed'))
+        self.assertEqual([targets[s.id] for s in (saved, zero, small, unknown)], [42, 5, 3, 0])
+
+    def test_dry_run_changes_nothing(self):
+        session = self.session_on(make_farm(self.grower), required_plants=0)
+        self.assertIn('DRY RUN: Would fix 1 sessions, 0 could not be fixed', self.run_command('--dry-run'))
+        session.refresh_from_db()
+        self.assertEqual(session.target_plants_surveyed, 0)
+
+
+class ArchiveTests(TestCase):
+    def test_archive_keeps_who_recorded_what(self):
+        lead = User.objects.create_user('lead')
+        teammate = User.objects.create_user('teammate')
+        farm = make_farm(Grower.objects.create(user=lead))
+        session = SurveySession.objects.create(farm=farm, surveyor=lead, target_plants_surveyed=4)
+        lead_participant, _ = join_survey_session(session, lead)
+        teammate_participant, _ = join_survey_session(session, teammate)
+        create_observation(lead_participant, {})
+        create_observation(teammate_participant, {})
+        session.abandon()
+
+        first, second = SessionParticipant.objects.filter(session=session).order_by('joined_at')
+        counts = archive_sessions(abandoned_days=0)
+        self.assertEqual(counts['abandoned'], 1)
+        self.assertFalse(SurveySession.objects.filter(pk=session.pk).exists())
+        self.assertFalse(SessionParticipant.objects.filter(session=session).exists())
+
+        archive = SessionArchive.objects.get(session_id=session.session_id)
+        recorded = {(row['plant_sequence_number'], row['recorded_by']) for row in archive.observation_rows()}
+        self.assertEqual(recorded, {(first.sequence_start, lead.pk), (second.sequence_start, teammate.pk)})
+        self.assertEqual(
+            [(p['user_id'], p['target_share'], p['sequence_start'], p['observations_recorded'])
+             for p in archive.participant_rows()],
+            [(lead.pk, 2, first.sequence_start, 1), (teammate.pk, 2, second.sequence_start, 1)],
+        )
+
+    def test_completed_sessions_stay_readable(self):
+        user = User.objects.create_user('grower')
+        farm = make_farm(Grower.objects.create(user=user))
+        completed = SurveySession.objects.create(farm=farm, surveyor=user, target_plants_surveyed=1)
+        participant, _ = join_survey_session(completed, user)
+        create_observation(participant, {})
+        finish_survey_session(completed)
+        abandoned = SurveySession.objects.create(farm=farm, surveyor=user)
+        abandoned.abandon()
+        SurveySession.objects.update(start_time=timezone.now() - timedelta(days=400))
+
+        self.assertEqual(archive_sessions(), {'abandoned': 1})
+        self.assertEqual(list(SessionArchive.objects.values_list('session_id', flat=True)), [abandoned.session_id])
+        self.client.force_login(user)
+        response = self.client.get(reverse('core:survey_session_detail', args=[completed.session_id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(self.client.get(reverse('core:record_list')), farm.name)
+
+    def test_starting_a_session_abandons_legacy_not_started_rows(self):
+        user = User.objects.create_user('grower')
+        farm = make_farm(Grower.objects.create(user=user))
+        legacy = SurveySession.objects.create(farm=farm, surveyor=user, status='not_started')
+        self.client.force_login(user)
+        self.client.post(reverse('core:start_survey_session', args=[farm.id]))
+        legacy.refresh_from_db()
+        self.assertEqual(legacy.status, 'abandoned')
+        self.assertEqual(SurveySession.objects.filter(farm=farm, status='in_progress').count(), 1)
@@ -0,0 +1,237 @@
+import functools
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from typing import Dict, Any, Optional, Callable
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+_current_span: ContextVar[Optional['Span']] = ContextVar('core_current_span', default=None)
+
+_exporter = None
+_exporter_pid = None
+_exporter_path = None
+_exporter_lock = threading.Lock()
+
+
+def tracing_enabled() -> bool:
+    return getattr(settings, 'TRACING_ENABLED', False)
+
+
+class Span:
+    """
+    One timed operation. Spans nest through a contextvar; each one counts the
+    queries run while it (or any child) was open.
+    """
+
+    def __init__(self, name: str, parent: Optional['Span'] = None, attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.parent = parent
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex
+        self.span_id = uuid.uuid4().hex[:16]
+        self.attributes = dict(attributes or {})
+        self.query_count = 0
+        self.query_time = 0.0
+        self.status = 'ok'
+        self.start_time = time.time()
+        self._started = time.perf_counter()
+        self.duration = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def finish(self) -> None:
+        self.duration = time.perf_counter() - self._started
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Chrome trace-event fields (name/ph/ts/dur/pid/tid/args) so the exported
+        lines load straight into chrome://tracing or Perfetto once wrapped in a
+        traceEvents array (see the export_traces command).
+        """
+        return {
+            'name': self.name,
+            'ph': 'X',
+            'ts': int(self.start_time * 1_000_000),
+            'dur': int((self.duration or 0) * 1_000_000),
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+            'args': {
+                'trace_id': self.trace_id,
+                'span_id': self.span_id,
+                'parent_id': self.parent.span_id if self.parent else None,
+                'status': self.status,
+                'db.query_count': self.query_count,
+                'db.time_ms': round(self.query_time * 1000, 3),
+                **self.attributes,
+            },
+        }
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def _count_queries(execute, sql, params, many, context):
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - started
+        span = _current_span.get()
+        while span is not None:
+            span.query_count += 1
+            span.query_time += duration
+            span = span.parent
+
+
+def _trace_base() -> Path:
+    return Path(getattr(settings, 'TRACE_FILE', Path(settings.BASE_DIR) / 'traces' / 'spans.jsonl'))
+
+
+def trace_file_for(pid: int) -> Path:
+    """This process's span log: TRACE_FILE with the PID before the suffix (spans.<pid>.jsonl)."""
+    base = _trace_base()
+    return base.with_name(f"{base.stem}.{pid}{base.suffix}")
+
+
+def prune_trace_files(keep: Optional[Path] = None) -> int:
+    """
+    Deletes the oldest span logs (of any process, backups included) until
+    all of them together fit in TRACE_MAX_TOTAL_BYTES. Per-process rotation
+    alone does not bound the directory, since every new worker PID starts
+    its own set of files. `keep` (the caller's live file) is never deleted.
+    Returns the number of files removed.
+    """
+    base = _trace_base()
+    pattern = f"{base.stem}.*{base.suffix}*"
+    limit = getattr(settings, 'TRACE_MAX_TOTAL_BYTES', 100 * 1024 * 1024)
+    files = []
+    for path in base.parent.glob(pattern):
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        files.append((stat.st_mtime, stat.st_size, path))
+
+    removed = total = 0
+    for _, size, path in sorted(files, key=lambda entry: entry[0], reverse=True):
+        total += size
+        if total <= limit or path == keep:
+            continue
+        try:
+            path.unlink()
+            removed += 1
+        except OSError as e:
+            logger.warning(f"Could not remove old span log {path}: {e}")
+    return removed
+
+
+class _SpanFileHandler(RotatingFileHandler):
+    """Rotates this process's span log, then prunes the span logs of all processes."""
+
+    def doRollover(self):
+        super().doRollover()
+        prune_trace_files(keep=Path(self.baseFilename))
+
+
+def _get_exporter() -> logging.Logger:
+    """
+    A dedicated, non-propagating logger writing one JSON span per line to a
+    rotating file. Each process writes its own file, since RotatingFileHandler
+    cannot rotate a file other processes still have open; the files of all
+    processes together are capped by prune_trace_files.
+    """
+    global _exporter, _exporter_pid, _exporter_path
+    with _exporter_lock:
+        path = trace_file_for(os.getpid())
+        if _exporter is None or _exporter_pid != os.getpid() or _exporter_path != path:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            prune_trace_files(keep=path)
+            handler = _SpanFileHandler(
+                path,
+                maxBytes=getattr(settings, 'TRACE_MAX_BYTES', 10 * 1024 * 1024),
+                backupCount=getattr(settings, 'TRACE_BACKUP_COUNT', 5),
+            )
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            exporter = logging.getLogger('core.tracing.export')
+            for old_handler in exporter.handlers:
+                # After a fork this is the parent's handler; only our copy of the file is closed
+                old_handler.close()
+            exporter.handlers = [handler]
+            exporter.setLevel(logging.INFO)
+            exporter.propagate = False
+            _exporter = exporter
+            _exporter_pid = os.getpid()
+            _exporter_path = path
+        return _exporter
+
+
+def export_span(span: Span) -> None:
+    try:
+        _get_exporter().info(json.dumps(span.to_dict(), default=str))
+    except OSError as e:
+        logger.error(f"Could not export span {span.name}: {e}")
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Times the enclosed block as a span, nested under the current one. A root
+    span also installs the query counter on every database connection.
+    Does nothing (yields None) when TRACING_ENABLED is off.
+    """
+    if not tracing_enabled():
+        yield None
+        return
+
+    parent = _current_span.get()
+    current = Span(name, parent, attributes)
+    token = _current_span.set(current)
+    with ExitStack() as stack:
+        if parent is None:
+            for conn in connections.all():
+                stack.enter_context(conn.execute_wrapper(_count_queries))
+        try:
+            yield current
+        except BaseException as e:
+            current.status = 'error'
+            current.set_attribute('error', f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            current.finish()
+            _current_span.reset(token)
+            export_span(current)
+
+
+def traced(name: Optional[str] = None, attributes: Optional[Callable[..., Dict[str, Any]]] = None):
+    """
+    Decorator form of span(). `attributes` receives the call's arguments and
+    returns the span attributes, e.g. lambda farm, *a, **kw: {'farm.id': farm.id}.
+    """
+    def decorator(func):
+        span_name = name or f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracing_enabled():
+                return func(*args, **kwargs)
+            try:
+                span_attributes = attributes(*args, **kwargs) if attributes else {}
+            except Exception as e:
+                logger.debug(f"Could not compute span attributes for {span_name}: {e}")
+                span_attributes = {}
+            with span(span_name, **span_attributes):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -42,8 +42,11 @@ urlpatterns = [
     # Survey Session Management
     path('farms/<int:farm_id>/sessions/start/', views.start_survey_session_view, name='start_survey_session'),
     path('sessions/<uuid:session_id>/active/', views.active_survey_session_view, name='active_survey_session'),
+    path('sessions/<uuid:session_id>/invite/', views.session_invite_view, name='session_invite'),
+    path('sessions/<uuid:session_id>/join/<slug:token>/', views.join_survey_session_view, name='join_survey_session'),
     path('farms/<int:farm_id>/sessions/', views.survey_session_list_view, name='survey_session_list'),
     path('sessions/<uuid:session_id>/detail/', views.survey_session_detail_view, name='survey_session_detail'),
+    path('sessions/<uuid:session_id>/observations/', views.session_observations_fragment, name='session_observations'),
     path('sessions/<uuid:session_id>/delete/', views.delete_survey_session_view, name='delete_survey_session'),
     
     # Records/Surveillance History
@@ -54,6 +57,11 @@ urlpatterns = [
     
     # API Endpoints
     path('api/address-suggestions/', views.address_suggestion_view, name='api_address_suggestions'),
+    path('api/farms/<int:farm_id>/boundary/', views.farm_boundary_api, name='api_farm_boundary'),
+    path('api/farms/nearby/', views.farms_nearby_api, name='api_farms_nearby'),
+    path('api/farms/in-bbox/', views.farms_in_bbox_api, name='api_farms_in_bbox'),
     path('api/survey/observation/create/', views.create_observation_api, name='api_create_observation'),
     path('api/survey/<uuid:session_id>/finish/', views.finish_survey_session_api, name='api_finish_survey'),
+    path('api/survey/<uuid:session_id>/progress/', views.session_progress_api, name='api_session_progress'),
+    path('api/survey/<uuid:session_id>/progress/stream/', views.session_progress_stream, name='api_session_progress_stream'),
 ]
\ No newline at end of file
@@ -1,5 +1,6 @@
 from django.shortcuts import render, redirect, get_object_or_404
-from django.http import JsonResponse, HttpResponse
+from django.conf import settings
+from django.http import JsonResponse, HttpResponse, HttpResponseForbidden, StreamingHttpResponse, Http404
 from django.contrib.auth import login
 from django.contrib.auth.decorators import login_required
 from django.db import models
@@ -9,9 +10,17 @@ from django.utils import timezone
 from django.urls import reverse
 from .season_utils import get_seasonal_stage_info, get_surveillance_frequency
 import json
+import time
 from decimal import Decimal
 from datetime import datetime, timedelta
-from django.views.decorators.http import require_POST
+from django.views.decorators.http import require_POST, require_GET, condition
+from django.core.cache import caches
+from django.template.loader import render_to_string
+from django.utils.cache import patch_cache_control
+from django.utils.safestring import mark_safe
+from django.middleware.csrf import get_token
+import hashlib
+import secrets
 
 from .forms import (
     SignUpForm, FarmForm, 
@@ -19,8 +28,7 @@ from .forms import (
 )
 from .models import (
     Farm, PlantType,
-    Pest, Disease,
-    Grower, Region, SurveillanceCalculation, SurveySession, Observation,
+    Grower, Region, SurveillanceCalculation, SurveySession, SessionParticipant, Observation,
     User, SeasonalStage
 )
 
@@ -31,14 +39,21 @@ from .services.farm_service import (
     fetch_and_save_cadastral_boundary
 )
 from .services.calculation_service import save_calculation_to_database
+from .services.spatial_service import find_farms_within_radius, find_farms_in_bbox
 
 from .services.surveillance_service import (
-    create_observation, get_surveillance_recommendations,
+    create_observation, finish_survey_session, get_surveillance_recommendations, get_observation_page,
+    join_survey_session,
 )
 from .services.geoscape_service import search_addresses
 
 from .season_utils import get_seasonal_stage_info
 from .calculations import calculate_surveillance_effort, DEFAULT_CONFIDENCE
+from .db_router import replica_reads
+from .query_budget import query_budget
+from . import metrics
+from .tracing import span
+from .taxonomy import get_taxonomy
 
 import logging
 logger = logging.getLogger(__name__)
@@ -63,6 +78,8 @@ def signup_view(request):
     return render(request, 'core/signup.html', {'form': form})
 
 
+@query_budget(max_queries=15, max_repeats=3)
+@replica_reads
 @login_required
 def home_view(request):
     farms = get_user_farms(request.user)
@@ -96,7 +113,7 @@ def create_farm_view(request):
 
 @login_required
 def farm_detail_view(request, farm_id):
-    farm, error = get_farm_details(farm_id, request.user)
+    farm, error = get_farm_details(farm_id, request.user, defer_boundary=True)
     if error:
         logger.warning(f"Farm detail access failed for farm_id {farm_id}, user {request.user.username}: {error}")
         messages.error(request, error)
@@ -106,31 +123,32 @@ def farm_detail_view(request, farm_id):
 
     recommendations = get_surveillance_recommendations(farm)
     
-    calculation_results = None
-    try:
-        latest_calc = SurveillanceCalculation.objects.filter(farm=farm, is_current=True).latest('date_created')
-        calculation_results = latest_calc.to_dict()
-        calculation_results['error'] = None
-        logger.info(f"Farm Detail: Displaying saved calculation ID {latest_calc.id} for farm {farm.id}")
-    except SurveillanceCalculation.DoesNotExist:
-        logger.info(f"Farm Detail: No saved calculation for farm {farm.id}. Calculating with default confidence.")
-        if recommendations.get('stage_name') != 'Unknown' and farm.total_plants():
-            seasonal_info = get_seasonal_stage_info()
-            prevalence_p_for_calc = seasonal_info.get('prevalence_p')
-
-            if prevalence_p_for_calc is not None:
-                calculation_results = calculate_surveillance_effort(
-                    farm=farm,
-                    confidence_level_percent=DEFAULT_CONFIDENCE,
-                    prevalence_p=prevalence_p_for_calc 
-                )
+    with span('farm_detail.calculation', **{'farm.id': farm.id}):
+        calculation_results = None
+        try:
+            latest_calc = SurveillanceCalculation.objects.filter(farm=farm, is_current=True).latest('date_created')
+            calculation_results = latest_calc.to_dict()
+            calculation_results['error'] = None
+            logger.info(f"Farm Detail: Displaying saved calculation ID {latest_calc.id} for farm {farm.id}")
+        except SurveillanceCalculation.DoesNotExist:
+            logger.info(f"Farm Detail: No saved calculation for farm {farm.id}. Calculating with default confidence.")
+            if recommendations.get('stage_name') != 'Unknown' and farm.total_plants():
+                seasonal_info = get_seasonal_stage_info()
+                prevalence_p_for_calc = seasonal_info.get('prevalence_p')
+
+                if prevalence_p_for_calc is not None:
+                    calculation_results = calculate_surveillance_effort(
+                        farm=farm,
+                        confidence_level_percent=DEFAULT_CONFIDENCE,
+                        prevalence_p=prevalence_p_for_calc 
+                    )
+                else:
+                    calculation_results = {'error': "Could not determine prevalence for current stage."}
             else:
-                calculation_results = {'error': "Could not determine prevalence for current stage."}
-        else:
-            calculation_results = {'error': "Farm details (plants) or seasonal stage missing for calculation."}
-    except Exception as e:
-        logger.error(f"Farm Detail: Error fetching/calculating for display: {e}")
-        calculation_results = {'error': f"Error retrieving calculation: {e}"}
+                calculation_results = {'error': "Farm details (plants) or seasonal stage missing for calculation."}
+        except Exception as e:
+            logger.error(f"Farm Detail: Error fetching/calculating for display: {e}")
+            calculation_results = {'error': f"Error retrieving calculation: {e}"}
 
     completed_sessions = SurveySession.objects.filter(
         farm=farm,
@@ -155,10 +173,22 @@ def farm_detail_view(request, farm_id):
         'surveillance_frequency': get_surveillance_frequency(),
         'last_surveillance_date': farm.last_surveillance_date(),
         'next_due_date': farm.next_due_date(),
-        'farm_boundary_json': farm.boundary
+        'farm_boundary_encoded': farm.boundary_encoded,
+        'farm_bbox': farm.bounding_box(),
+        'farm_boundary_url': reverse('core:api_farm_boundary', kwargs={'farm_id': farm.id}),
     }
-    
-    return render(request, 'core/farm_detail.html', context)
+
+    with span('render', template='core/farm_detail.html'):
+        return render(request, 'core/farm_detail.html', context)
+
+
+@login_required
+def farm_boundary_api(request, farm_id):
+    """Full-resolution boundary, fetched by the map only when zoomed in past the simplified copy."""
+    farm, error = get_farm_details(farm_id, request.user)
+    if error:
+        return JsonResponse({'status': 'error', 'message': error}, status=404)
+    return JsonResponse({'status': 'success', 'boundary': farm.boundary})
 
 
 @login_required
@@ -231,8 +261,10 @@ def calculator_view(request):
     current_prevalence_p = stage_info.get('prevalence_p')
     month_used_for_calc = stage_info.get('month_used')
     
-    current_pests_qs = Pest.objects.filter(name__in=stage_info.get('pest_names', [])).order_by('name')
-    current_diseases_qs = Disease.objects.filter(name__in=stage_info.get('disease_names', [])).order_by('name')
+    taxonomy = get_taxonomy()
+    current_stage_record = taxonomy.stages.get(stage_info.get('stage_id'))
+    current_pests = taxonomy.pests_for(current_stage_record.pest_ids) if current_stage_record else []
+    current_diseases = taxonomy.diseases_for(current_stage_record.disease_ids) if current_stage_record else []
 
     if request.GET and 'farm' in request.GET and 'confidence_level' in request.GET:
         form_submitted = True
@@ -273,8 +305,8 @@ def calculator_view(request):
         'current_stage': current_stage,
         'current_prevalence_p': float(current_prevalence_p * 100) if current_prevalence_p is not None else None,
         'month_used_for_calc': month_used_for_calc,
-        'current_pests': current_pests_qs,
-        'current_diseases': current_diseases_qs,
+        'current_pests': current_pests,
+        'current_diseases': current_diseases,
     }
     return render(request, 'core/calculator.html', context)
 
@@ -307,6 +339,8 @@ def profile_view(request):
     return render(request, 'core/profile.html', context)
 
 
+@query_budget(max_queries=15, max_repeats=3)
+@replica_reads
 @login_required
 def record_list_view(request):
     grower = request.user.grower_profile
@@ -335,6 +369,7 @@ def record_list_view(request):
     return render(request, 'core/record_list.html', context)
 
 
+@replica_reads
 @login_required
 def dashboard_view(request):
     grower = request.user.grower_profile
@@ -417,6 +452,53 @@ def address_suggestion_view(request):
     return JsonResponse(response_data)
 
 
+@login_required
+def farms_nearby_api(request):
+    """
+    Farms within radius_km of a detection, given as lat/lng or as the farm_id
+    where it was recorded. Staff see all farms, growers only their own.
+    """
+    exclude_farm_id = None
+    try:
+        radius_km = float(request.GET.get('radius_km', 10))
+        if request.GET.get('farm_id'):
+            origin = Farm.objects.filter(id=int(request.GET['farm_id']), centroid_lat__isnull=False)
+            if not request.user.is_staff:
+                origin = origin.filter(owner__user=request.user)
+            origin = origin.only('id', 'centroid_lat', 'centroid_lng').first()
+            if origin is None:
+                return JsonResponse({'status': 'error', 'message': 'Farm not found or has no boundary.'}, status=404)
+            lat, lng, exclude_farm_id = origin.centroid_lat, origin.centroid_lng, origin.id
+        else:
+            lat = float(request.GET['lat'])
+            lng = float(request.GET['lng'])
+    except (KeyError, ValueError):
+        return JsonResponse({'status': 'error', 'message': 'Provide lat and lng (or farm_id) and a numeric radius_km.'}, status=400)
+
+    farms, error = find_farms_within_radius(lat, lng, radius_km, user=request.user, exclude_farm_id=exclude_farm_id)
+    if error:
+        return JsonResponse({'status': 'error', 'message': error}, status=400)
+    return JsonResponse({'status': 'success', 'origin': [lat, lng], 'radius_km': radius_km, 'count': len(farms), 'farms': farms})
+
+
+@login_required
+def farms_in_bbox_api(request):
+    """
+    Farms overlapping bbox=min_lng,min_lat,max_lng,max_lat (GeoJSON order), at
+    most FARM_BBOX_QUERY_LIMIT; `truncated` tells the client to zoom in.
+    """
+    try:
+        min_lng, min_lat, max_lng, max_lat = (float(value) for value in request.GET['bbox'].split(','))
+    except (KeyError, ValueError):
+        return JsonResponse({'status': 'error', 'message': 'bbox must be min_lng,min_lat,max_lng,max_lat.'}, status=400)
+
+    limit = settings.FARM_BBOX_QUERY_LIMIT
+    farms, error = find_farms_in_bbox(min_lat, min_lng, max_lat, max_lng, user=request.user, limit=limit)
+    if error:
+        return JsonResponse({'status': 'error', 'message': error}, status=400)
+    return JsonResponse({'status': 'success', 'count': len(farms), 'truncated': len(farms) >= limit, 'farms': farms})
+
+
 @login_required
 def start_survey_session_view(request, farm_id):
     farm, error = get_farm_details(farm_id, request.user)
@@ -424,15 +506,23 @@ def start_survey_session_view(request, farm_id):
         messages.error(request, error)
         return redirect('core:myfarms') 
 
-    # Clean up any incomplete sessions for this farm/user before creating new one
-    incomplete_sessions = SurveySession.objects.filter(
-        farm=farm, 
-        surveyor=request.user, 
-        status__in=['in_progress', 'not_started']
-    )
-    if incomplete_sessions.exists():
-        logger.info(f"Cleaning up {incomplete_sessions.count()} incomplete sessions for farm {farm.id}, user {request.user.username}")
-        incomplete_sessions.delete()
+    # A session the user shares with teammates still surveying is resumed, not replaced
+    in_progress = SurveySession.objects.filter(farm=farm, status='in_progress')
+    team_session = in_progress.filter(participants__user=request.user).filter(
+        id__in=SessionParticipant.objects.exclude(user=request.user).values('session_id')
+    ).first()
+    if team_session:
+        messages.info(request, f"A team survey of {farm.name} is in progress. Resuming it.")
+        return redirect('core:active_survey_session', session_id=team_session.session_id)
+
+    # Abandon any incomplete sessions for this farm/user before creating new one,
+    # including legacy 'not_started' rows. A single UPDATE: their observations
+    # are kept and archived later (core.archive).
+    abandoned = SurveySession.objects.filter(
+        farm=farm, surveyor=request.user, status__in=['in_progress', 'not_started']
+    ).update(status='abandoned', end_time=timezone.now())
+    if abandoned:
+        logger.info(f"Abandoned {abandoned} incomplete sessions for farm {farm.id}, user {request.user.username}")
 
     # Get target plants from current calculation
     target_plants = None
@@ -471,6 +561,11 @@ def start_survey_session_view(request, farm_id):
             start_time=timezone.now(),
             target_plants_surveyed=target_plants
         )
+        # The surveyor is the first participant, with the whole target as its share
+        participant, error = join_survey_session(new_session, request.user)
+        if error:
+            new_session.abandon()
+            raise RuntimeError(error)
         
         if target_plants:
             messages.success(request, f"New survey session started for {farm.name}. Target: {target_plants} plants.")
@@ -486,9 +581,66 @@ def start_survey_session_view(request, farm_id):
 
 
 
+@require_POST
+@login_required
+def session_invite_view(request, session_id):
+    """
+    Farm owner only: issues a new join link for an in-progress session
+    (revoking the previous one), or revokes it with action=revoke.
+    """
+    session = get_object_or_404(
+        SurveySession.objects.select_related('farm'), session_id=session_id, farm__owner__user=request.user
+    )
+    if not session.is_active():
+        messages.warning(request, f"The survey of {session.farm.name} has already ended.")
+        return redirect('core:survey_session_detail', session_id=session.session_id)
+    if request.POST.get('action') == 'revoke':
+        session.revoke_invite()
+        messages.info(request, "The join link no longer works.")
+    else:
+        session.create_invite()
+        messages.success(request, "New join link created. Earlier links no longer work.")
+    return redirect('core:active_survey_session', session_id=session.session_id)
+
+
+@login_required
+def join_survey_session_view(request, session_id, token):
+    """
+    Join link for teammates, issued by the farm owner (session_invite_view):
+    GET asks for confirmation, POST adds the user as a participant with their
+    own block of plant numbers and share of the target.
+    """
+    session = get_object_or_404(SurveySession.objects.select_related('farm', 'surveyor'), session_id=session_id)
+    if session.participants.filter(user=request.user).exists():
+        return redirect('core:active_survey_session', session_id=session.session_id)
+    if not session.invite_matches(token):
+        # Same answer as for an unknown session: the link reveals nothing without a valid token
+        raise Http404("No such survey session.")
+    if not session.is_active():
+        messages.warning(request, f"The survey of {session.farm.name} has already ended.")
+        return redirect('core:dashboard')
+
+    if request.method == 'POST':
+        participant, error = join_survey_session(session, request.user)
+        if error:
+            messages.error(request, error)
+            return redirect('core:dashboard')
+        share = f" Your share: {participant.target_share} plants." if participant.target_share is not None else ""
+        messages.success(request, f"You joined the survey of {session.farm.name}.{share}")
+        return redirect('core:active_survey_session', session_id=session.session_id)
+
+    return render(request, 'core/join_survey_session.html', {
+        'session': session,
+        'farm': session.farm,
+        'participants': session.participants.select_related('user'),
+    })
+
+
 @login_required
 def active_survey_session_view(request, session_id):
-    session = get_object_or_404(SurveySession, session_id=session_id, surveyor=request.user)
+    session = get_object_or_404(
+        SurveySession.objects.with_participant(request.user).select_related('farm__owner'), session_id=session_id
+    )
     
     # If session is not active, redirect to details or farm
     if session.status == 'completed':
@@ -502,27 +654,24 @@ def active_survey_session_view(request, session_id):
     
     recommendations = get_surveillance_recommendations(farm)
     
-    observations = Observation.objects.filter(
-        session=session, 
-        status='completed'
-    ).select_related().order_by('-observation_time')
+    # Only the newest page; older ones are loaded from session_observations_fragment
+    observations, next_cursor = get_observation_page(session)
     
-    observation_count = observations.count()
-    target_plants = session.target_plants_surveyed or 0
-    
-    # Fixed progress calculation
-    if target_plants > 0:
-        progress_percent = min(int((observation_count / target_plants) * 100), 100)
-    else:
-        progress_percent = 0
-
-    unique_pests_count = Pest.objects.filter(observations__in=observations).distinct().count()
-    unique_diseases_count = Disease.objects.filter(observations__in=observations).distinct().count()
+    # Counts come from the participants' running counters (see SurveySession.progress)
+    participants = list(session.participants.select_related('user'))
+    participant = next(p for p in participants if p.user_id == request.user.pk)
+    progress = session.progress(participants)
+    observation_count = progress['observation_count']
+    target_plants = progress['target_plants']
+    progress_percent = progress['progress_percent']
+    unique_pests_count = progress['unique_pests']
+    unique_diseases_count = progress['unique_diseases']
     
     context = {
         'session': session,
         'farm': farm,
         'observations': observations,
+        'next_cursor': next_cursor,
         'form': ObservationForm(),
         'observation_count': observation_count,
         'completed_plants': observation_count,
@@ -531,6 +680,16 @@ def active_survey_session_view(request, session_id):
         'completion_percentage': progress_percent,
         'unique_pests_count': unique_pests_count,
         'unique_diseases_count': unique_diseases_count,
+        'participant': participant,
+        'participants': participants,
+        'next_sequence_number': participant.next_sequence_number(),
+        'progress_stream_enabled': settings.SESSION_PROGRESS_SSE_ENABLED,
+        'progress_poll_ms': settings.SESSION_PROGRESS_CLIENT_POLL_MS,
+        # Only the farm owner hands out join links
+        'can_invite': farm.owner.user_id == request.user.pk,
+        'join_url': request.build_absolute_uri(
+            reverse('core:join_survey_session', kwargs={'session_id': session.session_id, 'token': session.invite_token})
+        ) if session.invite_token and farm.owner.user_id == request.user.pk else None,
         'recommended_pests_ids': [p.id for p in recommendations.get('priority_pests', [])],
         'recommended_diseases_ids': [d.id for d in recommendations.get('priority_diseases', [])],
         'recommended_pests': recommendations.get('priority_pests'),
@@ -554,62 +713,65 @@ def create_observation_api(request):
         return JsonResponse({'status': 'error', 'message': 'Session ID is required.'}, status=400)
 
     try:
-        session = SurveySession.objects.get(session_id=session_id, surveyor=request.user)
+        participant = SessionParticipant.objects.select_related('session').get(
+            session__session_id=session_id, user=request.user
+        )
+        session = participant.session
         if not session.is_active():
             logger.warning(f"Attempt to add observation to inactive session {session_id}.")
             return JsonResponse({'status': 'error', 'message': 'This survey session is no longer active.'}, status=400)
-    except SurveySession.DoesNotExist:
+    except SessionParticipant.DoesNotExist:
         logger.error(f"create_observation_api: Survey session {session_id} not found for user {request.user.username}.")
         return JsonResponse({'status': 'error', 'message': 'Survey session not found.'}, status=404)
 
-    # Check if adding this observation would exceed target
-    current_count = session.observation_count()
+    # Check if adding this observation would exceed this surveyor's share of the target
     target_plants = session.target_plants_surveyed
-    
-    if target_plants and current_count >= target_plants:
-        logger.warning(f"Attempt to add observation beyond target for session {session_id}. Current: {current_count}, Target: {target_plants}")
+    if participant.share_reached():
+        logger.warning(f"Attempt to add observation beyond share for session {session_id}. Current: {participant.observations_recorded}, Share: {participant.target_share}")
         return JsonResponse({
             'status': 'error', 
-            'message': f'Cannot add more observations. You have reached the target of {target_plants} plants. Please finish the session.'
+            'message': f'Cannot add more observations. You have surveyed your share of {participant.target_share} plants.'
         }, status=400)
 
     # Create form without requiring plant_sequence_number from user
     form_data = request.POST.copy()
     
-    # Auto-generate the next plant sequence number
-    last_obs = Observation.objects.filter(session=session).order_by('-plant_sequence_number').first()
-    next_sequence = (last_obs.plant_sequence_number + 1) if last_obs and last_obs.plant_sequence_number is not None else 1
-    form_data['plant_sequence_number'] = next_sequence
+    # The plant number comes from this participant's block (see create_observation)
+    form_data.pop('plant_sequence_number', None)
     
     form = ObservationForm(form_data)
     
     if form.is_valid():
         observation_data = form.cleaned_data
-        observation_data['pests_observed'] = list(form.cleaned_data['pests_observed'].values_list('id', flat=True))
-        observation_data['diseases_observed'] = list(form.cleaned_data['diseases_observed'].values_list('id', flat=True))
+        observation_data['pests_observed'] = form.cleaned_data['pests_observed']
+        observation_data['diseases_observed'] = form.cleaned_data['diseases_observed']
 
-        obs, error = create_observation(session, observation_data)
+        obs, error = create_observation(participant, observation_data)
         if obs:
             logger.info(f"Observation {obs.id} created successfully for session {session.id}.")
             obs_data_for_js = obs.to_dict()
             obs_data_for_js['time'] = obs.observation_time.strftime('%I:%M %p')
 
-            new_count = session.observation_count()
-            target_reached = target_plants and new_count >= target_plants
+            # create_observation updated the participant's running counters
+            progress = session.progress()
+            target_reached = progress['target_reached']
 
             response_data = {
                 'status': 'success',
                 'message': 'Observation saved.',
                 'observation': obs_data_for_js,
-                'observation_count': new_count,
-                'unique_pests': session.get_unique_pests().count(),
-                'unique_diseases': session.get_unique_diseases().count(),
+                'observation_count': progress['observation_count'],
+                'unique_pests': progress['unique_pests'],
+                'unique_diseases': progress['unique_diseases'],
                 'target_reached': target_reached,
-                'next_sequence_number': next_sequence + 1
+                'next_sequence_number': participant.next_sequence_number(),
+                'participants': progress['participants'],
             }
             
             if target_reached:
                 response_data['message'] = f'Observation saved. Target of {target_plants} plants reached! You can now finish the session.'
+            elif participant.share_reached():
+                response_data['message'] = f'Observation saved. You have surveyed your share of {participant.target_share} plants.'
 
             return JsonResponse(response_data)
         else:
@@ -620,11 +782,91 @@ def create_observation_api(request):
         return JsonResponse({'status': 'error', 'message': 'Invalid data.', 'errors': form.errors.get_json_data()}, status=400)
 
 
+def _get_watchable_session(user, session_id):
+    """A session the user may watch: one they take part in, or one on a farm they own."""
+    return get_object_or_404(
+        SurveySession.objects.filter(models.Q(participants__user=user) | models.Q(farm__owner__user=user)).distinct(),
+        session_id=session_id,
+    )
+
+
+@require_GET
+@login_required
+def session_observations_fragment(request, session_id):
+    """
+    HTML list items for one page of a session's observations, newest first.
+    `before` is the cursor from the previous page (an observation id); the
+    fragment ends with a "load older" item carrying the next cursor, if any.
+    """
+    session = _get_watchable_session(request.user, session_id)
+    try:
+        before = int(request.GET['before']) if 'before' in request.GET else None
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': 'before must be an observation id.'}, status=400)
+    observations, next_cursor = get_observation_page(session, before=before)
+    return render(request, 'core/partials/active_session_observation_items.html', {
+        'session': session,
+        'observations': observations,
+        'next_cursor': next_cursor,
+    })
+
+
+@require_GET
+@login_required
+def session_progress_api(request, session_id):
+    """Live progress of a session, from its running counters."""
+    session = _get_watchable_session(request.user, session_id)
+    return JsonResponse(session.progress())
+
+
+@require_GET
+@login_required
+def session_progress_stream(request, session_id):
+    """
+    Server-Sent Events stream of a session's progress. Sends a `progress` event
+    whenever the counters change, a comment every SESSION_PROGRESS_KEEPALIVE
+    seconds otherwise, and closes when the session ends or after
+    SESSION_PROGRESS_STREAM_SECONDS (the browser's EventSource reconnects).
+    Each check reads only the session row and its participant rows.
+    Only available with SESSION_PROGRESS_SSE_ENABLED, since each open stream
+    occupies a worker.
+    """
+    if not settings.SESSION_PROGRESS_SSE_ENABLED:
+        raise Http404("Progress streaming is not enabled.")
+    session = _get_watchable_session(request.user, session_id)
+    fields = ['session_id', 'status', 'target_plants_surveyed']
+
+    def events():
+        started = last_sent = time.monotonic()
+        last_payload = None
+        yield f"retry: {settings.SESSION_PROGRESS_RETRY_MS}\n\n"
+        while True:
+            current = SurveySession.objects.only(*fields).get(pk=session.pk)
+            progress = current.progress()
+            payload = json.dumps(progress)
+            now = time.monotonic()
+            if payload != last_payload:
+                yield f"event: progress\ndata: {payload}\n\n"
+                last_payload, last_sent = payload, now
+            elif now - last_sent >= settings.SESSION_PROGRESS_KEEPALIVE:
+                yield ": keepalive\n\n"
+                last_sent = now
+            if progress['status'] != 'in_progress' or now - started >= settings.SESSION_PROGRESS_STREAM_SECONDS:
+                break
+            time.sleep(settings.SESSION_PROGRESS_POLL_INTERVAL)
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Don't let nginx buffer the stream
+    return response
+
+
 @require_POST
 @login_required
 def finish_survey_session_api(request, session_id):
     try:
-        session = SurveySession.objects.get(session_id=session_id, surveyor=request.user)
+        # Any participant may finish a team session once the target is reached
+        session = SurveySession.objects.with_participant(request.user).get(session_id=session_id)
     except SurveySession.DoesNotExist:
         return JsonResponse({'status': 'error', 'message': 'Survey session not found.'}, status=404)
     
@@ -649,10 +891,9 @@ def finish_survey_session_api(request, session_id):
         }, status=400)
     
     # Set the end time to now and mark as completed
-    current_time = timezone.now()
-    session.status = 'completed'
-    session.end_time = current_time
-    session.save(update_fields=['status', 'end_time'])
+    success, error = finish_survey_session(session)
+    if not success:
+        return JsonResponse({'status': 'error', 'message': error}, status=500)
     
     # Log the completion for debugging
     logger.info(f"Session {session_id} completed:")
@@ -670,6 +911,7 @@ def finish_survey_session_api(request, session_id):
     })
 
 
+@replica_reads
 @login_required
 def survey_session_list_view(request, farm_id):
     farm = get_object_or_404(Farm, id=farm_id, owner=request.user.grower_profile)
@@ -683,25 +925,84 @@ def survey_session_list_view(request, farm_id):
     return render(request, 'core/survey_session_list.html', context)
 
 
+def _completed_session_version(session_id, snapshot):
+    """
+    Version of everything a completed session's pages show: its completion
+    snapshot (rebuilt only by repair commands), the deploy and the taxonomy
+    names.
+    """
+    raw = f"{session_id}:{json.dumps(snapshot, sort_keys=True)}:{settings.DEPLOY_VERSION}:{get_taxonomy().version}"
+    return hashlib.sha1(raw.encode()).hexdigest()[:20]
+
+
+def _session_detail_etag(request, session_id):
+    """
+    Strong ETag for the detail page of a completed session, from one indexed
+    lookup. None (no conditional handling) for other sessions, and while a
+    flash message is waiting to be shown. The page also carries the navbar's
+    username and CSRF token, so the ETag covers the user and the CSRF secret:
+    another login in the same browser, or a rotated secret, gets a fresh page.
+    The farm name and surveyor username in the header are not part of the
+    snapshot and can still change, so they are covered too (the cached
+    observations fragment shows neither).
+    """
+    if not request.user.is_authenticated or len(messages.get_messages(request)):
+        return None
+    row = SurveySession.objects.with_participant(request.user).filter(
+        session_id=session_id, status='completed'
+    ).values_list('completion_snapshot', 'farm__name', 'surveyor__username').first()
+    if not row or not row[0]:
+        return None
+    snapshot, farm_name, surveyor_username = row
+    # get_token() makes sure a secret exists; the masked token it returns changes on every call
+    get_token(request)
+    raw = json.dumps([
+        _completed_session_version(session_id, snapshot), farm_name, surveyor_username,
+        request.user.pk, request.META.get('CSRF_COOKIE', ''),
+    ])
+    return hashlib.sha1(raw.encode()).hexdigest()[:20]
+
+
+def _session_observations_html(session):
+    """
+    The observations partial of the detail page. A completed session's is
+    rendered once and cached under its version, so repeat views skip the
+    observation queries.
+    """
+    def render_observations():
+        observations = Observation.objects.filter(
+            session=session, 
+            status='completed'
+        ).prefetch_related(
+            'pests_observed', 
+            'diseases_observed'
+        ).order_by('plant_sequence_number', 'observation_time')
+        return render_to_string('core/partials/survey_session_observations_list.html', {'observations': observations})
+
+    if not session.completion_snapshot:
+        return render_observations()
+    cache = caches[settings.SESSION_FRAGMENT_CACHE_ALIAS]
+    key = f"session_observations:{_completed_session_version(session.session_id, session.completion_snapshot)}"
+    html = cache.get(key)
+    metrics.record_cache('session_fragments', html is not None)
+    if html is None:
+        html = render_observations()
+        cache.set(key, html, timeout=settings.SESSION_FRAGMENT_CACHE_TIMEOUT)
+    return mark_safe(html)
+
+
+@replica_reads
 @login_required
+@condition(etag_func=_session_detail_etag)
 def survey_session_detail_view(request, session_id):
     session = get_object_or_404(
-        SurveySession.objects.select_related('farm', 'surveyor'), 
-        session_id=session_id, 
-        surveyor=request.user
+        SurveySession.objects.with_participant(request.user).select_related('farm', 'surveyor'), 
+        session_id=session_id
     )
     
-    observations = Observation.objects.filter(
-        session=session, 
-        status='completed'
-    ).prefetch_related(
-        'pests_observed', 
-        'diseases_observed'
-    ).order_by('plant_sequence_number', 'observation_time')
-    
-    completed_count = observations.count()
-    unique_pests = Pest.objects.filter(observations__in=observations).distinct().order_by('name')
-    unique_diseases = Disease.objects.filter(observations__in=observations).distinct().order_by('name')
+    # Completed sessions read their counts and findings from the completion snapshot
+    stats = session.session_stats()
+    unique_pests, unique_diseases = session.findings(stats)
 
     # Debug logging for problematic sessions
     if session.duration() and session.duration() > 1440:  # More than 24 hours
@@ -710,14 +1011,18 @@ def survey_session_detail_view(request, session_id):
     context = {
         'session': session,
         'farm': session.farm,
-        'observations': observations,
-        'completed_count': completed_count,
-        'unique_pests_count': unique_pests.count(),
-        'unique_diseases_count': unique_diseases.count(),
+        'observations_html': _session_observations_html(session),
+        'completed_count': stats['observation_count'],
+        'unique_pests_count': len(unique_pests),
+        'unique_diseases_count': len(unique_diseases),
         'unique_pests': unique_pests,
         'unique_diseases': unique_diseases,
     }
-    return render(request, 'core/survey_session_detail.html', context)
+    response = render(request, 'core/survey_session_detail.html', context)
+    if session.completion_snapshot:
+        # Browsers revalidate with the ETag instead of re-downloading
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
 
 
 @login_required
@@ -739,4 +1044,27 @@ def delete_survey_session_view(request, session_id):
     
     # If not POST, redirect back to session list (shouldn't normally happen with the modal)
     messages.warning(request, "Invalid request to delete session.")
-    return redirect('core:survey_session_list', farm_id=farm.id)
\ No newline at end of file
+    return redirect('core:survey_session_list', farm_id=farm.id)
+
+def _has_metrics_token(request):
+    token = getattr(settings, 'METRICS_BEARER_TOKEN', '')
+    scheme, _, credentials = request.headers.get('Authorization', '').partition(' ')
+    return bool(token) and scheme.lower() == 'bearer' and secrets.compare_digest(credentials.encode(), token.encode())
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint, merged across worker processes. The client
+    address must be in METRICS_ALLOWED_IPS (an empty list allows nobody), and
+    the request must come from a staff user or carry METRICS_BEARER_TOKEN.
+    """
+    if request.META.get('REMOTE_ADDR') not in getattr(settings, 'METRICS_ALLOWED_IPS', []):
+        return HttpResponseForbidden("Metrics are not available from this address.")
+    if not (request.user.is_staff or _has_metrics_token(request)):
+        return HttpResponseForbidden("Metrics need a staff login or the scrape token.")
+    gauges = {
+        'survey_sessions_open': (
+            'Survey sessions currently in progress.',
+            {(): SurveySession.objects.filter(status='in_progress').count()},
+        ),
+    }
+    return HttpResponse(metrics.render(gauges), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,165 @@
+import atexit
+import contextvars
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Callable, Any
+
+from django.conf import settings
+from django.db import transaction, connection
+
+from .db_tuning import write_transaction
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+_UNSET = object()
+
+
+class WriteTimeout(Exception):
+    """The writer did not start a write in time; it was cancelled, so nothing was saved."""
+
+
+class GroupCommitWriter:
+    """
+    Funnels database writes through one thread per process. Writes submitted
+    within a short window are applied in a single transaction (group commit),
+    each inside its own savepoint so one failing write does not roll back the
+    others. Callers get a Future that resolves once the batch has committed.
+    Jobs run in the writer thread's own context; run_write() hands them the
+    caller's.
+    """
+
+    def __init__(self, window_ms: float = 5, max_batch: int = 200):
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='db-group-commit-writer', daemon=True)
+        self._thread.start()
+
+    def submit(self, func: Callable, *args, **kwargs) -> Future:
+        future = Future()
+        self._queue.put((func, args, kwargs, future))
+        return future
+
+    def stop(self, timeout: float = 5.0):
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def _collect_batch(self, first):
+        batch = [first]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                self._queue.put(_STOP)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        try:
+            while True:
+                first = self._queue.get()
+                if first is _STOP:
+                    break
+                self._apply(self._collect_batch(first))
+        finally:
+            connection.close()
+
+    def _apply(self, batch):
+        outcomes = []
+        try:
+            connection.close_if_unusable_or_obsolete()
+            with write_transaction():
+                for func, args, kwargs, future in batch:
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    try:
+                        with transaction.atomic():
+                            outcomes.append((future, func(*args, **kwargs), None))
+                    except Exception as e:
+                        outcomes.append((future, None, e))
+        except Exception as e:
+            # The batch itself failed to commit, so none of its writes landed.
+            logger.exception(f"Group commit of {len(batch)} writes failed: {e}")
+            for _, _, _, future in batch:
+                if future.running():
+                    future.set_exception(e)
+            return
+
+        for future, result, error in outcomes:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+        if len(batch) > 1:
+            logger.debug(f"Group-committed {len(batch)} writes")
+
+
+_writer = None
+_writer_pid = None
+_writer_lock = threading.Lock()
+
+
+def get_writer() -> GroupCommitWriter:
+    """Returns this process's writer, starting it on first use (and again after a fork)."""
+    global _writer, _writer_pid
+    with _writer_lock:
+        if _writer is None or _writer_pid != os.getpid():
+            _writer = GroupCommitWriter(
+                window_ms=getattr(settings, 'WRITE_QUEUE_WINDOW_MS', 5),
+                max_batch=getattr(settings, 'WRITE_QUEUE_MAX_BATCH', 200),
+            )
+            _writer_pid = os.getpid()
+            atexit.register(_writer.stop)
+        return _writer
+
+
+def serialized_writes_enabled() -> bool:
+    return getattr(settings, 'SERIALIZE_DB_WRITES', False)
+
+
+def run_write(func: Callable, *args, **kwargs) -> Any:
+    """
+    Runs a write either directly or, when SERIALIZE_DB_WRITES is on, through
+    the group-commit writer, blocking until it has committed. The write runs
+    in a copy of the caller's context (request id, replica routing, tracing
+    span), and the context changes it leaves behind are copied back, as if it
+    had run inline. Raises WriteTimeout if the writer has not started it
+    within WRITE_QUEUE_TIMEOUT seconds.
+    """
+    if not serialized_writes_enabled():
+        return func(*args, **kwargs)
+    if transaction.get_connection().in_atomic_block:
+        # The caller's transaction would not see the writer's commit (and on
+        # SQLite would deadlock against it), so write inline instead.
+        return func(*args, **kwargs)
+    context = contextvars.copy_context()
+    future = get_writer().submit(context.run, func, *args, **kwargs)
+    try:
+        result = future.result(timeout=getattr(settings, 'WRITE_QUEUE_TIMEOUT', 30))
+    except FutureTimeoutError:
+        if future.cancel():
+            raise WriteTimeout(f"{getattr(func, '__name__', func)} was not started in time and has been cancelled")
+        # Already running: it may still commit, so failing now would invite a
+        # duplicate retry. Its batch finishes within the database lock timeout.
+        result = future.result()
+    _adopt_context(context)
+    return result
+
+
+def _adopt_context(context: contextvars.Context):
+    """Copies variables the job changed (e.g. db_router's write tracking) into the current context."""
+    for var, value in context.items():
+        if var.get(_UNSET) is not value:
+            var.set(value)
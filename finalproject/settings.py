@@ -43,10 +43,15 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.TracingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
+    'core.middleware.QueryBudgetMiddleware',
+    'core.middleware.RequestProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -74,15 +79,186 @@ WSGI_APPLICATION = 'finalproject.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# DJANGO_DB_ENGINE=postgresql switches to the PostgreSQL profile below, configured
+# from POSTGRES_* environment variables (requires psycopg, see requirements-postgres.txt).
+DB_ENGINE = os.environ.get('DJANGO_DB_ENGINE', 'sqlite')
+
+if DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('POSTGRES_DB', 'mango_surveillance'),
+            'USER': os.environ.get('POSTGRES_USER', 'postgres'),
+            'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+            'HOST': os.environ.get('POSTGRES_HOST', 'localhost'),
+            'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+            # Keep connections open between requests, and check them before reuse
+            'CONN_MAX_AGE': int(os.environ.get('POSTGRES_CONN_MAX_AGE', 60)),
+            'CONN_HEALTH_CHECKS': True,
+            # Server-side cursors back QuerySet.iterator(); they must be off behind
+            # a transaction-pooling PgBouncer
+            'DISABLE_SERVER_SIDE_CURSORS': os.environ.get('POSTGRES_DISABLE_SERVER_SIDE_CURSORS', '') == '1',
+            'OPTIONS': {
+                'options': f"-c statement_timeout={int(os.environ.get('POSTGRES_STATEMENT_TIMEOUT_MS', 30000))}",
+                'application_name': 'mango_surveillance',
+            },
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {
+                # Seconds a connection waits for a lock before raising "database is locked".
+                # The only busy timeout setting; SQLITE_PRAGMAS does not set busy_timeout.
+                # Write paths take the lock at BEGIN through core.db_tuning.write_transaction.
+                'timeout': 20,
+            },
+        }
+    }
+
+# Read replicas for core's read-heavy views (see core.db_router). Each replica gets
+# an alias replica1, replica2, ...: Postgres hosts from POSTGRES_REPLICA_HOSTS, or
+# SQLite files from SQLITE_REPLICA_PATHS kept in sync by `manage.py sync_sqlite_replicas`.
+_replica_sources = [
+    value.strip() for value in os.environ.get(
+        'POSTGRES_REPLICA_HOSTS' if DB_ENGINE == 'postgresql' else 'SQLITE_REPLICA_PATHS', ''
+    ).split(',') if value.strip()
+]
+DATABASE_REPLICAS = []
+for _index, _source in enumerate(_replica_sources, start=1):
+    _alias = f'replica{_index}'
+    DATABASES[_alias] = {
+        **DATABASES['default'],
+        ('HOST' if DB_ENGINE == 'postgresql' else 'NAME'): _source,
+        'TEST': {'MIRROR': 'default'},
     }
+    DATABASE_REPLICAS.append(_alias)
+
+# After any write, the user's reads stay on the primary for this many seconds
+REPLICA_PIN_SECONDS = 15
+
+# Chunk size for QuerySet.iterator() in maintenance code (server-side cursor fetch size on PostgreSQL)
+DB_ITERATOR_CHUNK_SIZE = 2000
+
+# Applied to every new SQLite connection by core.db_tuning (see core/apps.py); ignored on PostgreSQL
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',   # Safe with WAL; only the last commits can be lost on power failure
+    'cache_size': -20000,      # Negative = KiB, so ~20 MB page cache per connection
+    'mmap_size': 134217728,    # 128 MB memory-mapped I/O
+    'temp_store': 'MEMORY',
+}
+
+# Funnel observation ingest writes through one group-commit writer thread per
+# process (core.write_queue). Off by default; useful on SQLite under heavy ingest.
+SERIALIZE_DB_WRITES = False
+WRITE_QUEUE_WINDOW_MS = 5      # How long the writer waits to batch further writes
+WRITE_QUEUE_MAX_BATCH = 200    # Writes per transaction at most
+WRITE_QUEUE_TIMEOUT = 30       # Seconds a request waits for its write to commit
+
+# Per-request query budgets (core.query_budget). Views can override these with
+# @query_budget; any query shape repeated more than max_repeats times is flagged
+# as a likely N+1. Overruns are logged as warnings when DEBUG or
+# QUERY_BUDGET_VERBOSE is on (set it in test settings), otherwise as metric lines.
+QUERY_BUDGET_ENABLED = True
+QUERY_BUDGET_VERBOSE = False
+# Share of requests that also keep their SQL text for the warning (always under DEBUG)
+QUERY_BUDGET_SQL_SAMPLE_RATE = 0.0
+QUERY_BUDGET_DEFAULT = {
+    'max_queries': 50,
+    'max_time_ms': 500,
+    'max_repeats': 10,
+}
+# Admin changelists can't take the decorator; one query per row is the N+1 to catch
+QUERY_BUDGET_ADMIN_CHANGELIST = {
+    'max_queries': 20,
+    'max_repeats': 5,
 }
 
-# Database router to prevent mango_app from accessing database
-DATABASE_ROUTERS = ['mango_app.db_router.MangoAppRouter']
+# On-demand profiling: when enabled (DJANGO_PROFILING=1), superusers can send
+# "X-Profile: 1" (or add ?_profile=1) to run one request under cProfile; results
+# are kept in PROFILE_DIR and browsable by superusers at /admin/profiles/
+PROFILING_ENABLED = os.environ.get('DJANGO_PROFILING', '') == '1'
+PROFILE_DIR = os.environ.get('DJANGO_PROFILE_DIR', str(BASE_DIR / 'profiles'))
+PROFILE_KEEP = 50
+
+# Prometheus metrics (core.metrics), served at /metrics. Each worker process
+# writes its counters to METRICS_DIR/<pid>-<random>.json; the endpoint merges
+# them and folds the files of exited processes into METRICS_DIR/aggregate.json.
+METRICS_ENABLED = True
+METRICS_DIR = os.environ.get('DJANGO_METRICS_DIR', str(BASE_DIR / 'metrics'))
+METRICS_FLUSH_INTERVAL = 1.0   # Seconds between writes of a process's metrics file
+# Addresses allowed to scrape /metrics; an empty list allows nobody. Behind a reverse
+# proxy every request arrives from the proxy's address, so scrapers must also send
+# "Authorization: Bearer <METRICS_BEARER_TOKEN>" (or be logged in as staff).
+METRICS_ALLOWED_IPS = [ip for ip in os.environ.get('DJANGO_METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',') if ip]
+METRICS_BEARER_TOKEN = os.environ.get('DJANGO_METRICS_TOKEN', '')
+
+# Span tracing of requests and core services (core.tracing), exported as JSON
+# lines to rotating per-process files next to TRACE_FILE (spans.<pid>.jsonl).
+# Off unless DJANGO_TRACING=1; convert with `manage.py export_traces` to load
+# into chrome://tracing or Perfetto.
+TRACING_ENABLED = os.environ.get('DJANGO_TRACING', '') == '1'
+TRACE_FILE = os.environ.get('DJANGO_TRACE_FILE', str(BASE_DIR / 'traces' / 'spans.jsonl'))
+TRACE_MAX_BYTES = 10 * 1024 * 1024            # Per file, before it is rotated
+TRACE_BACKUP_COUNT = 5                        # Rotated files kept per process
+TRACE_MAX_TOTAL_BYTES = 100 * 1024 * 1024     # All processes' span logs together; oldest go first
+
+# Full-page cache for the static mango_app pages (mango_app.cache). Keys include
+# the deploy version: DEPLOY_VERSION if set, otherwise a hash of the page data
+# and templates. MANGO_PAGE_MAX_AGE is the Cache-Control max-age in seconds.
+DEPLOY_VERSION = os.environ.get('DJANGO_DEPLOY_VERSION', '')
+MANGO_PAGE_CACHE_ENABLED = True
+MANGO_PAGE_CACHE_ALIAS = 'default'
+MANGO_PAGE_MAX_AGE = 600
+# Output of `manage.py prerender_site`: the public site as static HTML + hashed assets
+MANGO_PRERENDER_DIR = os.environ.get('DJANGO_MANGO_PRERENDER_DIR', str(BASE_DIR / 'prerendered'))
+
+# Stale-session cleanup, run by `manage.py session_cleanup_worker` (and the
+# one-off `cleanup_sessions` command). Sessions still in progress after
+# SESSION_STALE_HOURS are abandoned SESSION_CLEANUP_BATCH_SIZE at a time.
+SESSION_STALE_HOURS = 2
+SESSION_CLEANUP_BATCH_SIZE = 500
+SESSION_CLEANUP_INTERVAL = 300   # Seconds between worker passes
+# The same worker archives old abandoned sessions (core.archive) into
+# SessionArchive. Completed sessions stay in the hot tables.
+SESSION_ARCHIVE_ABANDONED_DAYS = 30
+SESSION_ARCHIVE_BATCH_SIZE = 200
+
+# Live session progress. The active-session page polls the JSON endpoint every
+# SESSION_PROGRESS_CLIENT_POLL_MS. The SSE stream (core.views.session_progress_stream)
+# holds a worker for as long as a page is open, so it is only enabled, with
+# DJANGO_SESSION_PROGRESS_SSE=1, on deployments running an async server. It
+# re-reads the session every SESSION_PROGRESS_POLL_INTERVAL seconds and closes
+# after SESSION_PROGRESS_STREAM_SECONDS.
+SESSION_PROGRESS_CLIENT_POLL_MS = 10000
+SESSION_PROGRESS_SSE_ENABLED = os.environ.get('DJANGO_SESSION_PROGRESS_SSE', '') == '1'
+SESSION_PROGRESS_POLL_INTERVAL = 2
+SESSION_PROGRESS_KEEPALIVE = 15
+SESSION_PROGRESS_STREAM_SECONDS = 300
+SESSION_PROGRESS_RETRY_MS = 3000   # Browser reconnect delay sent to EventSource
+# Observations shown per page on the active session page; older pages are
+# fetched on demand from the keyset-paginated observations fragment.
+SESSION_OBSERVATION_PAGE_SIZE = 10
+# Multi-surveyor sessions (core.models.SessionParticipant): each participant
+# numbers plants from its own block of SESSION_SEQUENCE_BLOCK_SIZE sequence
+# numbers and gets another block when it runs out.
+SESSION_SEQUENCE_BLOCK_SIZE = 100
+# Completed sessions never change: their detail pages carry strong ETags and
+# the rendered observations list is cached per session (core.views).
+SESSION_FRAGMENT_CACHE_ALIAS = 'default'
+SESSION_FRAGMENT_CACHE_TIMEOUT = 7 * 24 * 3600
+
+# In-memory taxonomy snapshot (core.taxonomy) shared by core and mango_app.
+# Saving a taxonomy model touches TAXONOMY_STAMP_FILE; every process checks
+# its mtime at most every TAXONOMY_CHECK_INTERVAL seconds and reloads.
+TAXONOMY_STAMP_FILE = os.environ.get('DJANGO_TAXONOMY_STAMP_FILE', str(BASE_DIR / 'taxonomy.stamp'))
+TAXONOMY_CHECK_INTERVAL = 5
+
+# Database routers: keep mango_app off the database, split core reads/writes
+DATABASE_ROUTERS = ['mango_app.db_router.MangoAppRouter', 'core.db_router.PrimaryReplicaRouter']
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -126,5 +302,15 @@ LOGIN_URL = '/surveillance-hub/login/'
 LOGIN_REDIRECT_URL = '/surveillance-hub/'
 LOGOUT_REDIRECT_URL = '/surveillance-hub/login/'
 
+# Farm boundaries are simplified so they look unchanged up to this map zoom level
+FARM_BOUNDARY_SIMPLIFY_ZOOM = 17
+# Warn when the boundary area and the entered size_hectares differ by more than this fraction
+FARM_BOUNDARY_AREA_TOLERANCE = 0.25
+# Bbox span of a typical parcel, used to keep spatial queries on a narrow index range.
+# Wider parcels are still found, through a separate (slower) index on their extent
+FARM_MAX_EXTENT_DEGREES = 0.5
+# Most farms a single bbox query returns
+FARM_BBOX_QUERY_LIMIT = 500
+
 # External API Configuration - Only used by core app
 GEOSCAPE_API_KEY = 'lwaGRBA6UAZx5zGYh1zSO8QgdGoJwOlc'
\ No newline at end of file
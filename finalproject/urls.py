@@ -17,7 +17,13 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
+from core.admin import profile_list_view, profile_detail_view
+from core.views import metrics_view
+
 urlpatterns = [
+    path('admin/profiles/', admin.site.admin_view(profile_list_view), name='admin_profiles'),
+    path('admin/profiles/<str:profile_id>/', admin.site.admin_view(profile_detail_view), name='admin_profile_detail'),
+    path('metrics', metrics_view, name='metrics'),
     path('admin/', admin.site.urls),
     path('', include('mango_app.urls')), #static info app
     path('surveillance-hub/', include('core.urls')), #dynamic surveillance app
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class MangoAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'mango_app'
+
+    def ready(self):
+        # Build the search index once per process, from the static data
+        from .search import build_index
+        build_index()
@@ -0,0 +1,157 @@
+"""
+Page caching for the Mango Surveillance application.
+
+The public pages are rendered entirely from the in-memory data in data.py and
+the templates, so their content only changes on deploy. This module caches
+the rendered pages under a deploy version and answers conditional requests
+(ETag / Last-Modified) with 304s.
+"""
+import hashlib
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from core import metrics
+
+APP_DIR = Path(__file__).resolve().parent
+
+# Files whose content defines what the pages look like
+CONTENT_SOURCES = ['data.py', 'data_models.py', 'views.py', 'context_processors.py', 'templates']
+
+
+def _content_files():
+    """
+    List every file that feeds into the rendered pages.
+
+    Returns:
+        list: Paths of the data modules and templates, in a stable order
+    """
+    files = []
+    for source in CONTENT_SOURCES:
+        path = APP_DIR / source
+        if path.is_dir():
+            files.extend(sorted(p for p in path.rglob('*') if p.is_file()))
+        elif path.exists():
+            files.append(path)
+    return files
+
+
+@lru_cache(maxsize=1)
+def get_deploy_version():
+    """
+    Get the deploy version that cache keys are built from.
+
+    Uses settings.DEPLOY_VERSION when set (e.g. a release tag or commit),
+    otherwise a hash of the page data and templates, so a deploy that
+    changes content always gets new keys.
+
+    Returns:
+        str: The deploy version
+    """
+    configured = getattr(settings, 'DEPLOY_VERSION', '')
+    if configured:
+        return configured
+    digest = hashlib.sha1()
+    for path in _content_files():
+        digest.update(path.relative_to(APP_DIR).as_posix().encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()[:12]
+
+
+@lru_cache(maxsize=1)
+def get_last_modified():
+    """
+    Get the Last-Modified timestamp for the cached pages.
+
+    Returns:
+        float: Newest modification time among the content files
+    """
+    return max((path.stat().st_mtime for path in _content_files()), default=0)
+
+
+def page_cache_key(request, page_version=''):
+    """
+    Build the cache key for a page.
+
+    The key includes the full path, which is everything the active_menu
+    context processor looks at, so each cached page carries the right
+    highlighted menu item. Query strings are ignored because no page uses them.
+
+    Args:
+        request: The HTTP request
+        page_version (str): Version of any data the page uses besides the deploy
+
+    Returns:
+        str: The cache key
+    """
+    if page_version:
+        return f"mango_page:{get_deploy_version()}:{page_version}:{request.path}"
+    return f"mango_page:{get_deploy_version()}:{request.path}"
+
+
+class CachedPageMixin:
+    """
+    Serve a view's GET/HEAD responses from the page cache.
+
+    Only successful responses are stored. Every response carries ETag,
+    Last-Modified and Cache-Control headers, and matching conditional
+    requests get a 304 without touching the cache body.
+
+    Views that also render data from outside mango_app override
+    get_page_version() and get_page_modified() so that a change to that data
+    gets a new cache entry and a new Last-Modified.
+    """
+
+    def get_page_version(self):
+        """
+        Get the version of any non-deploy data the page depends on.
+
+        Returns:
+            str: The version, or '' if the page only depends on the deploy
+        """
+        return ''
+
+    def get_page_modified(self):
+        """
+        Get when the page's non-deploy data last changed.
+
+        Returns:
+            float: Timestamp, or 0 if the page only depends on the deploy
+        """
+        return 0
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD') or not getattr(settings, 'MANGO_PAGE_CACHE_ENABLED', True):
+            return super().dispatch(request, *args, **kwargs)
+
+        cache = caches[getattr(settings, 'MANGO_PAGE_CACHE_ALIAS', 'default')]
+        key = page_cache_key(request, self.get_page_version())
+        entry = cache.get(key)
+        metrics.record_cache('mango_pages', entry is not None)
+
+        if entry is None:
+            response = super().dispatch(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            if hasattr(response, 'render') and not response.is_rendered:
+                response.render()
+            entry = {
+                'content': response.content,
+                'content_type': response['Content-Type'],
+                'etag': quote_etag(hashlib.sha1(response.content).hexdigest()[:16]),
+            }
+            cache.set(key, entry, timeout=None)
+
+        last_modified = int(max(get_last_modified(), self.get_page_modified()))
+        response = get_conditional_response(request, etag=entry['etag'], last_modified=last_modified)
+        if response is None:
+            response = HttpResponse(entry['content'], content_type=entry['content_type'])
+        response['ETag'] = entry['etag']
+        response['Last-Modified'] = http_date(last_modified)
+        patch_cache_control(response, public=True, max_age=getattr(settings, 'MANGO_PAGE_MAX_AGE', 600))
+        return response
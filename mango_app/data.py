@@ -83,6 +83,9 @@ mango_items = [
     )
 ]
 
+# Lookup table for get_item_by_id
+_items_by_id = {item.id: item for item in mango_items}
+
 
 # Team members data
 team_members = [
@@ -222,10 +225,7 @@ def get_item_by_id(item_id):
     Returns:
         MangoItem: The matching item or None if not found
     """
-    for item in mango_items:
-        if item.id == item_id:
-            return item
-    return None
+    return _items_by_id.get(item_id)
 
 def get_team_members():
     """
@@ -0,0 +1,186 @@
+"""
+Pre-render the public Mango Surveillance site to static HTML.
+
+Every mango_app page is rendered to <output>/<path>/index.html, and the static
+assets it references are copied under content-hashed names so they can be
+cached forever by a web server or CDN. Builds are incremental: a manifest
+records a fingerprint of each page's templates and data, and only pages whose
+fingerprint changed are rendered again.
+"""
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.staticfiles import finders
+from django.core.management.base import BaseCommand, CommandError
+from django.template.loader import get_template
+from django.test import RequestFactory, override_settings
+from django.urls import reverse, resolve
+
+from mango_app.data import (mango_items, get_team_members, get_environmental_factors, get_mango_facts,
+                            get_surveillance_periods, get_surveillance_methods, get_record_sheet_fields,
+                            get_surveillance_recommendations, get_external_resources, get_contact_info)
+from mango_app.views import get_live_taxonomy
+
+APP_DIR = Path(__file__).resolve().parents[2]
+MANIFEST_NAME = '.prerender-manifest.json'
+BASE_TEMPLATE = 'mango_app/base.html'
+
+
+def fingerprint_data(data):
+    """
+    Fingerprint page data built from the plain data-model objects.
+
+    Args:
+        data: Any mix of lists, dicts and data-model objects
+
+    Returns:
+        str: SHA-1 of the data's canonical JSON form
+    """
+    encoded = json.dumps(data, default=lambda obj: vars(obj), sort_keys=True)
+    return hashlib.sha1(encoded.encode()).hexdigest()
+
+
+def get_pages():
+    """
+    List every public page with the template and data it is rendered from.
+
+    Returns:
+        list: (path, template name, data) tuples
+    """
+    pages = [
+        (reverse('mango_app:home'), 'mango_app/home.html',
+         [get_mango_facts(), get_surveillance_periods()]),
+        (reverse('mango_app:mango_items'), 'mango_app/mango_items.html',
+         [mango_items, get_environmental_factors()]),
+        (reverse('mango_app:surveillance_guide'), 'mango_app/surveillance.html',
+         [get_surveillance_methods(), get_record_sheet_fields()]),
+        (reverse('mango_app:about'), 'mango_app/about.html',
+         [get_team_members(), get_external_resources(), get_contact_info()]),
+    ]
+    for item in mango_items:
+        pages.append((
+            reverse('mango_app:mango_item_detail', kwargs={'item_id': item.id}), 'mango_app/detail.html',
+            [item, get_surveillance_recommendations(item.item_type), get_live_taxonomy(item)],
+        ))
+    return pages
+
+
+class Command(BaseCommand):
+    help = 'Render every mango_app page to static HTML with content-hashed assets (incremental)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            help='Directory to write the site to (default: settings.MANGO_PRERENDER_DIR)'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Render every page even if its templates and data are unchanged'
+        )
+
+    def handle(self, *args, **options):
+        output = Path(options['output'] or settings.MANGO_PRERENDER_DIR)
+        output.mkdir(parents=True, exist_ok=True)
+        manifest_path = output / MANIFEST_NAME
+        try:
+            manifest = json.loads(manifest_path.read_text())
+        except (OSError, ValueError):
+            manifest = {}
+
+        assets = self._build_assets(output)
+        code_hash = self._hash_files([APP_DIR / 'views.py', APP_DIR / 'context_processors.py'])
+        shared_hash = hashlib.sha1((code_hash + json.dumps(assets, sort_keys=True)).encode()).hexdigest()
+
+        rendered = unchanged = 0
+        pages = {}
+        factory = RequestFactory()
+        for path, template_name, data in get_pages():
+            template_files = [Path(get_template(name).origin.name) for name in (template_name, BASE_TEMPLATE)]
+            page_hash = hashlib.sha1(
+                (shared_hash + self._hash_files(template_files) + fingerprint_data(data)).encode()
+            ).hexdigest()
+            target = output / path.strip('/') / 'index.html'
+            pages[path] = {'hash': page_hash, 'file': str(target.relative_to(output))}
+
+            if not options['force'] and manifest.get(path, {}).get('hash') == page_hash and target.exists():
+                unchanged += 1
+                continue
+            self._write(target, self._render(factory, path, assets))
+            rendered += 1
+            self.stdout.write(f'  rendered {path}')
+
+        removed = 0
+        for path, entry in manifest.items():
+            if path not in pages:
+                stale = output / entry['file']
+                if stale.exists():
+                    stale.unlink()
+                removed += 1
+
+        self._write(manifest_path, json.dumps(pages, indent=2, sort_keys=True))
+        self.stdout.write(self.style.SUCCESS(
+            f'Pre-rendered site in {output}: {rendered} rendered, {unchanged} unchanged, {removed} removed.'
+        ))
+
+    def _render(self, factory, path, assets):
+        """Render one page through its view, bypassing the page cache, and point it at the hashed assets."""
+        request = factory.get(path)
+        request.user = AnonymousUser()
+        match = resolve(path)
+        request.resolver_match = match
+        with override_settings(MANGO_PAGE_CACHE_ENABLED=False):
+            response = match.func(request, *match.args, **match.kwargs)
+            if hasattr(response, 'render') and not response.is_rendered:
+                response.render()
+        if response.status_code != 200:
+            raise CommandError(f'{path} returned HTTP {response.status_code}')
+
+        html = response.content.decode(response.charset)
+        # Longest URLs first so no URL is replaced inside a longer one
+        for url in sorted(assets, key=len, reverse=True):
+            html = html.replace(url, assets[url])
+        return html
+
+    def _build_assets(self, output):
+        """
+        Copy mango_app's static files under content-hashed names.
+
+        Returns:
+            dict: Original static URL -> hashed static URL
+        """
+        static_url = settings.STATIC_URL
+        static_dir = output / static_url.strip('/')
+        assets = {}
+        for finder in finders.get_finders():
+            for relative_path, storage in finder.list([]):
+                if not relative_path.startswith('mango_app/'):
+                    continue
+                source = Path(storage.path(relative_path))
+                digest = hashlib.sha1(source.read_bytes()).hexdigest()[:10]
+                stem, dot, suffix = relative_path.rpartition('.')
+                hashed_path = f'{stem}.{digest}.{suffix}' if dot else f'{relative_path}.{digest}'
+                destination = static_dir / hashed_path
+                if not destination.exists():
+                    destination.parent.mkdir(parents=True, exist_ok=True)
+                    shutil.copy2(source, destination)
+                assets[static_url + relative_path] = static_url + hashed_path
+        return assets
+
+    def _hash_files(self, paths):
+        digest = hashlib.sha1()
+        for path in paths:
+            digest.update(path.read_bytes())
+        return digest.hexdigest()
+
+    def _write(self, path, content):
+        """Write a file atomically so a web server never serves a half-written page."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f'.{path.name}.tmp')
+        tmp_path.write_text(content, encoding='utf-8')
+        os.replace(tmp_path, path)
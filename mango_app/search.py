@@ -0,0 +1,373 @@
+"""
+Full-text search for the Mango Surveillance application.
+
+An inverted index over the pest and disease encyclopedia, the environmental
+factors and the surveillance methods is built once at startup (see apps.py).
+Queries are tokenized and stemmed the same way as the documents, the last
+query word is prefix-matched (so search-as-you-type works), results are ranked
+with BM25 and returned with highlighted snippets. The index can also be
+exported as a compact JSON blob for client-side search.
+"""
+import json
+import math
+import re
+import threading
+from bisect import bisect_left
+from html import escape
+
+from django.urls import reverse
+
+from .data import mango_items, get_environmental_factors, get_surveillance_methods
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# Title words count this many times towards term frequency
+TITLE_WEIGHT = 3
+
+# Prefix expansions score slightly below exact matches
+PREFIX_WEIGHT = 0.8
+MAX_PREFIX_EXPANSIONS = 50
+
+SNIPPET_WORDS = 24
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+STOP_WORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the their this to was were "
+    "which with can may".split()
+)
+
+# (suffix, replacement) tried in order; the first match wins
+SUFFIX_RULES = (
+    ('ational', 'ate'), ('tional', 'tion'), ('iveness', 'ive'), ('fulness', 'ful'), ('ousness', 'ous'),
+    ('ization', 'ize'), ('ation', 'ate'), ('ness', ''), ('ments', ''), ('ment', ''),
+    ('ings', ''), ('ing', ''), ('ies', 'y'), ('ied', 'y'), ('edly', ''), ('ed', ''), ('ly', ''),
+    ('shes', 'sh'), ('ches', 'ch'), ('xes', 'x'), ('oes', 'o'),
+    ('ss', 'ss'), ('us', 'us'), ('is', 'is'), ('s', ''),
+)
+
+
+def stem(word):
+    """
+    Reduce a word to a light stem.
+
+    This is a small suffix-stripping stemmer (in the spirit of Porter's), so
+    that e.g. "damaged", "damaging" and "damage" all index as "damag".
+
+    Args:
+        word (str): Lower-case word
+
+    Returns:
+        str: The stem
+    """
+    if len(word) <= 3 or word.isdigit():
+        return word
+    for suffix, replacement in SUFFIX_RULES:
+        # Rules that leave a replacement (flies -> fly) may cut closer to the root
+        if word.endswith(suffix) and len(word) - len(suffix) >= (2 if replacement else 3):
+            word = word[:-len(suffix)] + replacement
+            break
+    if len(word) > 4 and word.endswith('e'):
+        word = word[:-1]
+    if len(word) > 3 and word[-1] == word[-2] and word[-1] not in 'lsz' and word[-1] not in 'aeiou':
+        word = word[:-1]
+    return word
+
+
+def tokenize(text):
+    """
+    Split text into (stem, start, end) tokens, dropping stop words.
+
+    Args:
+        text (str): Text to tokenize
+
+    Returns:
+        list: (stem, start offset, end offset) tuples
+    """
+    return [
+        (stem(match.group()), match.start(), match.end())
+        for match in TOKEN_RE.finditer(text.lower())
+        if match.group() not in STOP_WORDS
+    ]
+
+
+class SearchDocument:
+    """A searchable page section: a title, body text and a link target."""
+
+    __slots__ = (
+        'title', 'body', 'kind', 'url_name', 'url_kwargs', 'title_tokens', 'tokens', 'positions', 'length', '_url'
+    )
+
+    def __init__(self, title, body, kind, url_name, url_kwargs=None):
+        self.title = title
+        self.body = body
+        self.kind = kind
+        self.url_name = url_name
+        self.url_kwargs = url_kwargs or {}
+        self.title_tokens = tokenize(title)
+        self.tokens = tokenize(body)
+        # Term -> indexes into self.tokens, for picking snippet windows
+        self.positions = {}
+        for position, (term, _, _) in enumerate(self.tokens):
+            self.positions.setdefault(term, []).append(position)
+        self.length = len(self.title_tokens) * TITLE_WEIGHT + len(self.tokens)
+        self._url = None
+
+    @property
+    def url(self):
+        # Resolved on first use: the index is built in AppConfig.ready(), before URLs can be reversed safely
+        if self._url is None:
+            self._url = reverse(self.url_name, kwargs=self.url_kwargs)
+        return self._url
+
+
+def collect_documents():
+    """
+    Build the documents to index from the static data.
+
+    Returns:
+        list: SearchDocument objects
+    """
+    documents = []
+    for item in mango_items:
+        documents.append(SearchDocument(
+            title=item.name,
+            body=f"{item.scientific_name}. {item.description} {item.detailed_info}",
+            kind=item.item_type,
+            url_name='mango_app:mango_item_detail',
+            url_kwargs={'item_id': item.id},
+        ))
+
+    items_by_name = {item.name.lower(): item for item in mango_items}
+    for factor in get_environmental_factors():
+        item = items_by_name.get(factor.disease.lower())
+        documents.append(SearchDocument(
+            title=f"{factor.disease} conditions",
+            body=(f"{factor.disease} develops at temperatures of {factor.temperature}, "
+                  f"humidity {factor.humidity}, rainfall {factor.rainfall}, in the {factor.season}."),
+            kind='environmental_factor',
+            url_name='mango_app:mango_item_detail' if item else 'mango_app:mango_items',
+            url_kwargs={'item_id': item.id} if item else None,
+        ))
+
+    for method in get_surveillance_methods():
+        documents.append(SearchDocument(
+            title=method.name,
+            body=(f"{method.description} Best for: {', '.join(method.best_for)}. "
+                  f"Frequency: {method.frequency} Procedure: {method.procedure}"),
+            kind='surveillance_method',
+            url_name='mango_app:surveillance_guide',
+        ))
+    return documents
+
+
+class SearchIndex:
+    """
+    Inverted index with BM25 ranking.
+
+    postings maps each stem to a list of (document index, term frequency);
+    terms is the sorted vocabulary used for prefix expansion.
+    """
+
+    def __init__(self, documents):
+        self.documents = documents
+        self.postings = {}
+        for doc_id, document in enumerate(documents):
+            frequencies = {}
+            for term, _, _ in document.title_tokens:
+                frequencies[term] = frequencies.get(term, 0) + TITLE_WEIGHT
+            for term, _, _ in document.tokens:
+                frequencies[term] = frequencies.get(term, 0) + 1
+            for term, frequency in frequencies.items():
+                self.postings.setdefault(term, []).append((doc_id, frequency))
+        self.terms = sorted(self.postings)
+        self.avgdl = sum(d.length for d in documents) / len(documents) if documents else 0.0
+        # Per-document BM25 length normalisation, precomputed
+        self.norms = [K1 * (1 - B + B * d.length / self.avgdl) for d in documents]
+        count = len(documents)
+        self.idf = {
+            term: math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self.postings.items()
+        }
+
+    def expand_prefix(self, prefix):
+        """
+        Find indexed terms starting with a prefix.
+
+        Args:
+            prefix (str): Stemmed prefix
+
+        Returns:
+            list: Matching terms, at most MAX_PREFIX_EXPANSIONS
+        """
+        matches = []
+        position = bisect_left(self.terms, prefix)
+        while position < len(self.terms) and len(matches) < MAX_PREFIX_EXPANSIONS:
+            term = self.terms[position]
+            if not term.startswith(prefix):
+                break
+            matches.append(term)
+            position += 1
+        return matches
+
+    def query_terms(self, query):
+        """
+        Turn a query into weighted index terms.
+
+        Every word matches its stem exactly; the last word also matches any
+        term it is a prefix of.
+
+        Args:
+            query (str): Raw query text
+
+        Returns:
+            dict: Term -> weight
+        """
+        tokens = tokenize(query)
+        weights = {}
+        for position, (term, _, _) in enumerate(tokens):
+            if term in self.postings:
+                weights[term] = 1.0
+            if position == len(tokens) - 1:
+                for expansion in self.expand_prefix(term):
+                    weights.setdefault(expansion, PREFIX_WEIGHT)
+        return weights
+
+    def search(self, query, limit=10):
+        """
+        Rank documents against a query.
+
+        Args:
+            query (str): Raw query text
+            limit (int): Maximum number of results
+
+        Returns:
+            list: Result dicts (title, url, kind, score, snippet), best first
+        """
+        weights = self.query_terms(query)
+        scores = {}
+        for term, weight in weights.items():
+            idf = self.idf[term]
+            for doc_id, frequency in self.postings[term]:
+                scores[doc_id] = (
+                    scores.get(doc_id, 0.0) + weight * idf * frequency * (K1 + 1) / (frequency + self.norms[doc_id])
+                )
+
+        ranked = sorted(scores.items(), key=lambda pair: pair[1], reverse=True)[:limit]
+        results = []
+        for doc_id, score in ranked:
+            document = self.documents[doc_id]
+            results.append({
+                'title': highlight(document.title, document.title_tokens, weights),
+                'url': document.url,
+                'kind': document.kind,
+                'score': round(score, 4),
+                'snippet': snippet(document, weights),
+            })
+        return results
+
+    def export(self):
+        """
+        Serialize the index for client-side search.
+
+        Postings are flattened to [doc, tf, doc, tf, ...] per term. The client
+        must apply the same tokenizer and stemmer to queries.
+
+        Returns:
+            str: Compact JSON
+        """
+        data = {
+            'v': 1,
+            'k1': K1,
+            'b': B,
+            'avgdl': round(self.avgdl, 3),
+            'docs': [[d.title, d.url, d.kind, d.length] for d in self.documents],
+            'postings': {term: [n for pair in postings for n in pair] for term, postings in self.postings.items()},
+        }
+        return json.dumps(data, separators=(',', ':'))
+
+
+def highlight(text, tokens, weights):
+    """
+    Escape text and wrap the tokens that matched the query in <mark>.
+
+    Args:
+        text (str): Original text
+        tokens (list): tokenize(text) output
+        weights (dict): Matched query terms
+
+    Returns:
+        str: HTML-safe highlighted text
+    """
+    parts = []
+    position = 0
+    for term, start, end in tokens:
+        if term in weights:
+            parts.append(escape(text[position:start]))
+            parts.append(f"<mark>{escape(text[start:end])}</mark>")
+            position = end
+    parts.append(escape(text[position:]))
+    return ''.join(parts)
+
+
+def snippet(document, weights):
+    """
+    Pick the SNIPPET_WORDS-long window of the body with the most query matches.
+
+    Args:
+        document (SearchDocument): The matched document
+        weights (dict): Matched query terms
+
+    Returns:
+        str: HTML-safe snippet with highlights and ellipses
+    """
+    tokens = document.tokens
+    if not tokens:
+        return ''
+    hits = sorted(position for term in weights for position in document.positions.get(term, ()))
+    best_start = best = 0
+    end = 0
+    for start, position in enumerate(hits):
+        # hits[start:end] all fall inside a window beginning at this hit
+        while end < len(hits) and hits[end] < position + SNIPPET_WORDS:
+            end += 1
+        if end - start > best:
+            best, best_start = end - start, position
+    # Lead in with a few words of context before the first hit
+    best_start = max(0, min(best_start - 3, len(tokens) - SNIPPET_WORDS))
+    window = tokens[best_start:best_start + SNIPPET_WORDS]
+    char_start = 0 if best_start == 0 else window[0][1]
+    char_end = len(document.body) if best_start + SNIPPET_WORDS >= len(tokens) else window[-1][2]
+    shifted = [(term, start - char_start, end - char_start) for term, start, end in window]
+    text = highlight(document.body[char_start:char_end], shifted, weights)
+    return f"{'… ' if char_start else ''}{text}{' …' if char_end < len(document.body) else ''}"
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def build_index():
+    """
+    Build (or rebuild) the process-wide search index.
+
+    Returns:
+        SearchIndex: The new index
+    """
+    global _index
+    index = SearchIndex(collect_documents())
+    with _index_lock:
+        _index = index
+    return index
+
+
+def get_index():
+    """
+    Get the process-wide search index, building it on first use.
+
+    Returns:
+        SearchIndex: The index
+    """
+    return _index if _index is not None else build_index()
@@ -0,0 +1,160 @@
+"""
+Tests for the Mango Surveillance application.
+"""
+import json
+import re
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from .data import mango_items
+from .search import get_index, stem
+from .views import HomeView
+
+
+class PageCacheTests(TestCase):
+    """Deploy-versioned page cache and conditional requests (mango_app.cache)."""
+
+    def setUp(self):
+        caches['default'].clear()
+
+    def test_matching_etag_is_not_modified(self):
+        url = reverse('mango_app:home')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('max-age=600', response['Cache-Control'])
+        etag = response['ETag']
+
+        not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified.content, b'')
+        self.assertEqual(not_modified['ETag'], etag)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH='"stale"').status_code, 200)
+
+    def test_last_modified_is_honoured(self):
+        url = reverse('mango_app:about')
+        last_modified = self.client.get(url)['Last-Modified']
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+
+    def test_pages_are_rendered_once(self):
+        url = reverse('mango_app:mango_items')
+        first = self.client.get(url)
+        with mock.patch('mango_app.views.MangoItemListView.get_context_data') as get_context_data:
+            second = self.client.get(url)
+        get_context_data.assert_not_called()
+        self.assertEqual(second.content, first.content)
+
+    def test_a_new_deploy_renders_again(self):
+        url = reverse('mango_app:home')
+        self.client.get(url)
+        with mock.patch('mango_app.cache.get_deploy_version', return_value='next-release'):
+            with mock.patch.object(HomeView, 'get_context_data', autospec=True,
+                                   side_effect=HomeView.get_context_data) as get_context_data:
+                self.assertEqual(self.client.get(url).status_code, 200)
+                self.client.get(url)
+        get_context_data.assert_called_once()
+
+
+class PrerenderSiteTests(TestCase):
+    """Incremental static builds (the prerender_site command)."""
+
+    def setUp(self):
+        output = tempfile.TemporaryDirectory()
+        self.addCleanup(output.cleanup)
+        self.output = Path(output.name)
+
+    def build(self, *args):
+        stdout = StringIO()
+        call_command('prerender_site', *args, output=str(self.output), stdout=stdout)
+        rendered = re.findall(r'^  rendered (\S+)', stdout.getvalue(), re.MULTILINE)
+        summary = re.search(r'(\d+) rendered, (\d+) unchanged, (\d+) removed', stdout.getvalue())
+        return rendered, tuple(int(count) for count in summary.groups())
+
+    def test_unchanged_pages_are_skipped(self):
+        pages = 4 + len(mango_items)
+        rendered, counts = self.build()
+        self.assertEqual(counts, (pages, 0, 0))
+        self.assertTrue((self.output / 'index.html').exists())
+        self.assertTrue((self.output / 'pests-diseases' / str(mango_items[0].id) / 'index.html').exists())
+
+        self.assertEqual(self.build(), ([], (0, pages, 0)))
+
+        item = mango_items[0]
+        with mock.patch.object(item, 'description', item.description + ' Updated.'):
+            rendered, counts = self.build()
+        # Only the pages showing the item: the list and its own detail page
+        self.assertEqual(sorted(rendered), sorted([
+            reverse('mango_app:mango_items'), reverse('mango_app:mango_item_detail', kwargs={'item_id': item.id}),
+        ]))
+        self.assertEqual(counts, (2, pages - 2, 0))
+        self.assertEqual(self.build('--force')[1], (pages, 0, 0))
+
+    def test_pages_no_longer_in_the_site_are_removed(self):
+        self.build()
+        stale = self.output / 'old-page' / 'index.html'
+        stale.parent.mkdir()
+        stale.write_text('old')
+        manifest_path = self.output / '.prerender-manifest.json'
+        manifest = json.loads(manifest_path.read_text())
+        manifest['/old-page/'] = {'hash': 'x', 'file': 'old-page/index.html'}
+        manifest_path.write_text(json.dumps(manifest))
+
+        self.assertEqual(self.build()[1][2], 1)
+        self.assertFalse(stale.exists())
+
+    def test_pages_link_content_hashed_assets(self):
+        self.build()
+        html = (self.output / 'index.html').read_text()
+        assets = re.findall(r'/static/(mango_app/[^"\']+)', html)
+        self.assertTrue(assets)
+        for asset in assets:
+            self.assertRegex(asset, r'\.[0-9a-f]{10}\.\w+$')
+            self.assertTrue((self.output / 'static' / asset).exists(), asset)
+
+
+class SearchTests(TestCase):
+    """Ranking and highlighting of the encyclopedia search (mango_app.search)."""
+
+    def search(self, query, **params):
+        response = self.client.get(reverse('mango_app:search'), {'q': query, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()['results']
+
+    def test_best_match_ranks_first_with_highlights(self):
+        results = self.search('seed weevil')
+        self.assertEqual(results[0]['title'], 'Mango <mark>Seed</mark> <mark>Weevil</mark>')
+        self.assertEqual(results[0]['url'], reverse('mango_app:mango_item_detail', kwargs={'item_id': 1}))
+        self.assertIn('adult <mark>weevil</mark>', results[0]['snippet'])
+
+        results = self.search('fruit fly')
+        self.assertEqual(results[0]['title'], 'Mango <mark>Fruit</mark> <mark>Fly</mark>')
+        scores = [result['score'] for result in results]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+
+    def test_words_match_by_stem_and_the_last_word_by_prefix(self):
+        self.assertEqual(stem('damaged'), stem('damaging'))
+        self.assertIn('Mango Seed <mark>Weevil</mark>', [result['title'] for result in self.search('weev')])
+        snippets = ' '.join(result['snippet'] for result in self.search('damaging'))
+        self.assertIn('<mark>damages</mark>', snippets)
+
+    def test_snippets_are_escaped(self):
+        snippets = [result['snippet'] for result in self.search('anthracnose humidity')]
+        self.assertTrue(any('(&gt;80%)' in snippet for snippet in snippets))
+
+    def test_empty_queries_and_limits(self):
+        self.assertEqual(self.search('   '), [])
+        self.assertEqual(self.search('xylophone'), [])
+        self.assertEqual(len(self.search('mango', limit=2)), 2)
+        self.assertEqual(len(self.search('mango', limit='many')), min(10, len(get_index().search('mango', limit=50))))
+
+    def test_index_export_matches_the_server_index(self):
+        exported = self.client.get(reverse('mango_app:search_index')).json()
+        self.assertEqual(len(exported['docs']), len(get_index().documents))
+        postings = exported['postings'][stem('weevil')]
+        self.assertEqual(postings[::2], [doc_id for doc_id, _ in get_index().postings[stem('weevil')]])
@@ -17,6 +17,10 @@ urlpatterns = [
     path('surveillance-guide/', views.SurveillanceView.as_view(), name='surveillance_guide'),  # Renamed!
     path('about/', views.AboutView.as_view(), name='about'),
     
+    # Search: JSON results, and the index itself for client-side search
+    path('search/', views.SearchView.as_view(), name='search'),
+    path('search/index.json', views.SearchIndexView.as_view(), name='search_index'),
+    
     # Detail page route - using regex to capture numeric item_id
     re_path(r'^pests-diseases/(?P<item_id>\d+)/$', views.MangoItemDetailView.as_view(), name='mango_item_detail'),
 ]
\ No newline at end of file
@@ -6,15 +6,44 @@ user requests for the Mango Pest and Disease Surveillance web application.
 """
 from django.shortcuts import render
 from django.views.generic import TemplateView, View
-from django.http import Http404
+from django.http import Http404, HttpResponse, JsonResponse
+
+from core.taxonomy import get_taxonomy
+
+from .cache import CachedPageMixin
+from .search import get_index
 
 from .data import (mango_items, get_item_by_id, get_team_members, get_environmental_factors,
                  get_mango_facts, get_surveillance_periods, get_surveillance_methods,
                  get_record_sheet_fields, get_surveillance_recommendations,
                  get_external_resources, get_contact_info)
 
+def get_live_taxonomy(item):
+    """
+    Look up the surveillance system's live record for a pest or disease.
+
+    Reads the in-memory taxonomy snapshot, so no database query is made.
+
+    Args:
+        item: MangoItem to look up (matched by name)
+
+    Returns:
+        dict: Plant part, plant type and seasonal stage names for the item,
+            or None if the surveillance system has no record of it
+    """
+    taxonomy = get_taxonomy()
+    record = taxonomy.find(item.name)
+    if record is None:
+        return None
+    return {
+        'plant_parts': [part.name for part in taxonomy.parts_for(record.plant_part_ids)],
+        'plant_types': [taxonomy.plant_types[pk].name for pk in record.plant_type_ids if pk in taxonomy.plant_types],
+        'stages': [stage.name for stage in taxonomy.stages_for(record.stage_ids)],
+    }
+
+
 # Home Page View
-class HomeView(TemplateView):
+class HomeView(CachedPageMixin, TemplateView):
     """Display the home page with featured content."""
     template_name = 'mango_app/home.html'
     
@@ -46,7 +75,7 @@ class HomeView(TemplateView):
 
 
 # Pest and Disease List View
-class MangoItemListView(TemplateView):
+class MangoItemListView(CachedPageMixin, TemplateView):
     """Display all pests and diseases in a grid layout."""
     template_name = 'mango_app/mango_items.html'
     
@@ -77,9 +106,17 @@ class MangoItemListView(TemplateView):
 
 
 # Individual Pest or Disease Detail View
-class MangoItemDetailView(View):
+class MangoItemDetailView(CachedPageMixin, View):
     """Display detailed information about a specific pest or disease."""
     template_name = 'mango_app/detail.html'
+
+    def get_page_version(self):
+        """The page shows live taxonomy data, so cache it per taxonomy version."""
+        return get_taxonomy().version
+
+    def get_page_modified(self):
+        """The page changes when the taxonomy does."""
+        return get_taxonomy().modified
     
     def get(self, request, item_id):
         """
@@ -122,7 +159,8 @@ class MangoItemDetailView(View):
             # Create context with item and recommendation
             context = {
                 'item': item,
-                'recommendation': recommendation
+                'recommendation': recommendation,
+                'taxonomy': get_live_taxonomy(item)
             }
         except ValueError as e:
             # Handle invalid item_type
@@ -133,7 +171,7 @@ class MangoItemDetailView(View):
 
 
 # Surveillance Methods View
-class SurveillanceView(TemplateView):
+class SurveillanceView(CachedPageMixin, TemplateView):
     """Display information about surveillance methods for mango pests and diseases."""
     template_name = 'mango_app/surveillance.html'
     
@@ -165,7 +203,7 @@ class SurveillanceView(TemplateView):
 
 
 # About Project View
-class AboutView(TemplateView):
+class AboutView(CachedPageMixin, TemplateView):
     """Display information about the project and team members."""
     template_name = 'mango_app/about.html'
     
@@ -199,4 +237,43 @@ class AboutView(TemplateView):
         context['team_members'] = team_members
         context['external_resources'] = resources
         context['contact'] = contact
-        return context
\ No newline at end of file
+        return context
+
+
+# Search Endpoint
+class SearchView(View):
+    """Search the encyclopedia, environmental factors and surveillance methods."""
+
+    MAX_LIMIT = 50
+
+    def get(self, request):
+        """
+        Handle GET requests for a search query.
+
+        Args:
+            request: The HTTP request, with the query in ``q`` and an optional ``limit``
+
+        Returns:
+            JsonResponse: The query and its ranked results with highlighted snippets
+        """
+        query = request.GET.get('q', '').strip()
+        try:
+            limit = min(max(int(request.GET.get('limit', 10)), 1), self.MAX_LIMIT)
+        except ValueError:
+            limit = 10
+        results = get_index().search(query, limit=limit) if query else []
+        return JsonResponse({'query': query, 'results': results})
+
+
+# Search Index Export
+class SearchIndexView(CachedPageMixin, View):
+    """Serve the search index as compact JSON for client-side search."""
+
+    def get(self, request):
+        """
+        Handle GET requests for the exported index.
+
+        Returns:
+            HttpResponse: The index as JSON (cached by deploy version like the pages)
+        """
+        return HttpResponse(get_index().export(), content_type='application/json')
@@ -0,0 +1,53 @@
+#!/usr/bin/env bash
+# Benchmark request throughput on the tuned SQLite profile and on a local
+# PostgreSQL, using `manage.py bench_requests`.
+#
+# PostgreSQL connection settings come from the usual POSTGRES_* variables
+# (see finalproject/settings.py). If no server is reachable and docker is
+# available, a throwaway postgres:16 container is started for the run.
+#
+#   pip install -r requirements-postgres.txt
+#   scripts/compare_db_profiles.sh [extra bench_requests args]
+set -euo pipefail
+
+cd "$(dirname "$0")/.."
+BENCH_ARGS=("$@")
+
+export POSTGRES_DB="${POSTGRES_DB:-mango_bench}"
+export POSTGRES_USER="${POSTGRES_USER:-postgres}"
+export POSTGRES_PASSWORD="${POSTGRES_PASSWORD:-postgres}"
+export POSTGRES_HOST="${POSTGRES_HOST:-localhost}"
+export POSTGRES_PORT="${POSTGRES_PORT:-5432}"
+
+CONTAINER=""
+cleanup() {
+    [ -n "$SQLITE_DIR" ] && rm -rf "$SQLITE_DIR"
+    [ -n "$CONTAINER" ] && docker rm -f "$CONTAINER" >/dev/null
+}
+SQLITE_DIR="$(mktemp -d)"
+trap cleanup EXIT
+
+echo "== SQLite (tuned profile, scratch copy of the database) =="
+export SQLITE_PATH="$SQLITE_DIR/bench.sqlite3"
+cp db.sqlite3 "$SQLITE_PATH"
+python manage.py migrate -v0
+python manage.py bench_requests "${BENCH_ARGS[@]}"
+unset SQLITE_PATH
+
+echo
+echo "== PostgreSQL ($POSTGRES_HOST:$POSTGRES_PORT/$POSTGRES_DB) =="
+if ! python -c "import socket, sys; socket.create_connection((sys.argv[1], int(sys.argv[2])), 2)" \
+        "$POSTGRES_HOST" "$POSTGRES_PORT" 2>/dev/null; then
+    if command -v docker >/dev/null; then
+        CONTAINER="mango-bench-postgres"
+        docker run -d --rm --name "$CONTAINER" -p "$POSTGRES_PORT:5432" \
+            -e POSTGRES_PASSWORD="$POSTGRES_PASSWORD" -e POSTGRES_DB="$POSTGRES_DB" postgres:16 >/dev/null
+        until docker exec "$CONTAINER" pg_isready -U postgres >/dev/null 2>&1; do sleep 1; done
+    else
+        echo "No PostgreSQL reachable and docker not available; skipping." >&2
+        exit 1
+    fi
+fi
+export DJANGO_DB_ENGINE=postgresql
+python manage.py migrate -v0
+python manage.py bench_requests "${BENCH_ARGS[@]}"